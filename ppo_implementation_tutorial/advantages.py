@@ -0,0 +1,83 @@
+"""Advantage estimation shared by the PPO scripts.
+
+The scripts used to walk the rollout backwards one step at a time, which
+launches a handful of tiny tensor ops per step (thousands per update with
+``num_steps=2048``). Here the backward recurrence
+``y[t] = x[t] + discount[t] * y[t + 1]`` is solved a chunk of steps at a
+time: inside a chunk every ``y[t]`` is a weighted sum of the chunk's
+``x`` and the carry from the next chunk, with weights that are running
+products of the discounts. The weights are built with ``cumprod`` (no
+division, so episode ends where the discount is 0 are exact) and the
+number of Python iterations drops from ``num_steps`` to
+``num_steps / chunk_size``. Results match the step loop up to float
+rounding from the different summation order.
+"""
+
+import torch
+
+DEFAULT_CHUNK_SIZE = 32
+
+
+def discounted_reverse_cumsum(
+    x: torch.Tensor,
+    discounts: torch.Tensor,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> torch.Tensor:
+    """y[t] = x[t] + discounts[t] * y[t + 1] along dim 0, with y[T] = 0"""
+    num_steps = x.shape[0]
+    trailing = (1,) * (x.dim() - 1)
+    out = torch.empty_like(x)
+    carry = torch.zeros_like(x[0])
+    for end in range(num_steps, 0, -chunk_size):
+        start = max(end - chunk_size, 0)
+        size = end - start
+        upper = torch.ones(size, size + 1, dtype=torch.bool, device=x.device)
+        upper = upper.triu().view((size, size + 1) + trailing)
+        # factors[i, m] = discounts[m] for m >= i, 1 before the row starts
+        factors = torch.where(
+            upper[:, :-1],
+            discounts[start:end].unsqueeze(0),
+            discounts.new_ones(()),
+        )
+        # weights[i, j] = discounts[i] * ... * discounts[j - 1], 0 for j < i
+        weights = torch.cat(
+            (torch.ones_like(factors[:, :1]), torch.cumprod(factors, dim=1)),
+            dim=1,
+        )
+        weights = weights * upper
+        terms = torch.cat((x[start:end], carry.unsqueeze(0)))
+        out[start:end] = (weights * terms.unsqueeze(0)).sum(dim=1)
+        carry = out[start]
+    return out
+
+
+def compute_advantages(
+    rewards: torch.Tensor,
+    values: torch.Tensor,
+    dones: torch.Tensor,
+    next_value: torch.Tensor,
+    next_done: torch.Tensor,
+    gamma: float,
+    gae_lambda: float,
+    gae: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """Advantages and returns for a ``(num_steps, num_envs)`` rollout.
+
+    ``dones[t]`` flags that the observation of step ``t`` started a new
+    episode; ``next_value`` and ``next_done`` describe the observation after
+    the last step. Without ``gae`` the return is the one-step bootstrapped
+    target ``r[t] + gamma * V(s[t + 1])``, as the scripts always computed it.
+    """
+    next_values = torch.cat((values[1:], next_value.reshape(1, -1)))
+    next_nonterminal = 1.0 - torch.cat((dones[1:], next_done.reshape(1, -1)))
+    if gae:
+        deltas = rewards + gamma * next_values * next_nonterminal - values
+        advantages = discounted_reverse_cumsum(
+            deltas, gamma * gae_lambda * next_nonterminal, chunk_size
+        )
+        returns = advantages + values
+    else:
+        returns = rewards + gamma * next_nonterminal * next_values
+        advantages = returns - values
+    return advantages, returns
@@ -0,0 +1,123 @@
+"""
+Advantage estimation benchmark.
+
+Times the per-step GAE loop the PPO scripts used to run against
+``advantages.compute_advantages`` for a range of rollout sizes, and checks
+that both give the same advantages.
+
+Usage:
+    python ppo_implementation_tutorial/benchmarks/bench_advantages.py [--device cpu] [--repeats 20] [--chunk-size 32]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from advantages import DEFAULT_CHUNK_SIZE, compute_advantages  # noqa: E402
+
+SIZES = [(128, 4), (128, 8), (128, 64), (512, 16), (2048, 1), (2048, 8)]
+
+
+def loop_advantages(
+    rewards, values, dones, next_value, next_done, gamma, gae_lambda
+):
+    num_steps = rewards.shape[0]
+    advantages = torch.zeros_like(rewards)
+    lastgaelam = 0
+    for t in reversed(range(num_steps)):
+        if t == num_steps - 1:
+            nextnonterminal = 1.0 - next_done
+            nextvalues = next_value
+        else:
+            nextnonterminal = 1.0 - dones[t + 1]
+            nextvalues = values[t + 1]
+        delta = rewards[t] + gamma * nextvalues * nextnonterminal - values[t]
+        advantages[t] = lastgaelam = (
+            delta + gamma * gae_lambda * nextnonterminal * lastgaelam
+        )
+    return advantages, advantages + values
+
+
+def timed(fn, device, repeats):
+    fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    began = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    return (time.perf_counter() - began) * 1000 / repeats, result
+
+
+def run(num_steps, num_envs, device, repeats, chunk_size):
+    rollout = (
+        torch.randn(num_steps, num_envs, device=device),
+        torch.randn(num_steps, num_envs, device=device),
+        (torch.rand(num_steps, num_envs, device=device) < 0.01).float(),
+        torch.randn(1, num_envs, device=device),
+        torch.zeros(num_envs, device=device),
+        0.99,
+        0.95,
+    )
+    loop_ms, expected = timed(
+        lambda: loop_advantages(*rollout), device, repeats
+    )
+    scan_ms, actual = timed(
+        lambda: compute_advantages(*rollout, chunk_size=chunk_size),
+        device,
+        repeats,
+    )
+    return {
+        "loop ms": loop_ms,
+        "scan ms": scan_ms,
+        "speedup": loop_ms / scan_ms,
+        "max abs err": (expected[0] - actual[0]).abs().max().item(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument(
+        "--device", default="cpu", help="torch device to run on"
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=20, help="timed calls per size"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="steps solved per chunk",
+    )
+    args = parser.parse_args()
+    device = torch.device(args.device)
+
+    rows = {
+        f"{num_steps}x{num_envs}": run(
+            num_steps, num_envs, device, args.repeats, args.chunk_size
+        )
+        for num_steps, num_envs in SIZES
+    }
+
+    columns = list(next(iter(rows.values())))
+    print(
+        f"\n{'steps x envs':<14}"
+        + "".join(f"{column:>14}" for column in columns)
+    )
+    for name, results in rows.items():
+        print(
+            f"{name:<14}"
+            + "".join(f"{results[column]:>14.3g}" for column in columns)
+        )
+
+
+if __name__ == "__main__":
+    main()
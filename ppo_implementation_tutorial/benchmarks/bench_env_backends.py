@@ -0,0 +1,105 @@
+"""
+Env backend benchmark.
+
+Steps the environments of one of the PPO scripts (same ``make_env``
+wrapper stack) with random actions, once per vector env backend, and
+reports env steps per second for each number of envs. No learner runs, so
+the numbers are the ceiling the rollout loop can reach.
+
+Usage:
+    python ppo_implementation_tutorial/benchmarks/bench_env_backends.py [--script ppo_atari] [--num-envs 8 32 64] [--envs-per-worker 1 4] [--steps 200]
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_envs import make_vector_env  # noqa: E402
+
+GYM_IDS = {
+    "ppo": "CartPole-v1",
+    "ppo_atari": "ALE/Breakout-v5",
+    "ppo_continuous_action": "HalfCheetah-v5",
+}
+
+
+def run(make_env, gym_id, num_envs, backend, envs_per_worker, steps):
+    envs = make_vector_env(
+        [make_env(gym_id, 1 + i, i, False, "bench") for i in range(num_envs)],
+        backend,
+        envs_per_worker,
+    )
+    envs.action_space.seed(1)
+    envs.reset(seed=1)
+    envs.step(envs.action_space.sample())
+    began = time.perf_counter()
+    for _ in range(steps):
+        envs.step(envs.action_space.sample())
+    elapsed = time.perf_counter() - began
+    envs.close()
+    return steps * num_envs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument(
+        "--script",
+        default="ppo_atari",
+        choices=sorted(GYM_IDS),
+        help="PPO script whose make_env builds the environments",
+    )
+    parser.add_argument(
+        "--gym-id", default=None, help="defaults to the script's default"
+    )
+    parser.add_argument(
+        "--num-envs",
+        type=int,
+        nargs="+",
+        default=[8, 32, 64],
+        help="numbers of envs to compare at",
+    )
+    parser.add_argument(
+        "--envs-per-worker",
+        type=int,
+        nargs="+",
+        default=[1, 4],
+        help="async variants to run",
+    )
+    parser.add_argument(
+        "--steps", type=int, default=200, help="vector steps per run"
+    )
+    args = parser.parse_args()
+    make_env = importlib.import_module(args.script).make_env
+    gym_id = args.gym_id or GYM_IDS[args.script]
+
+    variants = [("sync", "sync", 1)] + [
+        (f"async/{n}", "async", n) for n in args.envs_per_worker
+    ]
+    rows = {
+        name: {
+            f"{num_envs} envs": run(
+                make_env, gym_id, num_envs, backend, per_worker, args.steps
+            )
+            for num_envs in args.num_envs
+        }
+        for name, backend, per_worker in variants
+    }
+
+    print(f"\n{gym_id}, env steps per second")
+    columns = list(next(iter(rows.values())))
+    print(f"{'backend':<12}" + "".join(f"{column:>12}" for column in columns))
+    for name, results in rows.items():
+        print(
+            f"{name:<12}"
+            + "".join(f"{results[column]:>12.0f}" for column in columns)
+        )
+
+
+if __name__ == "__main__":
+    main()
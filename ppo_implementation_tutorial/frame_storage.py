@@ -0,0 +1,118 @@
+"""Rollout storage that keeps each stacked Atari frame once.
+
+With ``FrameStackObservation(env, 4)`` the observation of step ``t`` is
+the observation of step ``t - 1`` shifted by one frame, so a plain
+``(num_steps, num_envs, 4, 84, 84)`` buffer holds every frame four times.
+``FrameDedupStorage`` writes frames into a per-env pool that is rewound
+at the start of every rollout and remembers, for every step, which pool
+slots make up its stack. Minibatches are gathered back into full stacks
+on the fly.
+
+Whether a step continues the previous stack is checked on the frames
+themselves, not assumed: when the older frames of a new observation do not
+match the newer frames of the previous one (first step of a rollout, or
+the first observation of a new episode, whatever the padding mode), the
+whole stack is stored, reusing the slot of repeated padding frames. The
+gathered observations are therefore identical to the ones the env
+returned.
+"""
+
+import numpy as np
+import torch
+
+
+class FrameDedupStorage:
+    """Stacked uint8 observations stored as one copy of each frame"""
+
+    def __init__(self, num_steps, num_envs, obs_shape, device):
+        self.num_steps = num_steps
+        self.num_envs = num_envs
+        self.stack_size = obs_shape[0]
+        self.device = device
+        # Pool slots per env: one new frame per step, plus a full stack at
+        # the start of the rollout and some room for episode starts
+        capacity = num_steps + 2 * self.stack_size
+        self.frames = torch.zeros(
+            (num_envs, capacity) + tuple(obs_shape[1:]),
+            dtype=torch.uint8,
+            device=device,
+        )
+        self.frame_index = torch.zeros(
+            (num_steps, num_envs, self.stack_size),
+            dtype=torch.long,
+            device=device,
+        )
+        self.positions = np.zeros(num_envs, dtype=np.int64)
+        self.last_index = np.zeros((num_envs, self.stack_size), dtype=np.int64)
+        self.env_ids = torch.arange(num_envs, device=device)
+
+    def _reserve(self, needed):
+        capacity = self.frames.shape[1]
+        if self.positions.max() + needed <= capacity:
+            return
+        self.frames = torch.cat(
+            (self.frames, torch.zeros_like(self.frames)), dim=1
+        )
+
+    def _store_stack(self, env, stack):
+        """Write a whole stack for one env, sharing repeated frames"""
+        for k in range(self.stack_size):
+            if k > 0 and torch.equal(stack[k], stack[k - 1]):
+                self.last_index[env, k] = self.last_index[env, k - 1]
+                continue
+            self.frames[env, self.positions[env]] = stack[k]
+            self.last_index[env, k] = self.positions[env]
+            self.positions[env] += 1
+
+    def __setitem__(self, step, obs):
+        if step == 0:
+            self.positions[:] = 0
+            continued = np.zeros(self.num_envs, dtype=np.bool_)
+        else:
+            previous = self.frames[
+                self.env_ids.unsqueeze(1),
+                torch.as_tensor(self.last_index[:, 1:], device=self.device),
+            ]
+            continued = (
+                (obs[:, :-1] == previous).flatten(1).all(1).cpu().numpy()
+            )
+        self._reserve(self.stack_size)
+
+        # Continued stacks drop their oldest frame and add the newest one
+        envs = np.flatnonzero(continued)
+        if len(envs):
+            env_ids = torch.as_tensor(envs, device=self.device)
+            slots = torch.as_tensor(self.positions[envs], device=self.device)
+            self.frames[env_ids, slots] = obs[env_ids, -1]
+            self.last_index[envs, :-1] = self.last_index[envs, 1:]
+            self.last_index[envs, -1] = self.positions[envs]
+            self.positions[envs] += 1
+        for env in np.flatnonzero(~continued):
+            self._store_stack(env, obs[env])
+
+        self.frame_index[step] = torch.as_tensor(
+            self.last_index, device=self.device
+        )
+
+    def gather(self, inds):
+        """Stacked observations for indices into the flattened rollout"""
+        inds = torch.as_tensor(inds, device=self.device)
+        steps, envs = inds // self.num_envs, inds % self.num_envs
+        return self.frames[envs.unsqueeze(1), self.frame_index[steps, envs]]
+
+    def batch(self):
+        """Flattened ``(num_steps * num_envs, ...)`` view for minibatches"""
+        return StackedBatch(self)
+
+
+class StackedBatch:
+    """Indexable like the flattened obs tensor, gathering stacks on access"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __len__(self):
+        return self.storage.num_steps * self.storage.num_envs
+
+    def __getitem__(self, inds):
+        return self.storage.gather(inds)
@@ -23,6 +23,10 @@ from stable_baselines3.common.atari_wrappers import (
 from torch.distributions import Categorical
 from torch.utils.tensorboard import SummaryWriter
 
+from advantages import compute_advantages
+from frame_storage import FrameDedupStorage
+from vector_envs import ENV_BACKENDS, make_vector_env
+
 gym.register_envs(ale_py)
 
 
@@ -88,6 +92,8 @@ class Agent(nn.Module):
             nn.Linear(512, envs.single_action_space.n), std=0.01
         )
 
+    # x holds raw uint8 frames; dividing by 255.0 yields the float32 input,
+    # so only the batch being evaluated is ever converted
     def get_value(self, x):
         return self.critic(self.network(x / 255.0))
 
@@ -179,6 +185,26 @@ def parse_args():
         const=True,
         help="whether to capture videos of the agent performances (check out `videos` folder)",
     )
+    parser.add_argument(
+        "--env-backend",
+        type=str,
+        default="sync",
+        choices=ENV_BACKENDS,
+        help="step the envs in this process (sync) or in worker processes with shared-memory observations (async)",
+    )
+    parser.add_argument(
+        "--envs-per-worker",
+        type=int,
+        default=1,
+        help="number of envs each worker process steps when --env-backend is async",
+    )
+    parser.add_argument(
+        "--obs-storage",
+        type=str,
+        default="stacked",
+        choices=("stacked", "frames"),
+        help="store every stacked observation (stacked) or each frame once, rebuilding the stacks for minibatches (frames)",
+    )
 
     # Algorithm specific arguments
     parser.add_argument(
@@ -331,13 +357,15 @@ if __name__ == "__main__":
     print("Using device:", device)
 
     # env setup
-    envs = gym.vector.SyncVectorEnv(
+    envs = make_vector_env(
         [
             make_env(
                 args.gym_id, args.seed + i, i, args.capture_video, run_name
             )
             for i in range(args.num_envs)
-        ]
+        ],
+        args.env_backend,
+        args.envs_per_worker,
     )
 
     assert isinstance(
@@ -355,9 +383,20 @@ if __name__ == "__main__":
     optimizer = optim.Adam(agent.parameters(), lr=args.learning_rate, eps=1e-5)
 
     # ALGO Logic: Storage setup
-    obs = torch.zeros(
-        (args.num_steps, args.num_envs) + envs.single_observation_space.shape
-    ).to(device)
+    # frames stay uint8 (a quarter of float32) until Agent normalizes them
+    if args.obs_storage == "frames":
+        obs = FrameDedupStorage(
+            args.num_steps,
+            args.num_envs,
+            envs.single_observation_space.shape,
+            device,
+        )
+    else:
+        obs = torch.zeros(
+            (args.num_steps, args.num_envs)
+            + envs.single_observation_space.shape,
+            dtype=torch.uint8,
+        ).to(device)
     actions = torch.zeros(
         (args.num_steps, args.num_envs) + envs.single_action_space.shape
     ).to(device)
@@ -369,7 +408,7 @@ if __name__ == "__main__":
     # TRY NOT TO MODIFY: start the game
     global_step = 0
     start_time = time.time()
-    next_obs = torch.Tensor(envs.reset()[0]).to(device)
+    next_obs = torch.as_tensor(envs.reset()[0]).to(device)
     next_done = torch.zeros(args.num_envs).to(device)
     num_updates = args.total_timesteps // args.batch_size
     print("num_updates: ", num_updates)
@@ -411,7 +450,7 @@ if __name__ == "__main__":
             rewards[step] = (
                 torch.tensor(reward, dtype=torch.float32).to(device).view(-1)
             )
-            next_obs, next_done = torch.Tensor(next_obs).to(
+            next_obs, next_done = torch.as_tensor(next_obs).to(
                 device
             ), torch.Tensor(done).to(device)
 
@@ -434,45 +473,22 @@ if __name__ == "__main__":
         # 5. General Advantage Estimation (GAE)
         with torch.no_grad():
             next_value = agent.get_value(next_obs).reshape(1, -1)
-            if args.gae:
-                advantages = torch.zeros_like(rewards).to(device)
-                lastgaelam = 0
-                for t in reversed(range(args.num_steps)):
-                    if t == args.num_steps - 1:
-                        nextnonterminal = 1.0 - next_done
-                        nextvalues = next_value
-                    else:
-                        nextnonterminal = 1.0 - dones[t + 1]
-                        nextvalues = values[t + 1]
-                    delta = (
-                        rewards[t]
-                        + args.gamma * nextvalues * nextnonterminal
-                        - values[t]
-                    )
-                    advantages[t] = lastgaelam = (
-                        delta
-                        + args.gamma
-                        * args.gae_lambda
-                        * nextnonterminal
-                        * lastgaelam
-                    )
-                returns = advantages + values
-            else:
-                returns = torch.zeros_like(rewards).to(device)
-                for t in reversed(range(args.num_steps)):
-                    if t == args.num_steps - 1:
-                        nextnonterminal = 1.0 - next_done
-                        nextvalues = next_value
-                    else:
-                        nextnonterminal = 1.0 - dones[t + 1]
-                        nextvalues = values[t + 1]
-                    returns[t] = (
-                        rewards[t] + args.gamma * nextnonterminal * nextvalues
-                    )
-                advantages = returns - values
+            advantages, returns = compute_advantages(
+                rewards,
+                values,
+                dones,
+                next_value,
+                next_done,
+                args.gamma,
+                args.gae_lambda,
+                gae=args.gae,
+            )
 
         # flatten the batch
-        b_obs = obs.reshape((-1,) + envs.single_observation_space.shape)
+        if args.obs_storage == "frames":
+            b_obs = obs.batch()
+        else:
+            b_obs = obs.reshape((-1,) + envs.single_observation_space.shape)
         b_logprobs = logprobs.reshape(-1)
         b_actions = actions.reshape((-1,) + envs.single_action_space.shape)
         b_returns = returns.reshape(-1)
@@ -15,6 +15,9 @@ import torch.optim as optim
 from torch.distributions.normal import Normal
 from torch.utils.tensorboard import SummaryWriter
 
+from advantages import compute_advantages
+from vector_envs import ENV_BACKENDS, make_vector_env
+
 
 # 1. Vectorized environment
 def make_env(gym_id, seed, idx, capture_video, run_name):
@@ -183,6 +186,19 @@ def parse_args():
         const=True,
         help="whether to capture videos of the agent performances (check out `videos` folder)",
     )
+    parser.add_argument(
+        "--env-backend",
+        type=str,
+        default="sync",
+        choices=ENV_BACKENDS,
+        help="step the envs in this process (sync) or in worker processes with shared-memory observations (async)",
+    )
+    parser.add_argument(
+        "--envs-per-worker",
+        type=int,
+        default=1,
+        help="number of envs each worker process steps when --env-backend is async",
+    )
 
     # Algorithm specific arguments
     parser.add_argument(
@@ -335,13 +351,15 @@ if __name__ == "__main__":
     print("Using device:", device)
 
     # env setup
-    envs = gym.vector.SyncVectorEnv(
+    envs = make_vector_env(
         [
             make_env(
                 args.gym_id, args.seed + i, i, args.capture_video, run_name
             )
             for i in range(args.num_envs)
-        ]
+        ],
+        args.env_backend,
+        args.envs_per_worker,
     )
 
     assert isinstance(
@@ -438,42 +456,16 @@ if __name__ == "__main__":
         # 5. General Advantage Estimation (GAE)
         with torch.no_grad():
             next_value = agent.get_value(next_obs).reshape(1, -1)
-            if args.gae:
-                advantages = torch.zeros_like(rewards).to(device)
-                lastgaelam = 0
-                for t in reversed(range(args.num_steps)):
-                    if t == args.num_steps - 1:
-                        nextnonterminal = 1.0 - next_done
-                        nextvalues = next_value
-                    else:
-                        nextnonterminal = 1.0 - dones[t + 1]
-                        nextvalues = values[t + 1]
-                    delta = (
-                        rewards[t]
-                        + args.gamma * nextvalues * nextnonterminal
-                        - values[t]
-                    )
-                    advantages[t] = lastgaelam = (
-                        delta
-                        + args.gamma
-                        * args.gae_lambda
-                        * nextnonterminal
-                        * lastgaelam
-                    )
-                returns = advantages + values
-            else:
-                returns = torch.zeros_like(rewards).to(device)
-                for t in reversed(range(args.num_steps)):
-                    if t == args.num_steps - 1:
-                        nextnonterminal = 1.0 - next_done
-                        nextvalues = next_value
-                    else:
-                        nextnonterminal = 1.0 - dones[t + 1]
-                        nextvalues = values[t + 1]
-                    returns[t] = (
-                        rewards[t] + args.gamma * nextnonterminal * nextvalues
-                    )
-                advantages = returns - values
+            advantages, returns = compute_advantages(
+                rewards,
+                values,
+                dones,
+                next_value,
+                next_done,
+                args.gamma,
+                args.gae_lambda,
+                gae=args.gae,
+            )
 
         # flatten the batch
         b_obs = obs.reshape((-1,) + envs.single_observation_space.shape)
@@ -0,0 +1,218 @@
+"""Vectorized environments for the PPO scripts.
+
+``SyncVectorEnv`` steps every environment one after the other in the
+learner process. The ``async`` backend moves them into worker processes:
+each worker owns ``envs_per_worker`` environments, steps them with its own
+``SyncVectorEnv`` and writes their observations straight into a buffer in
+shared memory, so only rewards, done flags and infos travel through the
+pipes. Grouping several cheap environments per worker keeps the
+per-step IPC from costing more than the stepping it parallelizes.
+"""
+
+import multiprocessing
+import traceback
+from collections.abc import Callable, Sequence
+
+import gymnasium as gym
+import numpy as np
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import (
+    CloudpickleWrapper,
+    batch_space,
+    create_shared_memory,
+    iterate,
+    read_from_shared_memory,
+    write_to_shared_memory,
+)
+
+ENV_BACKENDS = ("sync", "async")
+
+
+def make_vector_env(
+    env_fns: Sequence[Callable[[], gym.Env]],
+    backend: str = "sync",
+    envs_per_worker: int = 1,
+) -> VectorEnv:
+    if backend == "sync":
+        return gym.vector.SyncVectorEnv(env_fns)
+    if backend == "async":
+        return SubprocVectorEnv(env_fns, envs_per_worker=envs_per_worker)
+    raise ValueError(
+        f"unknown env backend {backend!r}, use one of {ENV_BACKENDS}"
+    )
+
+
+def _merge_infos(infos, group_infos, group, num_envs):
+    """Copy the batched infos of one worker into the infos of all envs"""
+    for key, value in group_infos.items():
+        if isinstance(value, dict):
+            infos[key] = _merge_infos(
+                infos.get(key, {}), value, group, num_envs
+            )
+            continue
+        if key not in infos:
+            shape = (num_envs,) + value.shape[1:]
+            infos[key] = (
+                np.full(shape, None, dtype=object)
+                if value.dtype == object
+                else np.zeros(shape, dtype=value.dtype)
+            )
+        infos[key][group] = value
+    return infos
+
+
+def _worker(env_fns, start, pipe, parent_pipe, shared_memory):
+    parent_pipe.close()
+    envs = gym.vector.SyncVectorEnv(env_fns, copy=False)
+    space = envs.single_observation_space
+
+    def publish(observations):
+        for offset, observation in enumerate(
+            iterate(envs.observation_space, observations)
+        ):
+            write_to_shared_memory(
+                space, start + offset, observation, shared_memory
+            )
+
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == "reset":
+                observations, infos = envs.reset(**data)
+                publish(observations)
+                pipe.send((infos, True))
+            elif command == "step":
+                observations, rewards, terminated, truncated, infos = (
+                    envs.step(data)
+                )
+                publish(observations)
+                pipe.send(((rewards, terminated, truncated, infos), True))
+            elif command == "close":
+                pipe.send((None, True))
+                break
+            else:
+                raise RuntimeError(f"unknown command {command!r}")
+    except (KeyboardInterrupt, Exception):
+        pipe.send((traceback.format_exc(), False))
+    finally:
+        envs.close()
+
+
+class SubprocVectorEnv(VectorEnv):
+    """Steps groups of ``envs_per_worker`` environments in worker processes"""
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], gym.Env]],
+        envs_per_worker: int = 1,
+        context: str | None = None,
+        copy: bool = True,
+    ):
+        super().__init__()
+        if envs_per_worker < 1:
+            raise ValueError("envs_per_worker must be at least 1")
+        self.num_envs = len(env_fns)
+        self.copy = copy
+
+        dummy_env = env_fns[0]()
+        self.metadata = dict(dummy_env.metadata)
+        self.metadata["autoreset_mode"] = AutoresetMode.NEXT_STEP
+        self.render_mode = dummy_env.render_mode
+        self.single_observation_space = dummy_env.observation_space
+        self.single_action_space = dummy_env.action_space
+        dummy_env.close()
+        self.observation_space = batch_space(
+            self.single_observation_space, self.num_envs
+        )
+        self.action_space = batch_space(
+            self.single_action_space, self.num_envs
+        )
+
+        ctx = multiprocessing.get_context(context)
+        shared_memory = create_shared_memory(
+            self.single_observation_space, n=self.num_envs, ctx=ctx
+        )
+        self.observations = read_from_shared_memory(
+            self.single_observation_space, shared_memory, n=self.num_envs
+        )
+
+        self.groups = [
+            slice(start, min(start + envs_per_worker, self.num_envs))
+            for start in range(0, self.num_envs, envs_per_worker)
+        ]
+        self.parent_pipes, self.processes = [], []
+        for idx, group in enumerate(self.groups):
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                name=f"Worker<{type(self).__name__}>-{idx}",
+                args=(
+                    [CloudpickleWrapper(fn) for fn in env_fns[group]],
+                    group.start,
+                    child_pipe,
+                    parent_pipe,
+                    shared_memory,
+                ),
+                daemon=True,
+            )
+            self.parent_pipes.append(parent_pipe)
+            self.processes.append(process)
+            process.start()
+            child_pipe.close()
+
+    def _receive(self):
+        results = [pipe.recv() for pipe in self.parent_pipes]
+        errors = [result for result, success in results if not success]
+        if errors:
+            self.close(terminate=True)
+            raise RuntimeError(
+                f"{len(errors)} env worker(s) failed:\n{errors[0]}"
+            )
+        return [result for result, _ in results]
+
+    def _read_observations(self):
+        return self.observations.copy() if self.copy else self.observations
+
+    def reset(self, *, seed=None, options=None):
+        if seed is None:
+            seed = [None] * self.num_envs
+        elif isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        for pipe, group in zip(self.parent_pipes, self.groups):
+            pipe.send(("reset", {"seed": seed[group], "options": options}))
+
+        infos = {}
+        for group, group_infos in zip(self.groups, self._receive()):
+            infos = _merge_infos(infos, group_infos, group, self.num_envs)
+        return self._read_observations(), infos
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for pipe, group in zip(self.parent_pipes, self.groups):
+            pipe.send(("step", actions[group]))
+
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        terminated = np.zeros(self.num_envs, dtype=np.bool_)
+        truncated = np.zeros(self.num_envs, dtype=np.bool_)
+        infos = {}
+        for group, result in zip(self.groups, self._receive()):
+            rewards[group], terminated[group], truncated[group] = result[:3]
+            infos = _merge_infos(infos, result[3], group, self.num_envs)
+        return self._read_observations(), rewards, terminated, truncated, infos
+
+    def close_extras(self, terminate=False):
+        if terminate:
+            for process in self.processes:
+                if process.is_alive():
+                    process.terminate()
+        else:
+            for pipe in self.parent_pipes:
+                if not pipe.closed:
+                    pipe.send(("close", None))
+            for pipe in self.parent_pipes:
+                if not pipe.closed:
+                    pipe.recv()
+        for pipe in self.parent_pipes:
+            pipe.close()
+        for process in self.processes:
+            process.join()
@@ -0,0 +1,198 @@
+"""
+Admission control for database-bound requests.
+
+SQLite serializes writers, so letting every request of a burst run at once
+only makes them queue on the database lock, where nobody is in order and
+everybody's latency grows. ``AdmissionMiddleware`` lets at most ``limit``
+API requests per worker run at a time and queues the rest, in priority
+order: cheap reads first, then writes, then bulk requests (export, import,
+backup, offline sync), of which at most ``bulk_limit`` run at once. A
+request that cannot get a slot within ``timeout`` seconds, or that finds
+``queue_size`` requests already waiting, is answered ``503`` with
+``Retry-After`` instead. A request keeps its slot until its response body has been sent
+(or closed), so streamed exports count for as long as they run.
+
+Shed responses never reach Flask, so they carry the CORS headers
+themselves (the app allows any origin); without them a browser on another
+origin sees a network error instead of the 503 and its ``Retry-After``.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+READ = 'read'
+WRITE = 'write'
+BULK = 'bulk'
+PRIORITY = (READ, WRITE, BULK)
+
+BULK_PATHS = ('/api/export', '/api/import', '/api/backup', '/api/sync')
+UNLIMITED_PATHS = ('/api/health',)
+
+
+def request_class(environ):
+    """READ, WRITE or BULK for a request, None for requests that are never queued"""
+    path = environ.get('PATH_INFO', '')
+    method = environ.get('REQUEST_METHOD', 'GET')
+    if not path.startswith('/api/') or path in UNLIMITED_PATHS or method == 'OPTIONS':
+        return None
+    if path in BULK_PATHS:
+        return BULK
+    return READ if method in ('GET', 'HEAD') else WRITE
+
+
+class _Waiter:
+    __slots__ = ('kind', 'event', 'granted')
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionController:
+    """Counting semaphore with a bounded, prioritized wait queue"""
+
+    def __init__(self, limit=8, bulk_limit=1, queue_size=64, timeout=2.0):
+        self.limit = limit
+        self.bulk_limit = bulk_limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._queues = {kind: deque() for kind in PRIORITY}
+        self._queued = 0
+        self._running = 0
+        self._running_bulk = 0
+        self.admitted = dict.fromkeys(PRIORITY, 0)
+        self.shed = dict.fromkeys(PRIORITY, 0)
+        self.timed_out = dict.fromkeys(PRIORITY, 0)
+        self.max_queued = 0
+        self.wait_seconds = 0.0
+
+    def _can_run(self, kind):
+        return self._running < self.limit and (kind != BULK or self._running_bulk < self.bulk_limit)
+
+    def _start(self, kind):
+        self._running += 1
+        if kind == BULK:
+            self._running_bulk += 1
+        self.admitted[kind] += 1
+
+    def acquire(self, kind):
+        """Wait for a slot; False if the request has to be shed"""
+        with self._lock:
+            ahead = any(self._queues[k] for k in PRIORITY[:PRIORITY.index(kind) + 1])
+            if not ahead and self._can_run(kind):
+                self._start(kind)
+                return True
+            if self._queued >= self.queue_size:
+                self.shed[kind] += 1
+                return False
+            waiter = _Waiter(kind)
+            self._queues[kind].append(waiter)
+            self._queued += 1
+            self.max_queued = max(self.max_queued, self._queued)
+
+        started = time.perf_counter()
+        waiter.event.wait(self.timeout)
+        with self._lock:
+            self.wait_seconds += time.perf_counter() - started
+            if waiter.granted:
+                return True
+            self._queues[kind].remove(waiter)
+            self._queued -= 1
+            self.timed_out[kind] += 1
+            return False
+
+    def release(self, kind):
+        with self._lock:
+            self._running -= 1
+            if kind == BULK:
+                self._running_bulk -= 1
+            # Hand freed slots to the best waiters that may run
+            for queued_kind in PRIORITY:
+                queue = self._queues[queued_kind]
+                while queue and self._can_run(queued_kind):
+                    waiter = queue.popleft()
+                    self._queued -= 1
+                    self._start(queued_kind)
+                    waiter.granted = True
+                    waiter.event.set()
+
+    def stats(self):
+        with self._lock:
+            admitted = sum(self.admitted.values())
+            return {
+                'limit': self.limit,
+                'running': self._running,
+                'queued': self._queued,
+                'queued_by_class': {kind: len(queue) for kind, queue in self._queues.items()},
+                'max_queued': self.max_queued,
+                'admitted': dict(self.admitted),
+                'shed': dict(self.shed),
+                'timed_out': dict(self.timed_out),
+                'average_wait_ms': round(self.wait_seconds * 1000 / admitted, 2) if admitted else 0,
+            }
+
+
+class _ReleasingBody:
+    """Response body that gives the slot back once it is exhausted or closed"""
+
+    def __init__(self, body, release):
+        self._body = body
+        self._release = release
+
+    def __iter__(self):
+        yield from self._body
+        self._release()
+
+    def close(self):
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._release()
+
+
+class AdmissionMiddleware:
+    """Queue API requests through an ``AdmissionController``, shedding with 503"""
+
+    def __init__(self, wsgi_app, controller, retry_after=1, expose_headers=('Retry-After',)):
+        self.wsgi_app = wsgi_app
+        self.controller = controller
+        self.retry_after = retry_after
+        self.expose_headers = ', '.join(expose_headers)
+
+    def __call__(self, environ, start_response):
+        kind = request_class(environ)
+        if kind is None:
+            return self.wsgi_app(environ, start_response)
+        if not self.controller.acquire(kind):
+            body = json.dumps({'error': 'Server busy, please retry'}).encode()
+            headers = [
+                ('Content-Type', 'application/json'),
+                ('Content-Length', str(len(body))),
+                ('Retry-After', str(self.retry_after)),
+            ]
+            origin = environ.get('HTTP_ORIGIN')
+            if origin:
+                headers += [
+                    ('Access-Control-Allow-Origin', origin),
+                    ('Access-Control-Expose-Headers', self.expose_headers),
+                    ('Vary', 'Origin'),
+                ]
+            start_response('503 Service Unavailable', headers)
+            return [body]
+
+        released = threading.Lock()
+
+        def release():
+            if released.acquire(blocking=False):
+                self.controller.release(kind)
+
+        try:
+            return _ReleasingBody(self.wsgi_app(environ, start_response), release)
+        except BaseException:
+            release()
+            raise
@@ -1,20 +1,60 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, abort, current_app, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import json
 import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
 from pathlib import Path
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)
+import click
+from sqlalchemy import and_, case, delete, event, func, insert, or_, select, text, tuple_, update
+from sqlalchemy.engine import Engine
+
+from admission import AdmissionController, AdmissionMiddleware
+from backup import backup_database, restore_database, snapshot_name
+from data_transfer import import_ndjson, iter_export
+from maintenance import MaintenanceWorker, enable_incremental_vacuum, full_vacuum
+from migrations import PENDING_QUEUE, reset as reset_schema, upgrade as upgrade_schema
+from payloads import OCCURRENCE, PROJECT, REORDER, SYNC_MUTATION, TASK, ValidationError
+from profiling import ProfilerMiddleware
+from project_stats import (
+    check_project_stats,
+    install_project_stats,
+    read_project_stats,
+    rebuild_project_stats,
+)
+from replica import WRITTEN_HEADER, WRITTEN_PARAM, ReadReplica, written_at
+from recurrence import apply_override, expand, is_occurrence, rule_until
+from tenancy import (
+    TENANT_ENVIRON_KEY,
+    TENANT_HEADER,
+    TenantEngines,
+    TenantPathMiddleware,
+    TenantSession,
+    is_valid_tenant,
+)
+from timestamps import Timestamp, set_storage_mode
+from write_pipeline import WritePipeline
 
-# Database configuration
 DB_PATH = Path(__file__).parent / 'tasks.db'
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DB_PATH}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Response headers the cross-origin frontend may read (shed 503s send them too)
+CORS_EXPOSE_HEADERS = [WRITTEN_HEADER, 'Retry-After']
+CORS_MAX_AGE = 600
+
+# Created unbound: create_app() attaches the extension and the routes to an app
+db = SQLAlchemy(session_options={'class_': TenantSession})
+api = Blueprint('api', __name__, cli_group=None)
+
 
-db = SQLAlchemy(app)
+@event.listens_for(Engine, 'connect')
+def configure_sqlite(dbapi_connection, connection_record):
+    """Use WAL so readers (and online backups) never block writers"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA journal_mode=WAL')
 
 # ==================== Database Models ====================
 
@@ -48,42 +88,188 @@ class Task(db.Model):
     description = db.Column(db.Text)
     status = db.Column(db.String(20), default='pending')  # pending, completed
     priority = db.Column(db.String(20), default='medium')  # low, medium, high
-    due_date = db.Column(db.DateTime)
-    reminder_date = db.Column(db.DateTime)
+    due_date = db.Column(Timestamp)  # text or epoch, see timestamps.py
+    reminder_date = db.Column(Timestamp)
     order = db.Column(db.Integer, default=0)  # for reordering
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(Timestamp, default=datetime.utcnow)
+    updated_at = db.Column(Timestamp, default=datetime.utcnow, onupdate=datetime.utcnow)
+    recurrence_rule = db.Column(db.String(255))  # iCalendar RRULE, see recurrence.py
+    recurrence_until = db.Column(Timestamp)  # last occurrence, NULL if open-ended
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'project_id': self.project_id,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'reminder_date': self.reminder_date.isoformat() if self.reminder_date else None,
-            'order': self.order,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return task_to_dict(self)
+
+
+def task_to_dict(task):
+    """Serialize a Task instance or a row of the tasks table"""
+    return {
+        'id': task.id,
+        'project_id': task.project_id,
+        'title': task.title,
+        'description': task.description,
+        'status': task.status,
+        'priority': task.priority,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'reminder_date': task.reminder_date.isoformat() if task.reminder_date else None,
+        'order': task.order,
+        'created_at': task.created_at.isoformat(),
+        'updated_at': task.updated_at.isoformat(),
+        'recurrence_rule': task.recurrence_rule
+    }
+
+
+class TaskOccurrence(db.Model):
+    """Change to a single occurrence of a recurring task (NULL fields are inherited)"""
+    __tablename__ = 'task_occurrences'
+    
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), primary_key=True)
+    occurrence_date = db.Column(db.DateTime, primary_key=True)  # original due date
+    title = db.Column(db.String(255))
+    description = db.Column(db.Text)
+    status = db.Column(db.String(20))
+    priority = db.Column(db.String(20))
+    due_date = db.Column(db.DateTime)  # set when the occurrence is moved
+    cancelled = db.Column(db.Boolean, nullable=False, default=False)
+
+
+class ProjectStats(db.Model):
+    """Per-project task totals, maintained by triggers (see project_stats.py)"""
+    __tablename__ = 'project_stats'
+    
+    project_id = db.Column(db.Integer, primary_key=True)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ProjectDueStats(db.Model):
+    """Pending tasks per project and due day, maintained by triggers"""
+    __tablename__ = 'project_due_stats'
+    
+    project_id = db.Column(db.Integer, primary_key=True)
+    due_day = db.Column(db.String(10), primary_key=True)  # YYYY-MM-DD
+    pending = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SyncMutation(db.Model):
+    """Offline change replayed by /api/sync, kept so that a resent one is not applied twice"""
+    __tablename__ = 'sync_mutations'
+    
+    id = db.Column(db.String(64), primary_key=True)  # made up by the client
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    result = db.Column(db.Text, nullable=False)  # JSON answer given for it
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def forget_migrations(metadata, connection, **kw):
+    """Tables dropped with ``drop_all()`` lost the migrated indexes and triggers"""
+    reset_schema(connection)
+
+
+def init_schema(engine):
+    """
+    Create missing tables, apply migrations, install the summary triggers and
+    convert the timestamps to the configured storage mode
+    """
+    enable_incremental_vacuum(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        upgrade_schema(connection)
+        install_project_stats(connection)
+        set_storage_mode(connection, current_app.config['TIMESTAMP_STORAGE'])
+
+
+def init_db():
+    """Initialize the current app's default database"""
+    init_schema(db.engine)
+    current_app.extensions['taskhub']['schema_ready'] = True
+
+
+# ==================== Multi-Tenancy ====================
+
+@api.before_request
+def select_tenant():
+    """Bind the request to its tenant's database (default database if none given)"""
+    tenant_engines = current_app.extensions['taskhub']['tenants']
+    if tenant_engines is None:
+        return None
+    tenant = request.environ.get(TENANT_ENVIRON_KEY) or request.headers.get(TENANT_HEADER)
+    if tenant is None:
+        return None
+    if not is_valid_tenant(tenant):
+        return jsonify({'error': 'Invalid tenant id'}), 400
+    g.tenant_engine = tenant_engines.get(tenant)
+    return None
+
+
+@api.before_request
+def ensure_schema():
+    """Create or upgrade the default database on the first request that uses it"""
+    state = current_app.extensions['taskhub']
+    if state['schema_ready'] or g.get('tenant_engine') is not None:
+        return None
+    with state['schema_lock']:
+        if not state['schema_ready']:
+            init_db()
+    return None
+
+
+@api.before_request
+def note_activity():
+    """Postpone idle-time maintenance while requests are coming in"""
+    maintenance = current_app.extensions['taskhub']['maintenance']
+    if maintenance is not None:
+        maintenance.touch()
+
+
+@api.before_request
+def route_reads():
+    """Serve GET requests on the default database from the read replica when it is fresh enough"""
+    replica = current_app.extensions['taskhub']['replica']
+    if replica is None or request.method != 'GET' or g.get('tenant_engine') is not None:
+        return None
+    written = request.headers.get(WRITTEN_HEADER) or request.args.get(WRITTEN_PARAM)
+    g.read_engine = replica.engine_for(written_at(written))
+    return None
+
+
+@api.after_request
+def stamp_write(response):
+    """Tell the client when its write was committed, for read-your-writes"""
+    if (current_app.extensions['taskhub']['replica'] is not None
+            and request.method != 'GET' and response.status_code < 400):
+        response.headers[WRITTEN_HEADER] = f'{time.time():.6f}'
+    return response
+
+
+def maintained_engines():
+    """Default engine plus the open tenant engines, for the maintenance worker"""
+    tenant_engines = current_app.extensions['taskhub']['tenants']
+    return [db.engine] + (tenant_engines.engines() if tenant_engines is not None else [])
+
+
+def current_engine():
+    """Engine of the current request's tenant, or the default engine"""
+    return g.get('tenant_engine') or db.engine
+
+
+# ==================== Error Handlers ====================
+
+@api.errorhandler(ValidationError)
+def handle_validation_error(e):
+    return jsonify({'error': 'Invalid request body', 'fields': e.errors}), 400
 
 
 # ==================== Project Endpoints ====================
 
-@app.route('/api/projects', methods=['GET'])
+@api.route('/api/projects', methods=['GET'])
 def get_projects():
     projects = Project.query.order_by(Project.created_at).all()
     return jsonify([p.to_dict() for p in projects])
 
 
-@app.route('/api/projects', methods=['POST'])
+@api.route('/api/projects', methods=['POST'])
 def create_project():
-    data = request.json
-    
-    if not data.get('name'):
-        return jsonify({'error': 'Project name is required'}), 400
+    data = PROJECT.decode(request.get_data())
     
     project = Project(
         name=data['name'],
@@ -100,16 +286,28 @@ def create_project():
         return jsonify({'error': str(e)}), 400
 
 
-@app.route('/api/projects/<int:project_id>', methods=['GET'])
+@api.route('/api/projects/stats', methods=['GET'])
+def get_project_stats():
+    """Pending, completed, overdue and due-this-week totals per project"""
+    today = request.args.get('today')
+    try:
+        today = date.fromisoformat(today) if today else date.today()
+    except ValueError as e:
+        raise ValidationError({'today': str(e)}) from e
+    stats = read_project_stats(db.session.connection(), today)
+    return jsonify(stats)
+
+
+@api.route('/api/projects/<int:project_id>', methods=['GET'])
 def get_project(project_id):
     project = Project.query.get_or_404(project_id)
     return jsonify(project.to_dict())
 
 
-@app.route('/api/projects/<int:project_id>', methods=['PUT'])
+@api.route('/api/projects/<int:project_id>', methods=['PUT'])
 def update_project(project_id):
     project = Project.query.get_or_404(project_id)
-    data = request.json
+    data = PROJECT.decode(request.get_data(), partial=True)
     
     if 'name' in data:
         project.name = data['name']
@@ -122,7 +320,7 @@ def update_project(project_id):
     return jsonify(project.to_dict())
 
 
-@app.route('/api/projects/<int:project_id>', methods=['DELETE'])
+@api.route('/api/projects/<int:project_id>', methods=['DELETE'])
 def delete_project(project_id):
     project = Project.query.get_or_404(project_id)
     db.session.delete(project)
@@ -132,7 +330,7 @@ def delete_project(project_id):
 
 # ==================== Task Endpoints ====================
 
-@app.route('/api/tasks', methods=['GET'])
+@api.route('/api/tasks', methods=['GET'])
 def get_tasks():
     project_id = request.args.get('project_id', type=int)
     status = request.args.get('status')
@@ -144,10 +342,18 @@ def get_tasks():
     
     if project_id:
         query = query.filter_by(project_id=project_id)
-    if status:
-        query = query.filter_by(status=status)
     if priority:
         query = query.filter_by(priority=priority)
+    if start_date and end_date:
+        # end_date is inclusive here, the window helper takes an exclusive end
+        end = datetime.fromisoformat(end_date) + timedelta(microseconds=1)
+        tasks = tasks_in_window(query, datetime.fromisoformat(start_date), end)
+        if status:
+            tasks = [t for t in tasks if t['status'] == status]
+        tasks.sort(key=lambda t: (t['order'] or 0, t['created_at'], t['due_date']))
+        return jsonify(tasks)
+    if status:
+        query = query.filter_by(status=status)
     if start_date:
         start = datetime.fromisoformat(start_date)
         query = query.filter(Task.due_date >= start)
@@ -159,12 +365,18 @@ def get_tasks():
     return jsonify([t.to_dict() for t in tasks])
 
 
-@app.route('/api/tasks', methods=['POST'])
+@api.route('/api/tasks', methods=['POST'])
 def create_task():
-    data = request.json
+    data = TASK.decode(request.get_data())
     
-    if not data.get('title') or not data.get('project_id'):
-        return jsonify({'error': 'Title and project_id are required'}), 400
+    due_date = data.get('due_date')
+    recurrence_rule = data.get('recurrence_rule') or None
+    recurrence_until = None
+    if recurrence_rule:
+        try:
+            recurrence_until = rule_until(recurrence_rule, due_date)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     
     # Get max order for this project
     max_order = db.session.query(db.func.max(Task.order)).filter_by(project_id=data['project_id']).scalar() or -1
@@ -175,9 +387,11 @@ def create_task():
         description=data.get('description', ''),
         status=data.get('status', 'pending'),
         priority=data.get('priority', 'medium'),
-        due_date=datetime.fromisoformat(data['due_date']) if data.get('due_date') else None,
-        reminder_date=datetime.fromisoformat(data['reminder_date']) if data.get('reminder_date') else None,
-        order=max_order + 1
+        due_date=due_date,
+        reminder_date=data.get('reminder_date'),
+        order=max_order + 1,
+        recurrence_rule=recurrence_rule,
+        recurrence_until=recurrence_until
     )
     
     try:
@@ -189,38 +403,97 @@ def create_task():
         return jsonify({'error': str(e)}), 400
 
 
-@app.route('/api/tasks/<int:task_id>', methods=['GET'])
+@api.route('/api/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
     task = Task.query.get_or_404(task_id)
     return jsonify(task.to_dict())
 
 
-@app.route('/api/tasks/<int:task_id>', methods=['PUT'])
+def update_task_row(connection, task_id, **values):
+    """
+    Apply ``values`` to one task with a single UPDATE ... RETURNING and
+    return the updated row (None if the task does not exist). The caller
+    commits.
+    """
+    tasks = Task.__table__
+    values['updated_at'] = datetime.utcnow()
+    stmt = (
+        update(tasks)
+        .where(tasks.c.id == task_id)
+        .values(**values)
+        .returning(*tasks.c)
+    )
+    return connection.execute(stmt).first()
+
+
+def edit_task_row(connection, task_id, values):
+    """Apply a validated task edit; raises ValueError for an invalid recurrence rule"""
+    row = update_task_row(connection, task_id, **values)
+    if row is not None and row.recurrence_rule and ('recurrence_rule' in values or 'due_date' in values):
+        # Only edits to recurring tasks pay for the second statement
+        until = rule_until(row.recurrence_rule, row.due_date)
+        row = update_task_row(connection, task_id, recurrence_until=until)
+    return row
+
+
+def write_pipeline():
+    """The app's group-commit writer, started on first use; None when disabled"""
+    if not current_app.config['WRITE_PIPELINE'] or g.get('tenant_engine') is not None:
+        return None
+    state = current_app.extensions['taskhub']
+    if state['write_pipeline'] is None:
+        with state['pipeline_lock']:
+            if state['write_pipeline'] is None:
+                state['write_pipeline'] = WritePipeline(
+                    db.engine,
+                    max_latency=current_app.config['WRITE_PIPELINE_MAX_LATENCY_MS'] / 1000,
+                    max_batch=current_app.config['WRITE_PIPELINE_MAX_BATCH']
+                )
+    return state['write_pipeline']
+
+
+def run_write(fn, *args, **kwargs):
+    """
+    Run the mutation ``fn(connection, *args, **kwargs)`` and return its
+    result once committed: through the write pipeline when it is enabled,
+    otherwise in this request's own transaction.
+    """
+    pipeline = write_pipeline()
+    if pipeline is not None:
+        try:
+            return pipeline.run(fn, *args, timeout=current_app.config['WRITE_TIMEOUT'], **kwargs)
+        except TimeoutError:
+            # Cancelled before the writer picked it up: nothing was written. No
+            # Retry-After, which marks requests shed by admission control
+            response = jsonify({'error': 'Write timed out before it started'})
+            response.status_code = 503
+            abort(response)
+    try:
+        result = fn(db.session.connection(), *args, **kwargs)
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.commit()
+    return result
+
+
+@api.route('/api/tasks/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
-    task = Task.query.get_or_404(task_id)
-    data = request.json
+    values = TASK.decode(request.get_data(), partial=True)
+    values.pop('project_id', None)
+    if 'recurrence_rule' in values:
+        values['recurrence_rule'] = values['recurrence_rule'] or None
     
-    if 'title' in data:
-        task.title = data['title']
-    if 'description' in data:
-        task.description = data['description']
-    if 'status' in data:
-        task.status = data['status']
-    if 'priority' in data:
-        task.priority = data['priority']
-    if 'due_date' in data:
-        task.due_date = datetime.fromisoformat(data['due_date']) if data['due_date'] else None
-    if 'reminder_date' in data:
-        task.reminder_date = datetime.fromisoformat(data['reminder_date']) if data['reminder_date'] else None
-    if 'order' in data:
-        task.order = data['order']
-    
-    task.updated_at = datetime.utcnow()
-    db.session.commit()
-    return jsonify(task.to_dict())
+    try:
+        row = run_write(edit_task_row, task_id, values)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if row is None:
+        abort(404)
+    return jsonify(task_to_dict(row))
 
 
-@app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
+@api.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
     task = Task.query.get_or_404(task_id)
     db.session.delete(task)
@@ -228,11 +501,10 @@ def delete_task(task_id):
     return jsonify({'message': 'Task deleted'}), 200
 
 
-@app.route('/api/tasks/reorder', methods=['POST'])
+@api.route('/api/tasks/reorder', methods=['POST'])
 def reorder_tasks():
     """Reorder tasks within a project"""
-    data = request.json
-    task_ids = data.get('task_ids', [])
+    task_ids = REORDER.decode(request.get_data())['task_ids']
     
     for index, task_id in enumerate(task_ids):
         task = Task.query.get(task_id)
@@ -243,19 +515,100 @@ def reorder_tasks():
     return jsonify({'message': 'Tasks reordered'})
 
 
-@app.route('/api/tasks/toggle/<int:task_id>', methods=['PUT'])
+@api.route('/api/tasks/toggle/<int:task_id>', methods=['PUT'])
 def toggle_task_status(task_id):
     """Toggle task between pending and completed"""
+    status = Task.__table__.c.status
+    row = run_write(
+        update_task_row,
+        task_id,
+        status=case((status == 'pending', 'completed'), else_='pending'),
+    )
+    if row is None:
+        abort(404)
+    return jsonify(task_to_dict(row))
+
+
+def occurrence_key(occurrence_date):
+    """Original date of an occurrence from its URL; 404 if it is not a date"""
+    try:
+        return datetime.fromisoformat(occurrence_date)
+    except ValueError:
+        abort(404)
+
+
+@api.route('/api/tasks/<int:task_id>/occurrences/<occurrence_date>', methods=['PUT'])
+def update_occurrence(task_id, occurrence_date):
+    """Complete, move, edit or cancel one occurrence of a recurring task"""
     task = Task.query.get_or_404(task_id)
-    task.status = 'completed' if task.status == 'pending' else 'pending'
-    task.updated_at = datetime.utcnow()
+    when = occurrence_key(occurrence_date)
+    if not task.recurrence_rule or not is_occurrence(task.recurrence_rule, task.due_date, when):
+        abort(404)
+    data = OCCURRENCE.decode(request.get_data(), partial=True)
+    
+    override = db.session.get(TaskOccurrence, (task_id, when))
+    if override is None:
+        override = TaskOccurrence(task_id=task_id, occurrence_date=when)
+        db.session.add(override)
+    for field, value in data.items():
+        setattr(override, field, value)
+    
     db.session.commit()
-    return jsonify(task.to_dict())
+    occurrence = apply_override(task.to_dict(), when, override)
+    if occurrence is None:
+        return jsonify({'task_id': task_id, 'occurrence_date': when.isoformat(), 'cancelled': True})
+    return jsonify(occurrence)
+
+
+@api.route('/api/tasks/<int:task_id>/occurrences/<occurrence_date>', methods=['DELETE'])
+def reset_occurrence(task_id, occurrence_date):
+    """Drop the changes made to one occurrence"""
+    when = occurrence_key(occurrence_date)
+    override = db.session.get(TaskOccurrence, (task_id, when))
+    if override is None:
+        abort(404)
+    db.session.delete(override)
+    db.session.commit()
+    return jsonify({'message': 'Occurrence reset'}), 200
 
 
 # ==================== Calendar Endpoints ====================
 
-@app.route('/api/calendar/month/<int:year>/<int:month>', methods=['GET'])
+def tasks_in_window(query, start, end):
+    """
+    Serialized tasks from ``query`` due in ``[start, end)``. Recurring tasks
+    are expanded into their occurrences in the window only.
+    """
+    single = query.filter(
+        Task.recurrence_rule.is_(None),
+        Task.due_date >= start,
+        Task.due_date < end
+    ).order_by(Task.order, Task.created_at).all()
+    series = query.filter(
+        Task.recurrence_rule.isnot(None),
+        Task.due_date < end,
+        or_(Task.recurrence_until.is_(None), Task.recurrence_until >= start)
+    ).all()
+    
+    tasks = [t.to_dict() for t in single]
+    if not series:
+        return tasks
+    
+    overrides = defaultdict(list)
+    for override in TaskOccurrence.query.filter(
+        TaskOccurrence.task_id.in_([t.id for t in series]),
+        or_(
+            and_(TaskOccurrence.occurrence_date >= start, TaskOccurrence.occurrence_date < end),
+            and_(TaskOccurrence.due_date >= start, TaskOccurrence.due_date < end)
+        )
+    ):
+        overrides[override.task_id].append(override)
+    for t in series:
+        tasks.extend(expand(t.to_dict(), start, end, overrides[t.id]))
+    return tasks
+
+
+@api.route('/api/calendar/month/<int:year>/<int:month>', methods=['GET'])
 def get_month_tasks(year, month):
     """Get all tasks for a given month"""
     start_date = datetime(year, month, 1)
@@ -264,39 +617,529 @@ def get_month_tasks(year, month):
     else:
         end_date = datetime(year, month + 1, 1)
     
-    tasks = Task.query.filter(
-        Task.due_date >= start_date,
-        Task.due_date < end_date
-    ).all()
-    
-    return jsonify([t.to_dict() for t in tasks])
+    return jsonify(tasks_in_window(Task.query, start_date, end_date))
 
 
-@app.route('/api/calendar/week/<int:year>/<int:week>', methods=['GET'])
+@api.route('/api/calendar/week/<int:year>/<int:week>', methods=['GET'])
 def get_week_tasks(year, week):
     """Get all tasks for a given ISO week"""
     from datetime import date
     jan4 = date(year, 1, 4)
     week_one_monday = jan4 - timedelta(days=jan4.weekday())
-    start_date = week_one_monday + timedelta(weeks=week - 1)
+    start_date = datetime.combine(week_one_monday + timedelta(weeks=week - 1), datetime.min.time())
     end_date = start_date + timedelta(days=7)
     
-    tasks = Task.query.filter(
-        Task.due_date >= start_date,
-        Task.due_date < end_date
-    ).all()
+    return jsonify(tasks_in_window(Task.query, start_date, end_date))
+
+
+# ==================== Task Queues ====================
+
+def parse_cursor(cursor):
+    """``<due date>,<id>`` of the last task on the previous page"""
+    due_date, _, task_id = cursor.rpartition(',')
+    return datetime.fromisoformat(due_date), int(task_id)
+
+
+def task_queue(overdue):
+    """
+    One page of pending one-off tasks ordered by due date, read from the
+    partial indexes on ``PENDING_QUEUE`` with keyset pagination: the page
+    after ``?after=<next_cursor>`` starts right after that task instead of
+    skipping an offset.
+    """
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    project_id = request.args.get('project_id', type=int)
+    now = request.args.get('now')
+    try:
+        now = datetime.fromisoformat(now) if now else datetime.now()
+        after = request.args.get('after')
+        after = parse_cursor(after) if after else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify([t.to_dict() for t in tasks])
+    query = Task.query.filter(text(PENDING_QUEUE))
+    if project_id:
+        query = query.filter(Task.project_id == project_id)
+    query = query.filter(Task.due_date < now if overdue else Task.due_date >= now)
+    if after:
+        key = (Task.due_date, Task.id)
+        query = query.filter(tuple_(*key) > tuple_(*after, types=[c.type for c in key]))
+    tasks = query.order_by(Task.due_date, Task.id).limit(limit).all()
+    
+    next_cursor = None
+    if len(tasks) == limit:
+        next_cursor = f'{tasks[-1].due_date.isoformat()},{tasks[-1].id}'
+    return jsonify({'tasks': [t.to_dict() for t in tasks], 'next_cursor': next_cursor})
+
+
+@api.route('/api/tasks/next', methods=['GET'])
+def get_next_tasks():
+    """Pending tasks due from now on, soonest first"""
+    return task_queue(overdue=False)
+
+
+@api.route('/api/tasks/overdue', methods=['GET'])
+def get_overdue_tasks():
+    """Pending tasks due before now, oldest first"""
+    return task_queue(overdue=True)
+
+
+# ==================== Offline Sync ====================
+
+def project_row_to_dict(connection, row):
+    """Serialize a row of the projects table like ``Project.to_dict``"""
+    tasks = Task.__table__
+    task_count = connection.execute(select(func.count()).where(tasks.c.project_id == row.id)).scalar()
+    return {
+        'id': row.id,
+        'name': row.name,
+        'description': row.description,
+        'color': row.color,
+        'created_at': row.created_at.isoformat(),
+        'task_count': task_count
+    }
+
+
+def resolve_key(key, ids):
+    """Server id of a record: ints are server ids, strings ids made up offline"""
+    if type(key) is int:
+        return key
+    if type(key) is str:
+        return ids.get(key)
+    return None
+
+
+def replay_project(connection, op, key, data, ids):
+    projects = Project.__table__
+    if op == 'create':
+        values = PROJECT.load(data)
+        existing = connection.execute(select(projects).where(projects.c.name == values['name'])).first()
+        if existing is not None:
+            # Also created on the server (or by another client): use that one
+            return 'conflict', project_row_to_dict(connection, existing)
+        values.setdefault('description', '')
+        row = connection.execute(insert(projects).values(**values).returning(*projects.c)).first()
+        return 'applied', project_row_to_dict(connection, row)
+
+    project_id = resolve_key(key, ids)
+    row = connection.execute(select(projects).where(projects.c.id == project_id)).first()
+    if row is None:
+        return 'missing', None
+    if op == 'update':
+        values = PROJECT.load(data, partial=True)
+        if 'name' in values and connection.execute(
+            select(projects.c.id).where(projects.c.name == values['name'], projects.c.id != project_id)
+        ).first():
+            return 'conflict', project_row_to_dict(connection, row)
+        if values:
+            row = connection.execute(
+                update(projects).where(projects.c.id == project_id).values(**values).returning(*projects.c)
+            ).first()
+        return 'applied', project_row_to_dict(connection, row)
+    tasks = Task.__table__
+    connection.execute(delete(tasks).where(tasks.c.project_id == project_id))
+    connection.execute(delete(projects).where(projects.c.id == project_id))
+    return 'applied', None
+
+
+def replay_task(connection, op, key, data, base, ids, versions):
+    tasks = Task.__table__
+    if op == 'create':
+        if isinstance(data, dict) and type(data.get('project_id')) is str:
+            data = {**data, 'project_id': ids.get(data['project_id'])}
+            if data['project_id'] is None:
+                return 'missing', None  # its project was not created
+        values = TASK.load(data)
+        projects = Project.__table__
+        if connection.execute(select(projects.c.id).where(projects.c.id == values['project_id'])).first() is None:
+            return 'missing', None
+        values['recurrence_rule'] = values.get('recurrence_rule') or None
+        if values['recurrence_rule']:
+            values['recurrence_until'] = rule_until(values['recurrence_rule'], values.get('due_date'))
+        values.setdefault('description', '')
+        max_order = connection.execute(
+            select(func.max(tasks.c.order)).where(tasks.c.project_id == values['project_id'])
+        ).scalar()
+        values['order'] = (-1 if max_order is None else max_order) + 1
+        row = connection.execute(insert(tasks).values(**values).returning(*tasks.c)).first()
+        return 'applied', task_to_dict(row)
+
+    task_id = resolve_key(key, ids)
+    row = connection.execute(select(tasks).where(tasks.c.id == task_id)).first()
+    if row is None:
+        return 'missing', None
+    current = task_to_dict(row)
+    # base is the version the client edited. A newer one wins, unless it was
+    # written by an earlier mutation of this same log.
+    if base is not None and base != current['updated_at'] and versions.get(task_id) != current['updated_at']:
+        return 'conflict', current
+    if op == 'update':
+        values = TASK.load(data, partial=True)
+        values.pop('project_id', None)
+        if 'recurrence_rule' in values:
+            values['recurrence_rule'] = values['recurrence_rule'] or None
+        return 'applied', task_to_dict(edit_task_row(connection, task_id, values))
+    connection.execute(delete(tasks).where(tasks.c.id == task_id))
+    return 'applied', None
+
+
+def apply_mutations(connection, mutations, retention):
+    """
+    Replay a client's offline mutations in order, each in its own SAVEPOINT.
+    Returns the answer for every mutation and the server ids of the records
+    created offline. A mutation that was replayed before (the client never
+    got the answer) is answered from ``sync_mutations`` and not applied again.
+    """
+    log = SyncMutation.__table__
+    # Runs first so that the transaction is open before the first SAVEPOINT
+    connection.execute(delete(log).where(log.c.applied_at < datetime.utcnow() - retention))
+    mutation_ids = [m['id'] for m in mutations if isinstance(m, dict) and type(m.get('id')) is str]
+    answered = dict(connection.execute(select(log.c.id, log.c.result).where(log.c.id.in_(mutation_ids))).all())
+    
+    ids = {}       # key made up offline -> server id
+    versions = {}  # task id -> updated_at written by this log
+    results = []
+    logged = []
+    for mutation in mutations:
+        try:
+            header = SYNC_MUTATION.load(mutation)
+        except ValidationError as e:
+            results.append({'id': mutation.get('id') if isinstance(mutation, dict) else None,
+                            'status': 'invalid', 'record': None, 'error': str(e)})
+            continue
+        key = mutation.get('key')
+        if header['id'] in answered:
+            result = json.loads(answered[header['id']])
+        else:
+            result = {'id': header['id']}
+            try:
+                with connection.begin_nested():
+                    if header['entity'] == 'project':
+                        status, record = replay_project(connection, header['op'], key, mutation.get('data'), ids)
+                    else:
+                        status, record = replay_task(connection, header['op'], key, mutation.get('data'),
+                                                     header.get('base'), ids, versions)
+                result.update(status=status, record=record)
+            except ValueError as e:  # invalid data or recurrence rule
+                result.update(status='invalid', record=None, error=str(e))
+            answered[header['id']] = json.dumps(result)
+            logged.append({'id': header['id'], 'result': answered[header['id']]})
+        results.append(result)
+        
+        record = result['record']
+        if record is not None and header['op'] == 'create' and type(key) is str:
+            ids[key] = record['id']
+        if record is not None and header['entity'] == 'task' and result['status'] == 'applied':
+            versions[record['id']] = record['updated_at']
+    
+    if logged:
+        connection.execute(insert(log), logged)
+    return {'results': results, 'ids': ids}
+
+
+@api.route('/api/sync', methods=['POST'])
+def sync():
+    """Apply the mutations a client made offline, in one transaction"""
+    try:
+        body = json.loads(request.get_data() or b'null')
+    except ValueError as e:
+        raise ValidationError({'body': f'invalid JSON: {e}'}) from e
+    mutations = body.get('mutations') if isinstance(body, dict) else None
+    if not isinstance(mutations, list):
+        raise ValidationError({'mutations': 'expected a list'})
+    limit = current_app.config['SYNC_MAX_MUTATIONS']
+    if len(mutations) > limit:
+        # One request is one writer transaction; the frontend sends at most this many
+        raise ValidationError({'mutations': f'at most {limit} per request'})
+    retention = timedelta(days=current_app.config['SYNC_RETENTION_DAYS'])
+    return jsonify(run_write(apply_mutations, mutations, retention))
+
+
+# ==================== Export / Import ====================
+
+def transfer_tables():
+    return Project.__table__, Task.__table__, TaskOccurrence.__table__
+
+
+@api.route('/api/export', methods=['GET'])
+def export_data():
+    """Stream all projects and tasks as NDJSON"""
+    chunks = iter_export(db.session.connection(), transfer_tables())
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=taskhub-export.ndjson'}
+    )
+
+
+@api.route('/api/import', methods=['POST'])
+def import_data():
+    """Import an NDJSON export from the request body in batched transactions"""
+    batch_size = request.args.get('batch_size', 5000, type=int)
+    with current_engine().connect() as connection:
+        try:
+            stats = import_ndjson(connection, transfer_tables(), request.stream, batch_size)
+        except (ValueError, KeyError) as e:
+            connection.rollback()
+            return jsonify({'error': f'Invalid import data: {e} (earlier batches were committed)'}), 400
+    return jsonify(stats), 201
+
+
+# ==================== Backup ====================
+
+def database_path():
+    return current_engine().url.database
+
+
+@api.route('/api/backup', methods=['POST'])
+def create_backup():
+    """Take an online snapshot of the database into BACKUP_DIR"""
+    compress = request.args.get('compress', '0').lower() in ('1', 'true', 'yes')
+    source = database_path()
+    target = Path(current_app.config['BACKUP_DIR']) / snapshot_name(source, compress)
+    stats = backup_database(source, target)
+    return jsonify(stats), 201
+
+
+# ==================== Maintenance Commands ====================
+
+@api.cli.command('init-db')
+def init_db_command():
+    """Create missing tables and apply schema migrations"""
+    init_db()
+    click.echo("Database is up to date")
+
+
+@api.cli.command('rebuild-stats')
+@click.option('--check-only', is_flag=True, help='Report drift without rebuilding.')
+def rebuild_stats_command(check_only):
+    """Check the project summary against tasks and rebuild it from scratch"""
+    with db.engine.begin() as connection:
+        drifted = check_project_stats(connection)
+        if drifted:
+            click.echo(f"Summary out of date for project(s): {', '.join(map(str, drifted))}")
+        else:
+            click.echo("Summary is consistent with tasks")
+        if not check_only:
+            rebuild_project_stats(connection)
+            click.echo("Summary rebuilt")
+
+
+@api.cli.command('export-data')
+@click.argument('output', type=click.File('w'), default='-')
+def export_data_command(output):
+    """Write all projects and tasks to OUTPUT as NDJSON"""
+    with db.engine.connect() as connection:
+        for chunk in iter_export(connection, transfer_tables()):
+            output.write(chunk)
+
+
+@api.cli.command('import-data')
+@click.argument('source', type=click.File('r'), default='-')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows per transaction.')
+def import_data_command(source, batch_size):
+    """Import projects and tasks from an NDJSON export"""
+    with db.engine.connect() as connection:
+        try:
+            stats = import_ndjson(connection, transfer_tables(), source, batch_size)
+        except (ValueError, KeyError) as e:
+            connection.rollback()
+            raise click.ClickException(f'Invalid import data: {e} (earlier batches were committed)')
+    click.echo(
+        f"Imported {stats['projects']} projects and {stats['tasks']} tasks "
+        f"({stats['skipped']} skipped) in {stats['seconds']}s "
+        f"- {stats['rows_per_second']} rows/s"
+    )
+
+
+@api.cli.command('backup-db')
+@click.argument('target', required=False)
+@click.option('--compress', is_flag=True, help='Write a gzip-compressed snapshot.')
+@click.option('--pages', default=64, show_default=True, help='Pages copied per step.')
+def backup_db_command(target, compress, pages):
+    """Take an online snapshot of the database (default: BACKUP_DIR)"""
+    source = database_path()
+    target = target or Path(current_app.config['BACKUP_DIR']) / snapshot_name(source, compress)
+    stats = backup_database(source, target, pages=pages)
+    click.echo(
+        f"Backed up {stats['pages']} pages to {stats['path']} in {stats['seconds']}s "
+        f"- {stats['pages_per_second']} pages/s"
+    )
+
+
+@api.cli.command('restore-db')
+@click.argument('snapshot', type=click.Path(exists=True, dir_okay=False))
+@click.confirmation_option(prompt='This replaces all current data. Continue?')
+def restore_db_command(snapshot):
+    """Replace the database contents with SNAPSHOT (.db or .db.gz)"""
+    stats = restore_database(snapshot, database_path())
+    db.engine.dispose()
+    click.echo(f"Restored {stats['pages']} pages into {stats['path']} in {stats['seconds']}s")
+
+
+@api.cli.command('maintain-db')
+@click.option('--full-vacuum', 'rebuild', is_flag=True,
+              help='Rebuild the file first, enabling incremental vacuum (blocks writers).')
+def maintain_db_command(rebuild):
+    """Checkpoint the WAL, release free pages and refresh planner statistics now"""
+    if rebuild:
+        full_vacuum(db.engine)
+        click.echo("Database rebuilt with incremental auto-vacuum")
+    worker = current_app.extensions['taskhub']['maintenance'] or new_maintenance_worker(current_app)
+    stats = worker.run_once(force=True)
+    click.echo(
+        f"Checkpointed {stats['checkpointed_frames']} WAL frames, reclaimed "
+        f"{stats['reclaimed_bytes']} bytes ({stats['vacuumed_pages']} pages) in {stats['seconds']}s "
+        f"- longest step {stats['longest_step_ms']} ms"
+    )
 
 
 # ==================== Health Check ====================
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'ok'})
+    state = current_app.extensions['taskhub']
+    status = {'status': 'ok'}
+    if state['maintenance'] is not None:
+        status['maintenance'] = state['maintenance'].stats()
+    if state['replica'] is not None:
+        status['replica'] = state['replica'].stats()
+    if state['admission'] is not None:
+        status['admission'] = state['admission'].stats()
+    return jsonify(status)
 
 
-if __name__ == '__main__':
+# ==================== Application Factory ====================
+
+def new_maintenance_worker(app):
+    """Maintenance worker for ``app``; its thread starts with the first request"""
+    return MaintenanceWorker(
+        app,
+        maintained_engines,
+        interval=app.config['MAINTENANCE_INTERVAL'],
+        idle_seconds=app.config['MAINTENANCE_IDLE_SECONDS'],
+        vacuum_pages=app.config['MAINTENANCE_VACUUM_PAGES'],
+        optimize_every=app.config['MAINTENANCE_OPTIMIZE_SECONDS']
+    )
+
+
+def new_read_replica(app):
+    """Read replica of ``app``'s default database; None for an in-memory primary"""
     with app.app_context():
-        db.create_all()
-    app.run(debug=True, port=5000)
+        engine = db.engine
+    if engine.url.database in (None, '', ':memory:'):
+        # A single shared connection: data_version never sees its own commits
+        app.logger.warning('READ_REPLICA ignored for an in-memory database')
+        return None
+    return ReadReplica(
+        engine,
+        app.config['READ_REPLICA_MAX_STALENESS_MS'] / 1000,
+        app.logger,
+        min_interval=app.config['READ_REPLICA_MIN_REFRESH_MS'] / 1000,
+        max_bytes=app.config['READ_REPLICA_MAX_MB'] << 20,
+    )
+
+
+def create_app(config=None):
+    """
+    Build an app instance. Settings come from the ``TASKHUB_*`` environment
+    variables and are overridden by ``config``, e.g.
+    ``create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})`` for a private
+    in-memory database. No connection is opened here: the schema is created
+    or upgraded by the first request (or by ``flask --app app init-db``).
+    """
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=os.environ.get('TASKHUB_DATABASE_URL', f'sqlite:///{DB_PATH}'),
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        BACKUP_DIR=Path(__file__).parent / 'backups',
+        INIT_DB_ON_FIRST_REQUEST=True,
+        # 'text' (SQLite default) or 'epoch' integer timestamps, see timestamps.py
+        TIMESTAMP_STORAGE=os.environ.get('TASKHUB_TIMESTAMP_STORAGE', 'text'),
+        # Multi-tenant mode: one database file per tenant in TENANT_DIR
+        TENANT_DIR=os.environ.get('TASKHUB_TENANT_DIR'),
+        MAX_OPEN_TENANTS=int(os.environ.get('TASKHUB_MAX_OPEN_TENANTS', 64)),
+        TENANT_IDLE_SECONDS=int(os.environ.get('TASKHUB_TENANT_IDLE_SECONDS', 300)),
+        # Group commit of task edits and toggles, see write_pipeline.py
+        WRITE_PIPELINE=os.environ.get('TASKHUB_WRITE_PIPELINE', '0').lower() in ('1', 'true', 'yes'),
+        WRITE_PIPELINE_MAX_LATENCY_MS=float(os.environ.get('TASKHUB_WRITE_PIPELINE_MAX_LATENCY_MS', 5)),
+        WRITE_PIPELINE_MAX_BATCH=256,
+        WRITE_TIMEOUT=10,
+        # On-demand profiling, see profiling.py; off unless a token or rate is set
+        PROFILE_TOKEN=os.environ.get('TASKHUB_PROFILE_TOKEN'),
+        PROFILE_SAMPLE_RATE=int(os.environ.get('TASKHUB_PROFILE_SAMPLE_RATE', 0)),
+        PROFILE_DIR=Path(__file__).parent / 'profiles',
+        # Idle-time checkpoint/vacuum/optimize, see maintenance.py; interval 0 disables it
+        MAINTENANCE_INTERVAL=int(os.environ.get('TASKHUB_MAINTENANCE_INTERVAL', 300)),
+        MAINTENANCE_IDLE_SECONDS=int(os.environ.get('TASKHUB_MAINTENANCE_IDLE_SECONDS', 30)),
+        MAINTENANCE_VACUUM_PAGES=128,
+        MAINTENANCE_OPTIMIZE_SECONDS=int(os.environ.get('TASKHUB_MAINTENANCE_OPTIMIZE_SECONDS', 3600)),
+        # Per-worker in-memory copy of the default database for GET requests, see replica.py
+        READ_REPLICA=os.environ.get('TASKHUB_READ_REPLICA', '0').lower() in ('1', 'true', 'yes'),
+        READ_REPLICA_MAX_STALENESS_MS=int(os.environ.get('TASKHUB_READ_REPLICA_MAX_STALENESS_MS', 1000)),
+        # Each refresh copies the whole database: space them out, and skip large databases
+        READ_REPLICA_MIN_REFRESH_MS=int(os.environ.get('TASKHUB_READ_REPLICA_MIN_REFRESH_MS', 500)),
+        READ_REPLICA_MAX_MB=int(os.environ.get('TASKHUB_READ_REPLICA_MAX_MB', 256)),
+        # Concurrent API requests per worker, see admission.py; 0 admits everything
+        ADMISSION_LIMIT=int(os.environ.get('TASKHUB_ADMISSION_LIMIT', 0)),
+        ADMISSION_BULK_LIMIT=int(os.environ.get('TASKHUB_ADMISSION_BULK_LIMIT', 1)),
+        ADMISSION_QUEUE_SIZE=int(os.environ.get('TASKHUB_ADMISSION_QUEUE_SIZE', 64)),
+        ADMISSION_TIMEOUT_MS=int(os.environ.get('TASKHUB_ADMISSION_TIMEOUT_MS', 2000)),
+        ADMISSION_RETRY_AFTER=1,
+        # Days replayed offline mutations are remembered, see /api/sync
+        SYNC_RETENTION_DAYS=int(os.environ.get('TASKHUB_SYNC_RETENTION_DAYS', 7)),
+        SYNC_MAX_MUTATIONS=500,  # SYNC_BATCH_SIZE of the frontend
+    )
+    if config:
+        app.config.update(config)
+
+    # Writes send JSON and are preflighted; let browsers reuse the answer
+    CORS(app, expose_headers=CORS_EXPOSE_HEADERS, max_age=CORS_MAX_AGE)
+    db.init_app(app)
+    app.register_blueprint(api)
+
+    admission = None
+    if app.config['ADMISSION_LIMIT']:
+        admission = AdmissionController(
+            limit=app.config['ADMISSION_LIMIT'],
+            bulk_limit=app.config['ADMISSION_BULK_LIMIT'],
+            queue_size=app.config['ADMISSION_QUEUE_SIZE'],
+            timeout=app.config['ADMISSION_TIMEOUT_MS'] / 1000
+        )
+        app.wsgi_app = AdmissionMiddleware(
+            app.wsgi_app, admission, app.config['ADMISSION_RETRY_AFTER'], CORS_EXPOSE_HEADERS
+        )
+
+    tenant_engines = None
+    if app.config['TENANT_DIR']:
+        tenant_engines = TenantEngines(
+            app.config['TENANT_DIR'],
+            init_schema,
+            max_open=app.config['MAX_OPEN_TENANTS'],
+            idle_seconds=app.config['TENANT_IDLE_SECONDS']
+        )
+        app.wsgi_app = TenantPathMiddleware(app.wsgi_app)
+
+    if app.config['PROFILE_TOKEN'] or app.config['PROFILE_SAMPLE_RATE']:
+        app.wsgi_app = ProfilerMiddleware(
+            app.wsgi_app,
+            token=app.config['PROFILE_TOKEN'],
+            sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+            directory=app.config['PROFILE_DIR']
+        )
+
+    app.extensions['taskhub'] = {
+        'tenants': tenant_engines,
+        'schema_ready': not app.config['INIT_DB_ON_FIRST_REQUEST'],
+        'schema_lock': threading.Lock(),
+        'write_pipeline': None,
+        'pipeline_lock': threading.Lock(),
+        'maintenance': new_maintenance_worker(app) if app.config['MAINTENANCE_INTERVAL'] else None,
+        'replica': new_read_replica(app) if app.config['READ_REPLICA'] else None,
+        'admission': admission,
+    }
+    return app
+
+
+if __name__ == '__main__':
+    create_app().run(debug=True, port=5000)
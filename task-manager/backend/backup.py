@@ -0,0 +1,111 @@
+"""
+Online backup and restore of the SQLite database.
+
+Backups use SQLite's incremental backup API: a few pages are copied per
+step and the copy sleeps between steps. In WAL mode the source connection
+pins one read snapshot for the whole copy, so writers keep committing and
+the copy neither blocks them nor has to restart. In rollback-journal mode
+the source is only locked during a step, but every concurrent commit makes
+SQLite restart the copy.
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+def snapshot_name(source_path, compress=False):
+    """File name for a new snapshot, e.g. ``tasks-20240115-093000.db.gz``"""
+    suffix = '.db.gz' if compress else '.db'
+    return f"{Path(source_path).stem}-{datetime.now().strftime('%Y%m%d-%H%M%S')}{suffix}"
+
+
+def backup_database(source_path, target_path, pages=64, pause=0.005):
+    """
+    Copy the live database at ``source_path`` to ``target_path``.
+
+    ``pages`` are copied per step with a ``pause`` (seconds) between steps.
+    A ``.gz`` target is written as a gzip-compressed snapshot. Returns the
+    page count, duration and throughput of the copy.
+    """
+    target_path = Path(target_path)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    compress = target_path.suffix == '.gz'
+    copy_path = target_path.with_name(target_path.name + '.tmp') if compress else target_path
+
+    progress = {'pages': 0, 'steps': 0}
+
+    def on_step(status, remaining, total):
+        progress['pages'] = total
+        progress['steps'] += 1
+        if remaining:
+            time.sleep(pause)
+
+    started = time.perf_counter()
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(copy_path)
+    try:
+        if source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            source.execute('BEGIN')
+            source.execute('SELECT 1 FROM sqlite_master LIMIT 1')
+        source.backup(target, pages=pages, progress=on_step)
+        source.rollback()
+    finally:
+        target.close()
+        source.close()
+
+    if compress:
+        with open(copy_path, 'rb') as raw, gzip.open(target_path, 'wb', compresslevel=6) as packed:
+            shutil.copyfileobj(raw, packed, 1024 * 1024)
+        os.remove(copy_path)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'path': str(target_path),
+        'bytes': target_path.stat().st_size,
+        'pages': progress['pages'],
+        'steps': progress['steps'],
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(progress['pages'] / elapsed) if elapsed else progress['pages'],
+    }
+
+
+def restore_database(snapshot_path, target_path):
+    """
+    Replace the contents of the database at ``target_path`` with a snapshot.
+
+    The restore also goes through the backup API, so connections that are
+    still open on the target see the restored data instead of a file that
+    was swapped underneath them.
+    """
+    snapshot_path = Path(snapshot_path)
+    source_path = snapshot_path
+    if snapshot_path.suffix == '.gz':
+        source_path = Path(str(target_path) + '.restore')
+        with gzip.open(snapshot_path, 'rb') as packed, open(source_path, 'wb') as raw:
+            shutil.copyfileobj(packed, raw, 1024 * 1024)
+
+    started = time.perf_counter()
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        integrity = source.execute('PRAGMA quick_check').fetchone()[0]
+        if integrity != 'ok':
+            raise ValueError(f'Snapshot failed integrity check: {integrity}')
+        source.backup(target)
+        pages = target.execute('PRAGMA page_count').fetchone()[0]
+    finally:
+        target.close()
+        source.close()
+        if source_path != snapshot_path:
+            os.remove(source_path)
+
+    return {
+        'path': str(target_path),
+        'pages': pages,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,112 @@
+"""
+Admission control benchmark.
+
+A burst of client threads hits the full Flask stack with a mix of task
+list reads, task edits and exports, once with every request admitted and
+once through the admission controller. Reports throughput, read and write
+latency, and how many requests were shed with 503.
+
+Usage:
+    python benchmarks/bench_admission.py [--clients 48] [--requests 40] [--limit 4] [--dir /var/tmp]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import Project, Task, create_app, db, init_db  # noqa: E402
+
+
+def percentile(values, fraction):
+    return values[max(int(len(values) * fraction) - 1, 0)] * 1000 if values else 0.0
+
+
+def run(directory, limit, clients, requests, tasks):
+    path = os.path.join(directory, f'admission-{limit}.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'ADMISSION_LIMIT': limit,
+        'MAINTENANCE_INTERVAL': 0,
+    })
+    with app.app_context():
+        init_db()
+        with db.engine.begin() as connection:
+            connection.execute(insert(Project.__table__), [{'name': f'Project {i}'} for i in range(5)])
+            connection.execute(insert(Task.__table__), [
+                {'project_id': i % 5 + 1, 'title': f'Task {i}', 'order': i} for i in range(tasks)
+            ])
+
+    latencies = {'read': [], 'write': []}
+    shed = []
+    start = threading.Barrier(clients + 1)
+
+    def client(worker):
+        http = app.test_client()
+        start.wait()
+        for i in range(requests):
+            began = time.perf_counter()
+            if worker % 8 == 0 and i % 10 == 0:
+                kind, response = None, http.get('/api/export')
+            elif worker % 4 == 1:
+                kind, response = 'write', http.put(f'/api/tasks/{worker * 10 + i % 10 + 1}', json={'title': f'Edit {i}'})
+            else:
+                kind, response = 'read', http.get(f'/api/tasks?project_id={i % 5 + 1}')
+            response.close()
+            if response.status_code == 503:
+                shed.append(kind)
+            elif kind is not None:
+                latencies[kind].append(time.perf_counter() - began)
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    began = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - began
+
+    with app.app_context():
+        db.engine.dispose()
+    for values in latencies.values():
+        values.sort()
+    served = sum(len(values) for values in latencies.values())
+    return {
+        'served/s': served / elapsed,
+        'read p50 ms': percentile(latencies['read'], 0.5),
+        'read p99 ms': percentile(latencies['read'], 0.99),
+        'write p99 ms': percentile(latencies['write'], 0.99),
+        'shed': len(shed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=48, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=40, help='requests per client')
+    parser.add_argument('--limit', type=int, default=4, help='admission limit for the second run')
+    parser.add_argument('--tasks', type=int, default=2000, help='tasks in the database')
+    parser.add_argument('--dir', default=None, help='directory for the database files')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        rows = {
+            'admit all': run(directory, 0, args.clients, args.requests, args.tasks),
+            f'limit {args.limit}': run(directory, args.limit, args.clients, args.requests, args.tasks),
+        }
+
+    columns = list(next(iter(rows.values())))
+    print(f"\n{'variant':<12}" + ''.join(f'{column:>14}' for column in columns))
+    for name, results in rows.items():
+        print(f'{name:<12}' + ''.join(f'{results[column]:>14.1f}' for column in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Memory budgets of the serialization hot path.
+
+Fills a database with N tasks and measures, with tracemalloc, the peak
+memory allocated while serving each large read endpoint through the full
+Flask stack: the task list, a date-range list, a calendar month and the
+streaming NDJSON export. Each figure is checked against a budget in
+bytes per returned row (the export streams, so its budget is an absolute
+peak); the script exits with status 1 if any budget is exceeded, so it
+can gate changes to the serializers.
+
+Usage:
+    python benchmarks/bench_memory.py [--rows 10000 100000]
+    python benchmarks/bench_memory.py --rows 1000000   # slow, several GB
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import Project, Task, create_app, db, init_db  # noqa: E402
+
+START = datetime(2024, 1, 1)
+
+# (name, url, budget kind, budget). Per-row budgets are peak bytes divided
+# by rows returned; 'peak' budgets are absolute and must not grow with N.
+# Set about 25% above the measured figures (2.1-2.8 KB/row, 2.2 MB export).
+ENDPOINTS = [
+    ('GET /api/tasks', '/api/tasks', 'per_row', 3500),
+    ('GET /api/tasks (date range)', '/api/tasks?start_date=2024-01-01&end_date=2024-12-31', 'per_row', 3500),
+    ('GET /api/calendar/month', '/api/calendar/month/2024/3', 'per_row', 3500),
+    ('GET /api/export', '/api/export', 'peak', 4 * 2**20),
+]
+
+
+def build(path, rows):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    with app.app_context():
+        init_db()
+        with db.engine.begin() as connection:
+            connection.execute(insert(Project.__table__), [{'name': f'Project {i}'} for i in range(10)])
+            for offset in range(0, rows, 50000):
+                connection.execute(insert(Task.__table__), [
+                    {
+                        'project_id': i % 10 + 1,
+                        'title': f'Task {i}',
+                        'description': 'Finalize budget and timeline for new initiative',
+                        'priority': ('low', 'medium', 'high')[i % 3],
+                        'due_date': START + timedelta(minutes=i * 525600 // rows),
+                        'order': i,
+                    }
+                    for i in range(offset, min(offset + 50000, rows))
+                ])
+    return app
+
+
+def measure(client, url):
+    """Peak traced bytes while serving ``url``, and the rows it returned"""
+    streaming = url.startswith('/api/export')
+    rows = 0
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        response = client.get(url, buffered=False)
+        for chunk in response.response:
+            if streaming:
+                rows += chunk.count(b'\n')
+        response.close()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    if not streaming:
+        rows = len(client.get(url).json)  # counted outside the traced section
+    return peak, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='table sizes')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"\n{'endpoint':<30}{'tasks':>9}{'rows out':>10}{'peak MB':>10}{'bytes/row':>11}{'budget':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.rows:
+            app = build(os.path.join(directory, f'{count}.db'), count)
+            client = app.test_client()
+            for name, url, kind, budget in ENDPOINTS:
+                peak, rows = measure(client, url)
+                per_row = peak / rows if rows else 0
+                value = per_row if kind == 'per_row' else peak
+                ok = value <= budget
+                limit = f'{budget} B/row' if kind == 'per_row' else f'{budget / 2**20:.0f} MB'
+                print(f"{name:<30}{count:>9}{rows:>10}{peak / 2**20:>10.1f}{per_row:>11.0f}"
+                      f"{limit:>14}  {'ok' if ok else 'OVER BUDGET'}")
+                if not ok:
+                    failures.append(f'{name} at {count} tasks')
+            with app.app_context():
+                db.engine.dispose()
+
+    if failures:
+        print(f"\nOver budget: {', '.join(failures)}")
+        return 1
+    print('\nAll endpoints within budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
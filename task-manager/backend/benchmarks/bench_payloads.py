@@ -0,0 +1,77 @@
+"""
+Request-body decoding benchmark.
+
+Compares the hand-written checks the task endpoints used to do
+(``request.json`` + key checks + ``datetime.fromisoformat``) with the
+compiled schemas in payloads.py, with and without msgspec.
+
+Usage:
+    python benchmarks/bench_payloads.py [--number 200000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import payloads  # noqa: E402
+
+BODY = json.dumps({
+    'project_id': 2,
+    'title': 'Complete Q4 project proposal',
+    'description': 'Finalize budget and timeline for new initiative',
+    'priority': 'high',
+    'status': 'pending',
+    'due_date': '2024-01-15T17:00',
+    'reminder_date': '2024-01-15T09:00',
+}).encode()
+
+
+def legacy_decode(raw):
+    """The validation create_task did before the schema layer"""
+    data = json.loads(raw)
+    if not data.get('title') or not data.get('project_id'):
+        raise ValueError('Title and project_id are required')
+    return {
+        'project_id': data['project_id'],
+        'title': data['title'],
+        'description': data.get('description', ''),
+        'status': data.get('status', 'pending'),
+        'priority': data.get('priority', 'medium'),
+        'due_date': datetime.fromisoformat(data['due_date']) if data.get('due_date') else None,
+        'reminder_date': datetime.fromisoformat(data['reminder_date']) if data.get('reminder_date') else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=200000, help='decodes per variant')
+    args = parser.parse_args()
+
+    pure = payloads.Schema('Task', payloads.TASK.fields)
+    pure._decoders = {}  # force the pure-Python path
+
+    variants = [
+        ('legacy (json + manual checks)', lambda: legacy_decode(BODY)),
+        ('schema, pure Python', lambda: pure.decode(BODY)),
+    ]
+    if payloads.msgspec is not None:
+        variants.append(('schema, msgspec', lambda: payloads.TASK.decode(BODY)))
+    else:
+        print('msgspec not installed - skipping the msgspec variant')
+
+    print(f"\n{'variant':<32}{'us/decode':>12}{'decodes/s':>14}")
+    baseline = None
+    for name, fn in variants:
+        seconds = min(timeit.repeat(fn, number=args.number, repeat=3))
+        per_call = seconds / args.number
+        baseline = baseline or per_call
+        print(f"{name:<32}{per_call * 1e6:>12.2f}{1 / per_call:>14,.0f}  x{baseline / per_call:.2f}")
+
+
+if __name__ == '__main__':
+    main()
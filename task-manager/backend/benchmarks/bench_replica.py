@@ -0,0 +1,126 @@
+"""
+Read replica benchmark.
+
+Reader threads fetch the task list and a month calendar through the full
+Flask stack while writer threads edit tasks, once with every read on the
+database file and once with the in-memory read replica. Reports read
+throughput and latency, write throughput and the share of reads the
+replica served.
+
+Usage:
+    python benchmarks/bench_replica.py [--tasks 2000] [--readers 8] [--writers 2] [--seconds 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import Project, Task, create_app, db, init_db  # noqa: E402
+
+READS = ('/api/tasks?project_id=1', '/api/calendar/month/2024/3')
+
+
+def run(directory, replica, tasks, readers, writers, seconds):
+    path = os.path.join(directory, f'replica-{replica}.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'READ_REPLICA': replica,
+        'MAINTENANCE_INTERVAL': 0,
+    })
+    with app.app_context():
+        init_db()
+        with db.engine.begin() as connection:
+            connection.execute(insert(Project.__table__), [{'name': f'Project {i}'} for i in range(5)])
+            connection.execute(insert(Task.__table__), [
+                {
+                    'project_id': i % 5 + 1,
+                    'title': f'Task {i}',
+                    'due_date': datetime(2024, 1, 1) + timedelta(hours=i * 3),
+                    'order': i,
+                }
+                for i in range(tasks)
+            ])
+
+    read_latencies = []
+    writes = []
+    stop = threading.Event()
+    start = threading.Barrier(readers + writers + 1)
+
+    def reader(worker):
+        http = app.test_client()
+        mine = []
+        start.wait()
+        while not stop.is_set():
+            began = time.perf_counter()
+            http.get(READS[len(mine) % len(READS)])
+            mine.append(time.perf_counter() - began)
+        read_latencies.extend(mine)
+
+    def writer(worker):
+        http = app.test_client()
+        count = 0
+        start.wait()
+        while not stop.is_set():
+            http.put(f'/api/tasks/{worker * 100 + count % 100 + 1}', json={'title': f'Edit {count}'})
+            count += 1
+        writes.append(count)
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    served = 0.0
+    state = app.extensions['taskhub']
+    if state['replica'] is not None:
+        stats = state['replica'].stats()
+        state['replica'].stop()
+        served = 100 * stats['replica_reads'] / max(stats['replica_reads'] + stats['primary_reads'], 1)
+    with app.app_context():
+        db.engine.dispose()
+    read_latencies.sort()
+    return {
+        'reads/s': len(read_latencies) / seconds,
+        'read p50 ms': statistics.median(read_latencies) * 1000,
+        'read p99 ms': read_latencies[int(len(read_latencies) * 0.99) - 1] * 1000,
+        'writes/s': sum(writes) / seconds,
+        'replica %': served,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=2000, help='tasks in the database')
+    parser.add_argument('--readers', type=int, default=8, help='concurrent reading clients')
+    parser.add_argument('--writers', type=int, default=2, help='concurrent editing clients')
+    parser.add_argument('--seconds', type=float, default=5, help='duration of each run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = {
+            'primary only': run(directory, False, args.tasks, args.readers, args.writers, args.seconds),
+            'read replica': run(directory, True, args.tasks, args.readers, args.writers, args.seconds),
+        }
+
+    columns = list(next(iter(rows.values())))
+    print(f"\n{'variant':<16}" + ''.join(f'{column:>13}' for column in columns))
+    for name, results in rows.items():
+        print(f'{name:<16}' + ''.join(f'{results[column]:>13.1f}' for column in columns))
+
+
+if __name__ == '__main__':
+    main()
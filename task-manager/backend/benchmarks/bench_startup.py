@@ -0,0 +1,66 @@
+"""
+Cold-start benchmark.
+
+Starts fresh interpreters and times each phase of bringing up a worker:
+importing app.py, create_app(), the first request (which creates the
+schema) and a warm request. Each run uses its own in-memory database, the
+way tests and short-lived workers do.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--database-url sqlite://]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[1]})
+created = time.perf_counter()
+client = app.test_client()
+assert client.get('/api/projects').status_code == 200
+first = time.perf_counter()
+client.get('/api/projects')
+warm = time.perf_counter()
+print(json.dumps({
+    'import app': imported - started,
+    'create_app()': created - imported,
+    'first request': first - created,
+    'warm request': warm - first,
+}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='fresh interpreters to start')
+    parser.add_argument('--database-url', default='sqlite://', help='database of each run')
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD, args.database_url],
+            cwd=BACKEND, check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(output.splitlines()[-1]))
+
+    print(f"\n{'phase':<16}{'median ms':>12}{'max ms':>10}")
+    for phase in samples[0]:
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f'{phase:<16}{statistics.median(values):>12.1f}{max(values):>10.1f}')
+    total = [sum(sample.values()) * 1000 for sample in samples]
+    print(f"{'total':<16}{statistics.median(total):>12.1f}{max(total):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Timestamp storage benchmark.
+
+Builds the same task table three times - text timestamps without the
+due_date indexes (the old layout), text with the indexes, and epoch
+integers with the indexes - and times the bulk insert, a one-month
+calendar window, an index-only count over the same window, decoding a
+large result set and serializing it with ``task_to_dict``.
+
+Usage:
+    python benchmarks/bench_timestamps.py [--tasks 100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app import Project, Task, create_app, db, init_db, task_to_dict  # noqa: E402
+
+START = datetime(2023, 1, 1)
+WINDOW = (datetime(2024, 3, 1), datetime(2024, 4, 1))
+
+
+def build(path, storage, indexes, count):
+    """Create and fill a database; returns the app and the insert time"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'TIMESTAMP_STORAGE': storage})
+    with app.app_context():
+        init_db()
+        random.seed(7)
+        with db.engine.begin() as connection:
+            if not indexes:
+                connection.exec_driver_sql('DROP INDEX ix_tasks_due_date')
+                connection.exec_driver_sql('DROP INDEX ix_tasks_project_due_date')
+            connection.execute(insert(Project.__table__), [
+                {'name': f'Project {i}', 'created_at': START} for i in range(10)
+            ])
+            created = datetime(2024, 1, 1, 12, 30, 15, 123456)
+            rows = [
+                {
+                    'project_id': random.randint(1, 10),
+                    'title': f'Task {i}',
+                    'status': random.choice(('pending', 'completed')),
+                    'priority': 'medium',
+                    'due_date': START + timedelta(minutes=random.randrange(3 * 365 * 24 * 60)),
+                    'order': i,
+                    'created_at': created,
+                    'updated_at': created,
+                }
+                for i in range(count)
+            ]
+            started = time.perf_counter()
+            connection.execute(insert(Task.__table__), rows)
+            inserted = time.perf_counter() - started
+    return app, inserted
+
+
+def measure(app, repeat):
+    tasks = Task.__table__
+    in_window = (tasks.c.due_date >= WINDOW[0], tasks.c.due_date < WINDOW[1])
+    with app.app_context(), db.engine.connect() as connection:
+        def window():
+            return connection.execute(select(tasks).where(*in_window)).all()
+
+        def count():
+            return connection.execute(select(func.count()).select_from(tasks).where(*in_window)).scalar()
+
+        def decode():
+            return connection.execute(select(tasks).limit(50000)).all()
+
+        rows = decode()
+        results = {
+            'month window ms': min(timeit.repeat(window, number=1, repeat=repeat)) * 1000,
+            'window count ms': min(timeit.repeat(count, number=1, repeat=repeat)) * 1000,
+            'decode 50k ms': min(timeit.repeat(decode, number=1, repeat=3)) * 1000,
+            'to_dict 50k ms': min(timeit.repeat(lambda: [task_to_dict(r) for r in rows], number=1, repeat=3)) * 1000,
+        }
+    with app.app_context():
+        db.engine.dispose()  # checkpoints the WAL so the file size is final
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=100000, help='tasks per database')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per query (best is reported)')
+    args = parser.parse_args()
+
+    variants = [
+        ('text, no index', 'text', False),
+        ('text + indexes', 'text', True),
+        ('epoch + indexes', 'epoch', True),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        rows = {}
+        for name, storage, indexes in variants:
+            path = os.path.join(directory, f'{storage}-{indexes}.db')
+            app, inserted = build(path, storage, indexes, args.tasks)
+            rows[name] = {'insert ms': inserted * 1000, **measure(app, args.repeat)}
+            rows[name]['file MB'] = os.path.getsize(path) / 1e6
+
+    columns = list(next(iter(rows.values())))
+    print(f"\n{'variant':<18}" + ''.join(f'{column:>17}' for column in columns))
+    for name, results in rows.items():
+        print(f'{name:<18}' + ''.join(f'{results[column]:>17.2f}' for column in columns))
+
+
+if __name__ == '__main__':
+    main()
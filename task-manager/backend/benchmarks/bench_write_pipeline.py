@@ -0,0 +1,107 @@
+"""
+Write pipeline benchmark.
+
+Many client threads toggle tasks as fast as they can through the full
+Flask stack, once with a commit per request and once through the
+group-commit write pipeline, against a database file on disk (set --dir
+to put it on the disk you deploy to; fsync cost is what is measured).
+
+Usage:
+    python benchmarks/bench_write_pipeline.py [--threads 16] [--writes 200] [--dir /var/tmp]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import Project, Task, create_app, db, init_db  # noqa: E402
+
+
+def run(directory, pipeline, threads, writes, max_latency_ms):
+    path = os.path.join(directory, f'pipeline-{pipeline}.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'WRITE_PIPELINE': pipeline,
+        'WRITE_PIPELINE_MAX_LATENCY_MS': max_latency_ms,
+    })
+    with app.app_context():
+        init_db()
+        with db.engine.begin() as connection:
+            connection.execute(insert(Project.__table__), [{'name': 'Bench'}])
+            connection.execute(insert(Task.__table__), [
+                {'project_id': 1, 'title': f'Task {i}'} for i in range(threads * 10)
+            ])
+
+    latencies = []
+    errors = []
+    start = threading.Barrier(threads + 1)
+
+    def client(worker):
+        http = app.test_client()
+        mine = []
+        start.wait()
+        for i in range(writes):
+            task_id = worker * 10 + i % 10 + 1
+            began = time.perf_counter()
+            response = http.put(f'/api/tasks/toggle/{task_id}')
+            mine.append(time.perf_counter() - began)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        latencies.extend(mine)
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    began = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - began
+
+    stats = {}
+    with app.app_context():
+        state = app.extensions['taskhub']
+        if state['write_pipeline'] is not None:
+            state['write_pipeline'].close()
+            stats = state['write_pipeline'].stats()
+        db.engine.dispose()
+    latencies.sort()
+    return {
+        'writes/s': len(latencies) / elapsed,
+        'p50 ms': statistics.median(latencies) * 1000,
+        'p99 ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'avg batch': stats.get('average_batch', 1),
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--writes', type=int, default=200, help='toggles per client')
+    parser.add_argument('--max-latency-ms', type=float, default=5, help='pipeline grouping bound')
+    parser.add_argument('--dir', default=None, help='directory for the database files')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        rows = {
+            'commit per request': run(directory, False, args.threads, args.writes, args.max_latency_ms),
+            'write pipeline': run(directory, True, args.threads, args.writes, args.max_latency_ms),
+        }
+
+    columns = list(next(iter(rows.values())))
+    print(f"\n{'variant':<22}" + ''.join(f'{column:>12}' for column in columns))
+    for name, results in rows.items():
+        print(f'{name:<22}' + ''.join(f'{results[column]:>12.1f}' for column in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+NDJSON export and import of projects and tasks.
+
+An export is one JSON object per line: every project first (``"type":
+"project"``), then every task (``"type": "task"``), then the per-occurrence
+changes of recurring tasks (``"type": "occurrence"``). Rows are read from a
+streaming cursor and written out in small chunks, so memory stays constant
+whatever the size of the database.
+
+Imports read the same format and insert rows in large batches, one
+transaction per batch. Ids are remapped: projects are matched by name (an
+existing project with the same name is reused) and tasks get new ids
+pointing at the remapped project. Only the ids of recurring tasks are
+remembered (to remap their occurrences), so memory stays small. Because
+of that, an import that fails part way is partially applied: batches
+committed before the bad line stay in the database.
+"""
+
+import json
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from payloads import OCCURRENCE_RECORD, PROJECT_RECORD, TASK_RECORD, ValidationError
+
+PROJECT_FIELDS = ('id', 'name', 'description', 'color', 'created_at')
+TASK_FIELDS = (
+    'id', 'project_id', 'title', 'description', 'status', 'priority',
+    'due_date', 'reminder_date', 'order', 'created_at', 'updated_at',
+    'recurrence_rule', 'recurrence_until',
+)
+OCCURRENCE_FIELDS = (
+    'task_id', 'occurrence_date', 'title', 'description', 'status', 'priority',
+    'due_date', 'cancelled',
+)
+TASK_DEFAULTS = {'status': 'pending', 'priority': 'medium', 'order': 0}
+
+
+def _encode(kind, row, fields):
+    record = {'type': kind}
+    for field in fields:
+        value = getattr(row, field)
+        record[field] = value.isoformat() if isinstance(value, datetime) else value
+    return json.dumps(record)
+
+
+def iter_export(connection, tables, chunk_rows=1000):
+    """
+    Yield the NDJSON export of ``tables`` (projects, tasks and occurrences)
+    as text chunks of at most ``chunk_rows`` lines.
+    """
+    projects, tasks, occurrences = tables
+    streaming = connection.execution_options(stream_results=True, yield_per=chunk_rows)
+    for kind, table, fields in (
+        ('project', projects, PROJECT_FIELDS),
+        ('task', tasks, TASK_FIELDS),
+        ('occurrence', occurrences, OCCURRENCE_FIELDS),
+    ):
+        result = streaming.execute(select(table).order_by(*table.primary_key))
+        for partition in result.partitions():
+            yield ''.join(_encode(kind, row, fields) + '\n' for row in partition)
+
+
+def _load(schema, record, number):
+    """Validated and converted ``record``; errors name the line number"""
+    try:
+        return schema.load(record)
+    except ValidationError as e:
+        raise ValidationError({f'line {number}': str(e)}) from e
+
+
+def import_ndjson(connection, tables, lines, batch_size=5000):
+    """
+    Import NDJSON ``lines`` (str or bytes) into ``tables``.
+
+    Every ``batch_size`` task rows are inserted with one executemany and
+    committed together. Returns counts and throughput; tasks whose project
+    is not in the input are skipped. Every line is validated against the
+    record schemas in ``payloads``; an invalid one raises ``ValidationError``
+    naming its line number, and earlier batches stay committed.
+    """
+    projects, tasks, occurrences = tables
+    project_ids = {}
+    recurring_ids = {}
+    batch = []
+    stats = {'projects': 0, 'tasks': 0, 'occurrences': 0, 'skipped': 0}
+    started = time.perf_counter()
+
+    def flush():
+        if batch:
+            connection.execute(insert(tasks), batch)
+            stats['tasks'] += len(batch)
+            batch.clear()
+        connection.commit()
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValidationError({f'line {number}': f'invalid JSON: {e}'}) from e
+        if not isinstance(record, dict):
+            raise ValidationError({f'line {number}': 'expected a JSON object'})
+        kind = record.pop('type', None)
+
+        if kind == 'project':
+            values = _load(PROJECT_RECORD, record, number)
+            old_id = values.pop('id', None)
+            existing = connection.execute(
+                select(projects.c.id).where(projects.c.name == values['name'])
+            ).scalar()
+            if existing is None:
+                existing = connection.execute(
+                    insert(projects).values(**values).returning(projects.c.id)
+                ).scalar()
+                stats['projects'] += 1
+            project_ids[old_id] = existing
+
+        elif kind == 'task':
+            loaded = _load(TASK_RECORD, record, number)
+            old_id = loaded.pop('id', None)
+            project_id = project_ids.get(loaded['project_id'])
+            if project_id is None:
+                stats['skipped'] += 1
+                continue
+            values = {key: TASK_DEFAULTS.get(key) for key in TASK_FIELDS if key != 'id'}
+            values.update(loaded)
+            values['project_id'] = project_id
+            now = datetime.utcnow()
+            values['created_at'] = values['created_at'] or now
+            values['updated_at'] = values['updated_at'] or now
+            if values['recurrence_rule']:
+                recurring_ids[old_id] = connection.execute(
+                    insert(tasks).values(**values).returning(tasks.c.id)
+                ).scalar()
+                stats['tasks'] += 1
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+
+        elif kind == 'occurrence':
+            loaded = _load(OCCURRENCE_RECORD, record, number)
+            if loaded['occurrence_date'] is None:
+                raise ValidationError({f'line {number}': 'occurrence_date: is required'})
+            task_id = recurring_ids.get(loaded['task_id'])
+            if task_id is None:
+                stats['skipped'] += 1
+                continue
+            values = {key: loaded.get(key) for key in OCCURRENCE_FIELDS}
+            values['task_id'] = task_id
+            values['cancelled'] = bool(values['cancelled'])
+            try:
+                connection.execute(insert(occurrences).values(**values))
+            except IntegrityError as e:
+                raise ValidationError({f'line {number}': 'occurrence listed twice'}) from e
+            stats['occurrences'] += 1
+
+        else:
+            stats['skipped'] += 1
+
+    flush()
+    elapsed = time.perf_counter() - started
+    rows = stats['projects'] + stats['tasks'] + stats['occurrences']
+    stats['seconds'] = round(elapsed, 3)
+    stats['rows_per_second'] = round(rows / elapsed) if elapsed else rows
+    return stats
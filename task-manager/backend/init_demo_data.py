@@ -8,23 +8,19 @@ Usage:
     python init_demo_data.py
 """
 
-import sys
-import os
 from datetime import datetime, timedelta
 
-# Add parent directory to path to import app
-sys.path.insert(0, os.path.dirname(__file__))
-
-from app import app, db, Project, Task
+from app import create_app, db, init_db, Project, Task
 
 def init_demo_data():
     """Initialize database with demo data"""
     
+    app = create_app()
     with app.app_context():
         # Clear existing data (optional)
         print("🗑️  Clearing existing data...")
         db.drop_all()
-        db.create_all()
+        init_db()
         
         print("📝 Creating sample projects...")
         
@@ -0,0 +1,170 @@
+"""
+Idle-time SQLite maintenance.
+
+A ``MaintenanceWorker`` thread wakes up every ``interval`` seconds and, if
+no request has arrived for ``idle_seconds``, maintains every open
+database:
+
+* ``PRAGMA wal_checkpoint(PASSIVE)`` copies the WAL back into the
+  database without waiting on readers or writers; once everything is
+  copied the WAL file is truncated.
+* ``PRAGMA incremental_vacuum`` returns free pages to the file system in
+  chunks of ``vacuum_pages``, pausing between chunks and stopping as soon
+  as a request arrives, so a request never waits on more than one chunk.
+  This needs ``auto_vacuum=INCREMENTAL``, which new databases get from
+  ``enable_incremental_vacuum``; existing ones are converted once by a
+  full ``VACUUM`` (``flask --app app maintain-db --full-vacuum``).
+* ``PRAGMA optimize`` (with a bounded ``analysis_limit``) refreshes the
+  planner statistics every ``optimize_every`` seconds.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+ANALYSIS_LIMIT = 400  # rows sampled per index by ANALYZE
+CHUNK_PAUSE = 0.01    # seconds between vacuum chunks, lets waiting requests in
+
+
+def enable_incremental_vacuum(engine):
+    """Use incremental auto-vacuum if the database has no tables yet (a no-op otherwise)"""
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if connection.exec_driver_sql('PRAGMA auto_vacuum').scalar() != 0:
+            return
+        if connection.exec_driver_sql('SELECT count(*) FROM sqlite_master').scalar() == 0:
+            # The WAL switch has already written the header: VACUUM applies the
+            # setting, which is instant while the file is empty
+            connection.exec_driver_sql('PRAGMA auto_vacuum = INCREMENTAL')
+            connection.exec_driver_sql('VACUUM')
+
+
+def full_vacuum(engine):
+    """Rebuild the database file with incremental auto-vacuum; blocks all writers"""
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.exec_driver_sql('PRAGMA auto_vacuum = INCREMENTAL')
+        connection.exec_driver_sql('VACUUM')
+
+
+class MaintenanceWorker:
+    """Background thread maintaining the databases returned by ``engines()``"""
+
+    def __init__(self, app, engines, interval=300, idle_seconds=30, vacuum_pages=128,
+                 optimize_every=3600):
+        self.app = app
+        self.engines = engines
+        self.interval = interval
+        self.idle_seconds = idle_seconds
+        self.vacuum_pages = vacuum_pages
+        self.optimize_every = optimize_every
+        self.last_activity = time.monotonic()
+        self._last_optimize = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.metrics = {
+            'runs': 0,
+            'last_run': None,
+            'seconds': 0.0,
+            'longest_step_ms': 0.0,
+            'checkpointed_frames': 0,
+            'vacuumed_pages': 0,
+            'reclaimed_bytes': 0,
+            'optimize_runs': 0,
+        }
+
+    def touch(self):
+        """Record request activity; starts the thread on first use"""
+        self.last_activity = time.monotonic()
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='db-maintenance', daemon=True)
+                    self._thread.start()
+
+    def idle(self):
+        return time.monotonic() - self.last_activity >= self.idle_seconds
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.metrics)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.idle():
+                try:
+                    self.run_once()
+                except Exception:
+                    self.app.logger.exception('Database maintenance failed')
+
+    def run_once(self, force=False):
+        """Maintain every database now; ``force`` ignores request activity"""
+        started = time.perf_counter()
+        with self.app.app_context():
+            engines = self.engines()
+        for engine in engines:
+            self.maintain(engine, force)
+        with self._lock:
+            self.metrics['runs'] += 1
+            self.metrics['last_run'] = datetime.now().isoformat(timespec='seconds')
+            self.metrics['seconds'] = round(self.metrics['seconds'] + time.perf_counter() - started, 3)
+        return self.stats()
+
+    def _step(self, connection, sql, returns_rows=True):
+        """Run one maintenance statement to completion and record its duration"""
+        started = time.perf_counter()
+        if returns_rows:
+            rows = connection.exec_driver_sql(sql).all()
+        else:
+            # sqlite3's execute() steps a row-less statement only once, which for
+            # incremental_vacuum frees a single page; executescript() finishes it
+            connection.connection.driver_connection.executescript(sql)
+            rows = None
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.metrics['longest_step_ms'] = round(max(self.metrics['longest_step_ms'], elapsed), 2)
+        return rows
+
+    def maintain(self, engine, force=False):
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            self._checkpoint(connection)
+            self._vacuum(connection, force)
+            self._optimize(engine, connection, force)
+
+    def _checkpoint(self, connection):
+        busy, log_frames, checkpointed = self._step(connection, 'PRAGMA wal_checkpoint(PASSIVE)')[0]
+        if log_frames > 0 and not busy and checkpointed == log_frames:
+            # Everything is in the database file: shrink the WAL back to zero
+            self._step(connection, 'PRAGMA wal_checkpoint(TRUNCATE)')
+        with self._lock:
+            self.metrics['checkpointed_frames'] += max(checkpointed, 0)
+
+    def _vacuum(self, connection, force):
+        if connection.exec_driver_sql('PRAGMA auto_vacuum').scalar() != 2:  # INCREMENTAL
+            return
+        page_size = connection.exec_driver_sql('PRAGMA page_size').scalar()
+        while force or self.idle():
+            free = connection.exec_driver_sql('PRAGMA freelist_count').scalar()
+            if not free:
+                break
+            self._step(connection, f'PRAGMA incremental_vacuum({min(free, self.vacuum_pages)})', returns_rows=False)
+            reclaimed = free - connection.exec_driver_sql('PRAGMA freelist_count').scalar()
+            with self._lock:
+                self.metrics['vacuumed_pages'] += reclaimed
+                self.metrics['reclaimed_bytes'] += reclaimed * page_size
+            if reclaimed <= 0:
+                break
+            time.sleep(CHUNK_PAUSE)
+
+    def _optimize(self, engine, connection, force):
+        key = str(engine.url)
+        last = self._last_optimize.get(key)
+        if not force and last is not None and time.monotonic() - last < self.optimize_every:
+            return
+        connection.exec_driver_sql(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+        self._step(connection, 'PRAGMA optimize', returns_rows=False)
+        self._last_optimize[key] = time.monotonic()
+        with self._lock:
+            self.metrics['optimize_runs'] += 1
@@ -0,0 +1,92 @@
+"""
+Schema migrations for existing databases.
+
+``db.create_all()`` creates missing tables but never changes existing ones,
+so column additions and new indexes are listed here. Migrations run in order
+and the number applied is tracked in ``PRAGMA user_version``. Each migration
+must also be a no-op on a database freshly created from the current models.
+Dropping the tables drops the indexes and triggers the migrations created,
+so the version is reset then (see ``reset``) and everything is reapplied.
+"""
+
+# Rows of the due-date queues; queries must repeat this predicate verbatim
+# (not as bound parameters) for SQLite to use the partial indexes below
+PENDING_QUEUE = "status = 'pending' AND recurrence_rule IS NULL AND due_date IS NOT NULL"
+
+
+def _columns(connection, table):
+    return {row[1] for row in connection.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+
+
+def _add_column(connection, table, name, definition):
+    if name not in _columns(connection, table):
+        connection.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {definition}')
+
+
+def add_recurrence(connection):
+    _add_column(connection, 'tasks', 'recurrence_rule', 'VARCHAR(255)')
+    _add_column(connection, 'tasks', 'recurrence_until', 'DATETIME')
+    connection.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_tasks_recurring '
+        'ON tasks (due_date, recurrence_until) WHERE recurrence_rule IS NOT NULL'
+    )
+    connection.exec_driver_sql(
+        'CREATE TRIGGER IF NOT EXISTS task_occurrences_cleanup AFTER DELETE ON tasks '
+        'BEGIN DELETE FROM task_occurrences WHERE task_id = OLD.id; END'
+    )
+
+
+def add_schema_settings(connection):
+    connection.exec_driver_sql(
+        'CREATE TABLE IF NOT EXISTS schema_settings '
+        '(key VARCHAR(64) NOT NULL PRIMARY KEY, value TEXT)'
+    )
+
+
+def add_due_date_indexes(connection):
+    # Leading due_date serves the calendar and start_date/end_date range scans;
+    # the trailing columns let every other filter of GET /api/tasks be checked
+    # in the index before a table row is read
+    connection.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_tasks_due_date '
+        'ON tasks (due_date, project_id, status, priority, recurrence_rule)'
+    )
+    connection.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_tasks_project_due_date ON tasks (project_id, due_date)'
+    )
+
+
+def add_pending_queue_indexes(connection):
+    # Only pending one-off tasks with a due date are indexed, so the queues
+    # stay small and a page costs O(limit) whatever the size of the table
+    connection.exec_driver_sql(
+        f'CREATE INDEX IF NOT EXISTS ix_tasks_pending_due ON tasks (due_date) WHERE {PENDING_QUEUE}'
+    )
+    connection.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_tasks_pending_project_due '
+        f'ON tasks (project_id, due_date) WHERE {PENDING_QUEUE}'
+    )
+
+
+MIGRATIONS = [
+    add_recurrence,
+    add_schema_settings,
+    add_due_date_indexes,
+    add_pending_queue_indexes,
+]
+
+
+def reset(connection):
+    """Forget the applied migrations, so that ``upgrade`` runs all of them again"""
+    connection.exec_driver_sql('PRAGMA user_version = 0')
+
+
+def upgrade(connection):
+    """Apply pending migrations; returns the names of those applied"""
+    version = connection.exec_driver_sql('PRAGMA user_version').scalar()
+    applied = []
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        migration(connection)
+        connection.exec_driver_sql(f'PRAGMA user_version = {number}')
+        applied.append(migration.__name__)
+    return applied
@@ -0,0 +1,308 @@
+"""
+Declarative decoding and validation of request bodies.
+
+Every payload shape is declared once as a ``Schema`` of ``Field``s. The
+schema is compiled into a single generated function, so decoding a body is
+one pass that type-checks, validates and converts (ISO dates to
+``datetime``) each declared field. When ``msgspec`` is
+installed, JSON bodies are decoded straight into a generated
+``msgspec.Struct``, which parses and type-checks in C; only the date
+conversion is done afterwards in Python.
+
+The same schemas are used by the single-item endpoints, by batch
+endpoints and by the NDJSON import.
+"""
+
+import json
+import re
+from datetime import datetime
+from typing import List, Literal, Optional, Union
+
+try:
+    import msgspec
+    from typing import Annotated
+except ImportError:  # optional speed-up: pip install msgspec
+    msgspec = None
+
+TASK_STATUSES = ('pending', 'completed')
+TASK_PRIORITIES = ('low', 'medium', 'high')
+HEX_COLOR = r'^#[0-9A-Fa-f]{6}$'
+
+
+class ValidationError(ValueError):
+    """Invalid request body; ``errors`` maps field names to messages"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(f'{field}: {message}' for field, message in errors.items()))
+        self.errors = errors
+
+
+class Field:
+    """
+    One payload field.
+
+    ``kind`` is ``str``, ``int``, ``bool``, ``datetime`` or ``list`` (of
+    ints). Empty date strings decode to None, like the endpoints always
+    treated them.
+    """
+
+    def __init__(self, kind, required=False, nullable=False, min_length=None,
+                 max_length=None, choices=None, pattern=None):
+        self.kind = kind
+        self.required = required
+        self.nullable = nullable or kind is datetime
+        self.min_length = min_length
+        self.max_length = max_length
+        self.choices = choices
+        self.pattern = pattern
+
+
+def _field_source(index, key, field, namespace):
+    """Source lines validating and converting ``data[key]`` into ``result``"""
+    ok = f'result[{key!r}] = value'
+
+    def fail(message):
+        return f'errors[{key!r}] = {message!r}'
+
+    if field.kind is datetime:
+        return [
+            'if not value:',
+            f'    result[{key!r}] = None',
+            'elif type(value) is not str:',
+            f'    {fail("expected an ISO date string")}',
+            'else:',
+            '    try:',
+            f'        result[{key!r}] = fromisoformat(value)',
+            '    except ValueError as e:',
+            f'        errors[{key!r}] = str(e)',
+        ]
+
+    checks = []
+    if field.nullable:
+        checks.append(('value is None', f'result[{key!r}] = None'))
+    if field.kind is str:
+        checks.append(('type(value) is not str', fail('expected a string')))
+        if field.min_length is not None:
+            message = 'must not be empty' if field.min_length == 1 else f'shorter than {field.min_length}'
+            checks.append((f'len(value) < {field.min_length}', fail(message)))
+        if field.max_length is not None:
+            checks.append((f'len(value) > {field.max_length}', fail(f'longer than {field.max_length} characters')))
+        if field.choices:
+            namespace[f'choices_{index}'] = frozenset(field.choices)
+            checks.append((f'value not in choices_{index}', fail(f"must be one of {', '.join(field.choices)}")))
+        if field.pattern:
+            namespace[f'pattern_{index}'] = re.compile(field.pattern).match
+            checks.append((f'not pattern_{index}(value)', fail('has an invalid format')))
+    elif field.kind is int:
+        checks.append(('type(value) is not int', fail('expected an integer')))
+    elif field.kind is bool:
+        checks.append(('type(value) is not bool', fail('expected true or false')))
+    elif field.kind is list:
+        checks.append((
+            'type(value) is not list or any(type(item) is not int for item in value)',
+            fail('expected a list of integers'),
+        ))
+    else:
+        raise TypeError(f'Unsupported field type for {key}: {field.kind!r}')
+
+    lines = []
+    for position, (condition, action) in enumerate(checks):
+        lines += [f"{'if' if position == 0 else 'elif'} {condition}:", f'    {action}']
+    return lines + ['else:', f'    {ok}']
+
+
+def _compile_loader(name, fields):
+    """
+    Generate one function validating a parsed body against ``fields``, the
+    way dataclasses generate ``__init__``: every check is inlined, so a
+    body costs one dict lookup per declared field and no per-field calls.
+    """
+    namespace = {'fromisoformat': datetime.fromisoformat}
+    lines = [
+        'def load(data, partial):',
+        '    errors = {}',
+        '    result = {}',
+    ]
+    for index, (key, field) in enumerate(fields.items()):
+        lines.append(f'    value = data.get({key!r}, MISSING)')
+        lines.append('    if value is not MISSING:')
+        lines += [f'        {line}' for line in _field_source(index, key, field, namespace)]
+        if field.required:
+            lines += ['    elif not partial:', f"        errors[{key!r}] = 'is required'"]
+    lines.append('    return result, errors')
+
+    namespace['MISSING'] = object()
+    exec(compile('\n'.join(lines), f'<payload schema {name}>', 'exec'), namespace)
+    return namespace['load']
+
+
+def _struct_type(field):
+    """msgspec annotation equivalent to ``field`` (dates stay strings)"""
+    if field.kind is datetime:
+        return Optional[str]
+    if field.kind is list:
+        return List[int]
+    if field.kind is str:
+        constraints = {}
+        if field.min_length is not None:
+            constraints['min_length'] = field.min_length
+        if field.max_length is not None:
+            constraints['max_length'] = field.max_length
+        if field.pattern is not None:
+            constraints['pattern'] = field.pattern
+        annotation = str
+        if field.choices:
+            annotation = Literal[tuple(field.choices)]
+        elif constraints:
+            annotation = Annotated[str, msgspec.Meta(**constraints)]
+    else:
+        annotation = field.kind
+    return Optional[annotation] if field.nullable else annotation
+
+
+_MSGSPEC_PATH = re.compile(r' - at `\$\.(\w+)')
+_MSGSPEC_MISSING = re.compile(r'missing required field `(\w+)`')
+
+
+def _msgspec_errors(error):
+    """Turn ``Expected `int` - at `$.order``` into ``{'order': 'Expected `int`'}``"""
+    message = str(error)
+    match = _MSGSPEC_PATH.search(message)
+    if match:
+        return {match.group(1): message[:match.start()]}
+    match = _MSGSPEC_MISSING.search(message)
+    if match:
+        return {match.group(1): 'is required'}
+    return {'body': message}
+
+
+class Schema:
+    """A compiled payload schema"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self._load = _compile_loader(name, fields)
+        self._dates = tuple(key for key, field in fields.items() if field.kind is datetime)
+        self._decoders = {}
+        if msgspec is not None:
+            self._decoders = {
+                partial: msgspec.json.Decoder(self._make_struct(partial))
+                for partial in (False, True)
+            }
+
+    def _make_struct(self, partial):
+        definitions = []
+        for key, field in self.fields.items():
+            annotation = _struct_type(field)
+            if field.required and not partial:
+                definitions.append((key, annotation))
+            else:
+                definitions.append((key, Union[annotation, msgspec.UnsetType], msgspec.UNSET))
+        return msgspec.defstruct(
+            f"{self.name}{'Patch' if partial else ''}",
+            definitions,
+            forbid_unknown_fields=False
+        )
+
+    def load(self, data, partial=False):
+        """
+        Validate an already parsed mapping; returns the fields present in
+        ``data`` converted to their Python types. With ``partial`` (updates)
+        required fields may be omitted.
+        """
+        if not isinstance(data, dict):
+            raise ValidationError({'body': 'expected a JSON object'})
+        result, errors = self._load(data, partial)
+        if errors:
+            raise ValidationError(errors)
+        return result
+
+    def decode(self, raw, partial=False):
+        """Parse and validate a JSON body (``bytes`` or ``str``)"""
+        decoder = self._decoders.get(partial)
+        if decoder is None:
+            try:
+                data = json.loads(raw or b'null')
+            except ValueError as e:
+                raise ValidationError({'body': f'invalid JSON: {e}'}) from e
+            return self.load(data, partial)
+
+        try:
+            struct = decoder.decode(raw or b'null')
+        except msgspec.ValidationError as e:
+            raise ValidationError(_msgspec_errors(e)) from e
+        except msgspec.DecodeError as e:
+            raise ValidationError({'body': f'invalid JSON: {e}'}) from e
+        result = {
+            key: value for key in struct.__struct_fields__
+            if (value := getattr(struct, key)) is not msgspec.UNSET
+        }
+        for key in self._dates:
+            if key in result:
+                try:
+                    result[key] = datetime.fromisoformat(result[key]) if result[key] else None
+                except ValueError as e:
+                    raise ValidationError({key: str(e)}) from e
+        return result
+
+
+PROJECT = Schema('Project', {
+    'name': Field(str, required=True, min_length=1, max_length=255),
+    'description': Field(str, nullable=True),
+    'color': Field(str, pattern=HEX_COLOR),
+})
+
+TASK = Schema('Task', {
+    'project_id': Field(int, required=True),
+    'title': Field(str, required=True, min_length=1, max_length=255),
+    'description': Field(str, nullable=True),
+    'status': Field(str, choices=TASK_STATUSES),
+    'priority': Field(str, choices=TASK_PRIORITIES),
+    'due_date': Field(datetime),
+    'reminder_date': Field(datetime),
+    'order': Field(int),
+    'recurrence_rule': Field(str, nullable=True, max_length=255),
+})
+
+OCCURRENCE = Schema('Occurrence', {
+    'title': Field(str, nullable=True, min_length=1, max_length=255),
+    'description': Field(str, nullable=True),
+    'status': Field(str, nullable=True, choices=TASK_STATUSES),
+    'priority': Field(str, nullable=True, choices=TASK_PRIORITIES),
+    'due_date': Field(datetime),
+    'cancelled': Field(bool),
+})
+
+# Lines of an NDJSON export (data_transfer.py): the API fields plus the
+# ids and timestamps an export carries
+PROJECT_RECORD = Schema('ProjectRecord', {
+    **PROJECT.fields,
+    'id': Field(int, nullable=True),
+    'created_at': Field(datetime),
+})
+
+TASK_RECORD = Schema('TaskRecord', {
+    **TASK.fields,
+    'id': Field(int, nullable=True),
+    'created_at': Field(datetime),
+    'updated_at': Field(datetime),
+    'recurrence_until': Field(datetime),
+})
+
+OCCURRENCE_RECORD = Schema('OccurrenceRecord', {
+    'task_id': Field(int, required=True),
+    'occurrence_date': Field(datetime, required=True),
+    **OCCURRENCE.fields,
+})
+
+REORDER = Schema('Reorder', {
+    'task_ids': Field(list, required=True),
+})
+
+SYNC_MUTATION = Schema('SyncMutation', {
+    'id': Field(str, required=True, min_length=1, max_length=64),
+    'entity': Field(str, required=True, choices=('project', 'task')),
+    'op': Field(str, required=True, choices=('create', 'update', 'delete')),
+    'base': Field(str, nullable=True),
+})
@@ -0,0 +1,177 @@
+"""
+On-demand profiling of single requests.
+
+``ProfilerMiddleware`` is only installed when a profile token or a sample
+rate is configured, so normal deployments pay nothing. A request is
+profiled when it carries ``X-Profile: <token>`` (or ``?_profile=<token>``),
+or when it is picked by 1-in-N sampling. The request runs under cProfile
+with every SQL statement it issues recorded, and the report is either
+written to the profile directory (``<stamp>-<method>-<path>.txt`` plus a
+``.prof`` file for pstats/snakeviz) or, with ``X-Profile-Output:
+attachment`` (``&_profile_output=attachment``), returned instead of the
+normal response.
+
+cProfile hooks the whole interpreter (``sys.monitoring`` on 3.12+), so only
+one request is profiled at a time; a request that asks while another is
+being profiled is served unprofiled.
+"""
+
+import cProfile
+import hmac
+import io
+import itertools
+import pstats
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+OUTPUT_HEADER = 'HTTP_X_PROFILE_OUTPUT'
+QUERY_FLAG = '_profile'
+REPORT_ROWS = 40
+
+_capture = threading.local()
+# One profiler may be active per process
+_profiling = threading.Lock()
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_capture, 'statements', None) is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = getattr(_capture, 'statements', None)
+    if statements is not None:
+        started = getattr(context, '_profile_started', None)
+        elapsed = time.perf_counter() - started if started else 0.0
+        statements.append((elapsed, statement, parameters))
+
+
+def _listen_for_sql():
+    if not event.contains(Engine, 'before_cursor_execute', _before_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_execute)
+
+
+class ProfilerMiddleware:
+    """Profile requests that ask for it with the token, and 1 in ``sample_rate``"""
+
+    def __init__(self, wsgi_app, token=None, sample_rate=0, directory='profiles'):
+        self.wsgi_app = wsgi_app
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.directory = Path(directory)
+        self._requests = itertools.count(1)
+        self.profiled = 0
+        self.skipped = 0
+        _listen_for_sql()
+
+    def _requested(self, environ):
+        """'file', 'attachment' or None for the profiling asked for by the request"""
+        if self.token is None:
+            return None
+        given = environ.get(PROFILE_HEADER)
+        output = environ.get(OUTPUT_HEADER)
+        query = environ.get('QUERY_STRING', '')
+        if given is None and QUERY_FLAG in query:
+            args = parse_qs(query)
+            given = args.get(QUERY_FLAG, [None])[0]
+            output = output or args.get(f'{QUERY_FLAG}_output', [None])[0]
+        if given is None or not hmac.compare_digest(given.encode(), self.token):
+            return None
+        return 'attachment' if output == 'attachment' else 'file'
+
+    def __call__(self, environ, start_response):
+        mode = self._requested(environ)
+        if mode is None and self.sample_rate and next(self._requests) % self.sample_rate == 0:
+            mode = 'file'
+        if mode is None:
+            return self.wsgi_app(environ, start_response)
+        if not _profiling.acquire(blocking=False):
+            self.skipped += 1
+            return self.wsgi_app(environ, start_response)
+        try:
+            return self._profile(environ, start_response, mode)
+        finally:
+            _profiling.release()
+
+    def _profile(self, environ, start_response, mode):
+        response = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            response['status'], response['headers'] = status, headers
+            return lambda data: response.setdefault('written', []).append(data)
+
+        profiler = cProfile.Profile()
+        _capture.statements = statements = []
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                result = self.wsgi_app(environ, capture_start_response)
+                try:
+                    # Consume streamed bodies inside the profile too
+                    body = response.pop('written', []) + list(result)
+                finally:
+                    if hasattr(result, 'close'):
+                        result.close()
+            finally:
+                profiler.disable()
+        finally:
+            _capture.statements = None
+        elapsed = time.perf_counter() - started
+        self.profiled += 1
+
+        report = self._report(environ, response['status'], elapsed, profiler, statements)
+        if mode == 'attachment':
+            data = report.encode()
+            start_response('200 OK', [
+                ('Content-Type', 'text/plain; charset=utf-8'),
+                ('Content-Disposition', 'attachment; filename=profile.txt'),
+                ('Content-Length', str(len(data))),
+            ])
+            return [data]
+
+        name = self._save(environ, profiler, report)
+        headers = [(key, value) for key, value in response['headers'] if key.lower() != 'content-length']
+        data = b''.join(body)
+        start_response(response['status'], headers + [
+            ('Content-Length', str(len(data))),
+            ('X-Profile-File', name),
+        ])
+        return [data]
+
+    def _report(self, environ, status, elapsed, profiler, statements):
+        path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+        query = re.sub(rf'{QUERY_FLAG}(_output)?=[^&]*&?', '', environ.get('QUERY_STRING', '')).strip('&')
+        if query:
+            path += f'?{query}'
+        sql_time = sum(statement[0] for statement in statements)
+        out = io.StringIO()
+        out.write(
+            f"{environ.get('REQUEST_METHOD')} {path} -> {status}\n"
+            f"{elapsed * 1000:.1f} ms total, {len(statements)} SQL statements "
+            f"({sql_time * 1000:.1f} ms)\n\n"
+        )
+        out.write('SQL statements (ms, statement, parameters)\n')
+        for duration, statement, parameters in statements:
+            out.write(f"{duration * 1000:8.2f}  {' '.join(statement.split())}\n")
+            out.write(f"          {str(parameters)[:200]}\n")
+        out.write(f'\nProfile (top {REPORT_ROWS} by cumulative time)\n')
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(REPORT_ROWS)
+        return out.getvalue()
+
+    def _save(self, environ, profiler, report):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', environ.get('PATH_INFO', '')).strip('_') or 'root'
+        stem = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{environ.get('REQUEST_METHOD', 'GET')}-{slug}"
+        (self.directory / f'{stem}.txt').write_text(report)
+        profiler.dump_stats(self.directory / f'{stem}.prof')
+        return f'{stem}.txt'
@@ -0,0 +1,190 @@
+"""
+Per-project task summary maintained by SQLite triggers.
+
+``project_stats`` holds the pending/completed totals of every project and
+``project_due_stats`` holds the number of pending tasks per project and due
+day. Both are kept up to date by triggers on ``tasks``, so dashboard figures
+(overdue, due this week) are read from a few rows per project instead of
+pulling every task.
+"""
+
+import re
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from timestamps import day_sql as _day
+
+
+def _add_row(row):
+    """Statements counting the ``NEW``/``OLD`` task row into the summary"""
+    return f"""
+    INSERT INTO project_stats (project_id, pending, completed)
+    VALUES ({row}.project_id, {row}.status IS 'pending', {row}.status IS 'completed')
+    ON CONFLICT (project_id) DO UPDATE SET
+        pending = pending + excluded.pending,
+        completed = completed + excluded.completed;
+    INSERT INTO project_due_stats (project_id, due_day, pending)
+    SELECT {row}.project_id, {_day(f'{row}.due_date')}, 1
+    WHERE {row}.status IS 'pending' AND {row}.due_date IS NOT NULL
+    ON CONFLICT (project_id, due_day) DO UPDATE SET pending = pending + 1;
+    """
+
+
+def _remove_row(row):
+    """Statements removing the ``NEW``/``OLD`` task row from the summary"""
+    return f"""
+    UPDATE project_stats SET
+        pending = pending - ({row}.status IS 'pending'),
+        completed = completed - ({row}.status IS 'completed')
+    WHERE project_id = {row}.project_id;
+    UPDATE project_due_stats SET pending = pending - 1
+    WHERE {row}.status IS 'pending'
+      AND project_id = {row}.project_id
+      AND due_day = {_day(f'{row}.due_date')};
+    DELETE FROM project_due_stats
+    WHERE project_id = {row}.project_id
+      AND due_day = {_day(f'{row}.due_date')}
+      AND pending <= 0;
+    """
+
+
+TRIGGERS = {
+    'project_stats_task_insert': f"""
+        CREATE TRIGGER project_stats_task_insert AFTER INSERT ON tasks
+        BEGIN {_add_row('NEW')} END
+    """,
+    'project_stats_task_update': f"""
+        CREATE TRIGGER project_stats_task_update
+        AFTER UPDATE OF project_id, status, due_date ON tasks
+        BEGIN {_remove_row('OLD')} {_add_row('NEW')} END
+    """,
+    'project_stats_task_delete': f"""
+        CREATE TRIGGER project_stats_task_delete AFTER DELETE ON tasks
+        BEGIN {_remove_row('OLD')} END
+    """,
+    'project_stats_project_delete': """
+        CREATE TRIGGER project_stats_project_delete AFTER DELETE ON projects
+        BEGIN
+            DELETE FROM project_stats WHERE project_id = OLD.id;
+            DELETE FROM project_due_stats WHERE project_id = OLD.id;
+        END
+    """,
+}
+
+_EXPECTED_TOTALS = """
+    SELECT project_id,
+           SUM(status IS 'pending') AS pending,
+           SUM(status IS 'completed') AS completed
+    FROM tasks
+    GROUP BY project_id
+"""
+
+_EXPECTED_DUE = f"""
+    SELECT project_id, {_day('due_date')} AS due_day, COUNT(*) AS pending
+    FROM tasks
+    WHERE status = 'pending' AND due_date IS NOT NULL
+    GROUP BY project_id, due_day
+"""
+
+
+def _normalized(sql):
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def install_project_stats(connection):
+    """
+    Create the summary triggers if they are missing or out of date.
+
+    The summary tables themselves are created by ``db.create_all()``. When
+    triggers are (re)installed on an existing database the summary is
+    rebuilt so it starts out consistent with ``tasks``.
+    """
+    existing = dict(connection.execute(text(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+    )).all())
+    missing = [
+        name for name, sql in TRIGGERS.items()
+        if _normalized(existing.get(name) or '') != _normalized(sql)
+    ]
+    for name in missing:
+        if name in existing:
+            connection.exec_driver_sql(f'DROP TRIGGER "{name}"')
+        connection.exec_driver_sql(TRIGGERS[name])
+    if missing:
+        rebuild_project_stats(connection)
+    return missing
+
+
+def rebuild_project_stats(connection):
+    """Recompute the whole summary from ``tasks``"""
+    connection.execute(text("DELETE FROM project_stats"))
+    connection.execute(text("DELETE FROM project_due_stats"))
+    connection.execute(text(
+        f"INSERT INTO project_stats (project_id, pending, completed) {_EXPECTED_TOTALS}"
+    ))
+    connection.execute(text(
+        f"INSERT INTO project_due_stats (project_id, due_day, pending) {_EXPECTED_DUE}"
+    ))
+
+
+def check_project_stats(connection):
+    """Return the ids of projects whose stored summary differs from ``tasks``"""
+    def totals(sql):
+        return {
+            row.project_id: (row.pending, row.completed)
+            for row in connection.execute(text(sql))
+            if row.pending or row.completed
+        }
+
+    def due(sql):
+        return {
+            (row.project_id, row.due_day): row.pending
+            for row in connection.execute(text(sql))
+            if row.pending
+        }
+
+    stored_totals = totals("SELECT project_id, pending, completed FROM project_stats")
+    expected_totals = totals(_EXPECTED_TOTALS)
+    stored_due = due("SELECT project_id, due_day, pending FROM project_due_stats")
+    expected_due = due(_EXPECTED_DUE)
+
+    drifted = {
+        project_id
+        for project_id in stored_totals.keys() | expected_totals.keys()
+        if stored_totals.get(project_id) != expected_totals.get(project_id)
+    }
+    drifted.update(
+        project_id
+        for project_id, due_day in stored_due.keys() | expected_due.keys()
+        if stored_due.get((project_id, due_day)) != expected_due.get((project_id, due_day))
+    )
+    return sorted(drifted)
+
+
+def read_project_stats(connection, today):
+    """
+    Summary rows for every project.
+
+    ``overdue`` counts pending tasks due before ``today`` and ``due_this_week``
+    counts pending tasks due from ``today`` through the following six days.
+    """
+    rows = connection.execute(text("""
+        SELECT p.id AS project_id,
+               p.name AS name,
+               p.color AS color,
+               COALESCE(s.pending, 0) AS pending,
+               COALESCE(s.completed, 0) AS completed,
+               (SELECT COALESCE(SUM(d.pending), 0) FROM project_due_stats d
+                WHERE d.project_id = p.id AND d.due_day < :today) AS overdue,
+               (SELECT COALESCE(SUM(d.pending), 0) FROM project_due_stats d
+                WHERE d.project_id = p.id
+                  AND d.due_day >= :today AND d.due_day < :week_end) AS due_this_week
+        FROM projects p
+        LEFT JOIN project_stats s ON s.project_id = p.id
+        ORDER BY p.created_at
+    """), {
+        'today': today.isoformat(),
+        'week_end': (today + timedelta(days=7)).isoformat(),
+    })
+    return [dict(row._mapping) for row in rows]
@@ -0,0 +1,99 @@
+"""
+Recurring tasks.
+
+A recurring task is stored once: its ``due_date`` is the first occurrence
+and ``recurrence_rule`` is an iCalendar RRULE such as ``FREQ=DAILY`` or
+``FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20241231T000000``. Occurrences are only
+expanded for the window a client asks for. Changes to a single occurrence
+(completed, moved, renamed, cancelled) are stored sparsely in
+``task_occurrences``, keyed by the occurrence's original date.
+"""
+
+import re
+from datetime import datetime
+
+from dateutil.rrule import rrulestr
+
+OVERRIDE_FIELDS = ('title', 'description', 'status', 'priority', 'due_date')
+
+# Occurrences walked to find the end of a COUNT or UNTIL rule (~30 ms)
+MAX_OCCURRENCES = 10000
+# Tasks repeat at most daily; finer rules are also the expensive ones to expand
+SUB_DAILY = re.compile(r'FREQ\s*=\s*(SECONDLY|MINUTELY|HOURLY)', re.IGNORECASE)
+
+
+def parse_rule(rule, dtstart):
+    """Parse ``rule`` starting at ``dtstart``; raises ValueError if invalid"""
+    if dtstart is None:
+        raise ValueError('Recurring tasks need a due_date')
+    if SUB_DAILY.search(rule):
+        raise ValueError('Invalid recurrence rule: tasks repeat at most daily')
+    try:
+        return rrulestr(rule, dtstart=dtstart)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid recurrence rule: {e}') from e
+
+
+def rule_until(rule, dtstart):
+    """
+    Date of the last occurrence, or None for an open-ended rule. At most
+    ``MAX_OCCURRENCES`` are walked: a longer COUNT raises ValueError, and a
+    longer UNTIL rule is treated as open-ended (its expansion still stops
+    at UNTIL).
+    """
+    recurrence = parse_rule(rule, dtstart)
+    upper = rule.upper()
+    if 'UNTIL=' not in upper and 'COUNT=' not in upper:
+        return None
+    last = None
+    for number, last in enumerate(recurrence, start=1):
+        if number > MAX_OCCURRENCES:
+            if 'COUNT=' in upper:
+                raise ValueError(f'Invalid recurrence rule: more than {MAX_OCCURRENCES} occurrences')
+            return None
+    return last or dtstart
+
+
+def is_occurrence(rule, dtstart, when):
+    recurrence = parse_rule(rule, dtstart)
+    return recurrence.before(when, inc=True) == when
+
+
+def apply_override(task, when, override=None):
+    """
+    Serialized occurrence of ``task`` originally due at ``when``, with an
+    optional ``TaskOccurrence`` override applied. None if it was cancelled.
+    """
+    occurrence = dict(task, occurrence_date=when.isoformat(), due_date=when.isoformat())
+    if override is not None:
+        if override.cancelled:
+            return None
+        for field in OVERRIDE_FIELDS:
+            value = getattr(override, field)
+            if value is not None:
+                occurrence[field] = value.isoformat() if isinstance(value, datetime) else value
+    return occurrence
+
+
+def expand(task, start, end, overrides=()):
+    """
+    Occurrences of ``task`` (a serialized recurring task) due in
+    ``[start, end)``, with per-occurrence ``overrides`` applied.
+
+    ``overrides`` may include occurrences from outside the window whose
+    override moves them into it.
+    """
+    dtstart = datetime.fromisoformat(task['due_date'])
+    by_date = {override.occurrence_date: override for override in overrides}
+    dates = {
+        when for when in parse_rule(task['recurrence_rule'], dtstart).between(start, end, inc=True)
+        if when < end
+    }
+    dates.update(by_date)
+
+    occurrences = []
+    for when in sorted(dates):
+        occurrence = apply_override(task, when, by_date.get(when))
+        if occurrence is not None and start <= datetime.fromisoformat(occurrence['due_date']) < end:
+            occurrences.append(occurrence)
+    return occurrences
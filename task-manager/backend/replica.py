@@ -0,0 +1,189 @@
+"""
+In-memory read replica of the default database.
+
+With ``READ_REPLICA`` enabled every worker keeps a copy of the database in
+shared-cache memory and serves GET requests from it, so list and calendar
+reads never touch the file the writers use. A refresher thread checks
+``PRAGMA data_version`` on a dedicated connection to the primary and, when
+another connection has committed, copies the database into a new in-memory
+generation with the backup API and swaps it in; readers still on the old
+generation finish undisturbed.
+
+Every refresh copies the whole database, in every worker, so its cost grows
+with the size of the database, not with the size of the change. Refreshes
+are therefore spaced at least ``min_interval`` apart, and at least ten times
+the duration of the last copy, so that a write-heavy period coalesces into
+a few copies instead of one per commit; reads made in between go to the
+primary. A database larger than ``max_bytes`` is not copied at all: the
+replica is dropped and every read uses the primary.
+
+Staleness is bounded: a read uses the replica only if it was last confirmed
+up to date at most ``max_staleness`` seconds ago, otherwise it goes to the
+primary. Responses to writes carry ``X-TaskHub-Written`` (the time of the
+commit); a client that sends that value back with its reads, as the header
+or as the ``_written`` query parameter (which keeps cross-origin GETs free
+of a CORS preflight), is served from the primary until the replica holds a
+snapshot taken after its write.
+"""
+
+import itertools
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+WRITTEN_HEADER = 'X-TaskHub-Written'
+WRITTEN_PARAM = '_written'
+
+_generations = itertools.count(1)
+
+
+def written_at(value):
+    """Commit time sent back by a client; unparsable values count as 'just now'"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return float('inf')
+
+
+class ReadReplica:
+    """Per-worker in-memory copy of ``engine``'s database"""
+
+    def __init__(self, engine, max_staleness=1.0, logger=None, min_interval=0.5, max_bytes=256 << 20):
+        self.source = engine
+        self.max_staleness = max_staleness
+        self.logger = logger
+        self.min_interval = min_interval
+        self.max_bytes = max_bytes
+        # One engine for every generation keeps SQLAlchemy's statement cache warm;
+        # its pool is replaced when a new generation is swapped in
+        self.engine = create_engine('sqlite://', creator=self._connect, poolclass=QueuePool)
+        self._current = None  # (database name, keeper connection, snapshot start time)
+        self._checked_at = 0.0  # the replica held every commit made before this time
+        self._version = None
+        self._refreshed_at = 0.0  # monotonic time of the last copy
+        self._too_large = False
+        self._probe = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.last_refresh_ms = 0.0
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def engine_for(self, written=None):
+        """
+        Engine to serve a read from: the replica, or None (use the primary)
+        when it may be too stale or older than the client's last write.
+        """
+        if self._thread is None:
+            self._start()
+        current = self._current
+        usable = (
+            current is not None
+            and time.time() - self._checked_at <= self.max_staleness
+            and (written is None or written < current[2])
+        )
+        with self._lock:
+            if usable:
+                self.replica_reads += 1
+            else:
+                self.primary_reads += 1
+        return self.engine if usable else None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='read-replica', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        current = self._current
+        with self._lock:
+            return {
+                'refreshes': self.refreshes,
+                'last_refresh_ms': self.last_refresh_ms,
+                'age_ms': round((time.time() - self._checked_at) * 1000, 1) if current else None,
+                'too_large': self._too_large,
+                'replica_reads': self.replica_reads,
+                'primary_reads': self.primary_reads,
+            }
+
+    def _run(self):
+        interval = self.max_staleness / 4
+        while True:
+            try:
+                self.check()
+            except Exception:
+                if self.logger is not None:
+                    self.logger.exception('Read replica refresh failed')
+            if self._stop.wait(interval):
+                return
+
+    def check(self):
+        """Refresh the replica if the primary changed since the last snapshot"""
+        started = time.time()
+        if self._probe is None:
+            # data_version only moves for commits made by *other* connections,
+            # so the probe connection is kept for the life of the replica
+            self._probe = self.source.raw_connection()
+        probe = self._probe.driver_connection
+        version = probe.execute('PRAGMA data_version').fetchone()[0]
+        if version != self._version or self._current is None:
+            pages = probe.execute('PRAGMA page_count').fetchone()[0]
+            size = pages * probe.execute('PRAGMA page_size').fetchone()[0]
+            if size > self.max_bytes:
+                self._drop(size)
+                return
+            self._too_large = False
+            wait = max(self.min_interval, self.last_refresh_ms / 100)  # 10x the last copy, in seconds
+            if self._current is not None and time.monotonic() - self._refreshed_at < wait:
+                return  # coalesce with later commits; reads use the primary meanwhile
+            self._refresh(started)
+            self._version = version
+        self._checked_at = started
+
+    def _drop(self, size):
+        """Stop copying a database that has grown past ``max_bytes``"""
+        if not self._too_large and self.logger is not None:
+            self.logger.warning(
+                'Read replica disabled: database is %.0f MB, limit %.0f MB', size / 1e6, self.max_bytes / 1e6
+            )
+        self._too_large = True
+        previous, self._current = self._current, None
+        if previous is not None:
+            self.engine.dispose()
+            previous[1].close()
+
+    def _connect(self):
+        current = self._current
+        if current is None:
+            # Dropped after a request picked the replica: read the primary instead
+            target = f'file:{self.source.url.database}?mode=ro'
+        else:
+            target = current[0]
+        connection = sqlite3.connect(target, uri=True, check_same_thread=False)
+        connection.execute('PRAGMA query_only = 1')
+        return connection
+
+    def _refresh(self, started):
+        name = f'file:taskhub-replica-{next(_generations)}?mode=memory&cache=shared'
+        copy_started = time.perf_counter()
+        keeper = sqlite3.connect(name, uri=True, check_same_thread=False)  # keeps the memory database alive
+        self._probe.driver_connection.backup(keeper)
+        self._refreshed_at = time.monotonic()
+        previous, self._current = self._current, (name, keeper, started)
+        if previous is not None:
+            self.engine.dispose()  # connections still in use finish on the old generation
+            previous[1].close()
+        with self._lock:
+            self.refreshes += 1
+            self.last_refresh_ms = round((time.perf_counter() - copy_started) * 1000, 2)
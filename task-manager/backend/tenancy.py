@@ -0,0 +1,149 @@
+"""
+Per-tenant database sharding.
+
+In multi-tenant mode every tenant gets its own SQLite file, so writes from
+one tenant never wait on another tenant's write lock. Engines are opened on
+first use, the schema is created/upgraded at that point, and open engines
+are kept in a bounded LRU: the least recently used engine is disposed when
+the limit is reached, and engines idle for longer than ``idle_seconds`` are
+disposed on the next lookup. A tenant's schema is set up under a lock of
+its own, so opening one tenant does not block lookups for the others.
+
+The tenant of a request comes from the ``X-Tenant-ID`` header or from a
+``/t/<tenant>/...`` path prefix (see ``TenantPathMiddleware``).
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+
+TENANT_HEADER = 'X-Tenant-ID'
+TENANT_ENVIRON_KEY = 'taskhub.tenant'
+TENANT_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def is_valid_tenant(tenant):
+    return bool(TENANT_PATTERN.match(tenant or ''))
+
+
+class TenantEngines:
+    """Lazily opened per-tenant engines kept in a bounded LRU"""
+
+    def __init__(self, directory, init_schema, max_open=64, idle_seconds=300):
+        self.directory = Path(directory)
+        self.init_schema = init_schema
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self._engines = OrderedDict()  # tenant -> (engine, last_used)
+        self._lock = threading.Lock()
+        self._opening = {}  # tenant -> lock held while its engine is initialized
+        self.opened = 0
+        self.evicted = 0
+
+    def path_for(self, tenant):
+        return self.directory / f'{tenant}.db'
+
+    def get(self, tenant):
+        """Engine for ``tenant``, opening and initializing it on first use"""
+        if not is_valid_tenant(tenant):
+            raise ValueError(f'Invalid tenant id: {tenant!r}')
+        with self._lock:
+            engine = self._touch(tenant)
+            if engine is not None:
+                return engine
+            opening = self._opening.setdefault(tenant, threading.Lock())
+        # Schema setup runs under the tenant's own lock, so first contact with
+        # one tenant does not hold up lookups for the others
+        with opening:
+            with self._lock:
+                engine = self._touch(tenant)  # opened while we waited
+                if engine is not None:
+                    return engine
+            self.directory.mkdir(parents=True, exist_ok=True)
+            engine = create_engine(f'sqlite:///{self.path_for(tenant)}')
+            try:
+                self.init_schema(engine)
+            except BaseException:
+                engine.dispose()
+                raise
+            with self._lock:
+                self.opened += 1
+                self._engines[tenant] = (engine, time.monotonic())
+                self._opening.pop(tenant, None)
+                self._evict(time.monotonic())
+        return engine
+
+    def _touch(self, tenant):
+        """Open engine of ``tenant`` marked as just used, or None; needs ``_lock``"""
+        entry = self._engines.pop(tenant, None)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        self._engines[tenant] = (entry[0], now)
+        self._evict(now)
+        return entry[0]
+
+    def _evict(self, now):
+        stale = [
+            tenant for tenant, (_, last_used) in self._engines.items()
+            if now - last_used > self.idle_seconds
+        ]
+        for tenant in stale:
+            self._engines.pop(tenant)[0].dispose()
+            self.evicted += 1
+        while len(self._engines) > self.max_open:
+            _, (engine, _) = self._engines.popitem(last=False)
+            engine.dispose()
+            self.evicted += 1
+
+    def engines(self):
+        """Engines of the tenants currently open"""
+        with self._lock:
+            return [engine for engine, _ in self._engines.values()]
+
+    def dispose_all(self):
+        with self._lock:
+            while self._engines:
+                self._engines.popitem()[1][0].dispose()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'open': len(self._engines),
+                'max_open': self.max_open,
+                'opened': self.opened,
+                'evicted': self.evicted,
+            }
+
+
+class TenantSession(Session):
+    """Session that binds to the current request's tenant engine or read replica, if any"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            engine = g.get('tenant_engine') or g.get('read_engine')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class TenantPathMiddleware:
+    """Route ``/t/<tenant>/api/...`` to ``/api/...`` with the tenant recorded"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith('/t/'):
+            tenant, _, rest = path[3:].partition('/')
+            environ[TENANT_ENVIRON_KEY] = tenant
+            environ['PATH_INFO'] = '/' + rest
+            environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + f'/t/{tenant}'
+        return self.wsgi_app(environ, start_response)
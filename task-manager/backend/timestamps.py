@@ -0,0 +1,160 @@
+"""
+Storage format of the task timestamps.
+
+By default SQLite stores datetimes as text (``2024-01-15 09:00:00.000000``),
+so every range filter compares strings and every row read parses one. In
+``epoch`` mode the timestamp columns of ``tasks`` hold integer microseconds
+since 1970-01-01 instead: rows and index entries are smaller, so the
+database file and the write volume shrink, and comparisons are integer
+comparisons. Reading is not faster under CPython, where turning an integer
+into a ``datetime`` costs about as much as SQLAlchemy's C text parser
+(see ``benchmarks/bench_timestamps.py``), which is why ``text`` stays the
+default.
+
+The mode of a database is recorded in ``schema_settings`` and read again
+each time a connection is checked out (one row), so values are written in
+the format the database holds even after another worker switched it.
+Switching converts every row, so do it with the other workers stopped: a
+write that was already under way in one of them still binds the old
+format. ``Timestamp`` columns read either format, and the
+API still sees plain ``datetime`` objects; the conversion to ISO strings
+happens in the serializers, as before.
+"""
+
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import DateTime, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.types import TypeDecorator
+
+TEXT = 'text'
+EPOCH = 'epoch'
+STORAGE_MODES = (TEXT, EPOCH)
+SETTING_KEY = 'timestamp_storage'
+
+# Columns converted when a database switches mode
+TIMESTAMP_COLUMNS = {
+    'tasks': ('due_date', 'reminder_date', 'created_at', 'updated_at', 'recurrence_until'),
+}
+
+_EPOCH_START = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch(value):
+    """Naive ``datetime`` (or ``date``) to integer microseconds since 1970"""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    return (value.replace(tzinfo=None) - _EPOCH_START) // _MICROSECOND
+
+
+def from_epoch(value):
+    return _EPOCH_START + timedelta(0, 0, value)
+
+
+class Timestamp(TypeDecorator):
+    """
+    ``DateTime`` column stored as text or as epoch microseconds, depending
+    on the mode of the database it is bound to. Reads accept both.
+
+    The declared SQL type stays ``DATETIME`` (NUMERIC affinity), which keeps
+    integers as integers and ISO strings as text.
+    """
+
+    impl = DateTime
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        as_text = self.impl_instance.dialect_impl(dialect).bind_processor(dialect)
+
+        def process(value):
+            if value is None:
+                return None
+            if getattr(dialect, 'timestamp_storage', TEXT) == EPOCH:
+                return to_epoch(value)
+            return as_text(value)
+        return process
+
+    def result_processor(self, dialect, coltype):
+        from_text = self.impl_instance.dialect_impl(dialect).result_processor(dialect, coltype)
+
+        def process(value):
+            if value is None:
+                return None
+            if type(value) is int:
+                return from_epoch(value)
+            return from_text(value)
+        return process
+
+
+def read_storage_mode(connection):
+    """Mode recorded for this database (text if none recorded yet)"""
+    value = connection.exec_driver_sql(
+        'SELECT value FROM schema_settings WHERE key = ?', (SETTING_KEY,)
+    ).scalar()
+    return value or TEXT
+
+
+@event.listens_for(Engine, 'engine_connect')
+def detect_storage_mode(connection):
+    """Set the database's current timestamp format on the dialect before each use"""
+    dialect = connection.dialect
+    if dialect.name != 'sqlite':
+        return
+    try:
+        dialect.timestamp_storage = read_storage_mode(connection)
+    except OperationalError:
+        pass  # not initialized yet; set_storage_mode() records the mode
+    connection.rollback()  # end the implicit transaction so callers can begin()
+
+
+def _to_epoch_sql(column):
+    # Text timestamps are 'YYYY-MM-DD HH:MM:SS[.ffffff]'; pad the fraction to 6 digits
+    return (
+        f"CASE WHEN typeof({column}) = 'text' THEN "
+        f"CAST(strftime('%s', {column}) AS INTEGER) * 1000000 + "
+        f"CAST(substr(substr({column}, 21) || '000000', 1, 6) AS INTEGER) "
+        f"ELSE {column} END"
+    )
+
+
+def _to_text_sql(column):
+    return (
+        f"CASE WHEN typeof({column}) = 'integer' THEN "
+        f"strftime('%Y-%m-%d %H:%M:%S', {column} / 1000000, 'unixepoch') || "
+        f"printf('.%06d', {column} % 1000000) "
+        f"ELSE {column} END"
+    )
+
+
+def set_storage_mode(connection, mode):
+    """
+    Convert the timestamp columns to ``mode`` if the database holds the other
+    format, record the mode and return the number of rows rewritten.
+    Runs inside the caller's transaction.
+    """
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown timestamp storage {mode!r}, expected one of {', '.join(STORAGE_MODES)}")
+    converted = 0
+    if read_storage_mode(connection) != mode:
+        convert = _to_epoch_sql if mode == EPOCH else _to_text_sql
+        for table, columns in TIMESTAMP_COLUMNS.items():
+            assignments = ', '.join(f'{column} = {convert(column)}' for column in columns)
+            converted += connection.exec_driver_sql(f'UPDATE {table} SET {assignments}').rowcount
+    connection.exec_driver_sql(
+        'INSERT INTO schema_settings (key, value) VALUES (?, ?) '
+        'ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+        (SETTING_KEY, mode)
+    )
+    connection.dialect.timestamp_storage = mode
+    return converted
+
+
+def day_sql(column):
+    """SQL expression for the calendar day of a timestamp column in either format"""
+    return (
+        f"CASE typeof({column}) WHEN 'integer' "
+        f"THEN date({column} / 1000000, 'unixepoch') "
+        f"ELSE date({column}) END"
+    )
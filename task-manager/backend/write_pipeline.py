@@ -0,0 +1,151 @@
+"""
+Group commit for small writes.
+
+SQLite has one write lock and, in WAL mode, syncs the log on every commit,
+so a burst of one-row updates from many request threads mostly waits on
+the lock and on fsync. A ``WritePipeline`` funnels those mutations through
+one writer thread instead: the writer takes every mutation that is queued,
+runs each in its own SAVEPOINT (a failing mutation only rolls back itself)
+and commits them all in one transaction. Each caller gets its result only
+after that commit has returned.
+
+A mutation that arrives while the writer is idle is committed at once. When
+more arrive while a batch is being collected, the writer keeps collecting
+until ``max_latency`` after the first one was submitted, or until
+``max_batch`` mutations are queued.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+
+class WritePipeline:
+    """Single writer thread committing queued mutations in groups"""
+
+    def __init__(self, engine, max_latency=0.005, max_batch=256):
+        self.engine = engine
+        self.max_latency = max_latency
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+        self.failed = 0
+        self.largest_batch = 0
+        self._thread = threading.Thread(target=self._run, name='write-pipeline', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue ``fn(connection, *args, **kwargs)``; the returned future holds
+        its result (or exception) once the batch containing it is committed.
+        """
+        future = Future()
+        self._queue.put((time.monotonic(), future, fn, args, kwargs))
+        return future
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        """
+        Submit ``fn`` and wait for its committed result. Raises
+        ``TimeoutError`` only if ``fn`` had not been picked up by the writer
+        yet, in which case it is cancelled and never runs; once its batch has
+        started, the outcome is waited for whatever the timeout.
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise TimeoutError('write not started in time') from None
+        return future.result()
+
+    def close(self):
+        """Commit what is queued and stop the writer"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'writes': self.writes,
+                'failed': self.failed,
+                'largest_batch': self.largest_batch,
+                'average_batch': round(self.writes / self.batches, 2) if self.batches else 0,
+                'queued': self._queue.qsize(),
+            }
+
+    def _collect(self):
+        """Next batch of jobs, or None once the pipeline is closed"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[0] + self.max_latency
+        while len(batch) < self.max_batch:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if len(batch) == 1 or remaining <= 0:
+                    break  # nobody else is writing, or the oldest job has waited long enough
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if job is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._commit(batch)
+
+    def _commit(self, batch):
+        # Claim every job first: from here on it can no longer be cancelled,
+        # and a caller that timed out waits for the outcome instead
+        batch = [job for job in batch if job[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        outcomes = []
+        try:
+            with self.engine.begin() as connection:
+                if connection.dialect.name == 'sqlite':
+                    # pysqlite only opens a transaction before DML, so without
+                    # this each SAVEPOINT below would be its own transaction
+                    # and every RELEASE its own commit
+                    connection.exec_driver_sql('BEGIN IMMEDIATE')
+                for _, future, fn, args, kwargs in batch:
+                    try:
+                        with connection.begin_nested():
+                            outcomes.append((True, fn(connection, *args, **kwargs)))
+                    except Exception as e:
+                        outcomes.append((False, e))
+        except Exception as e:
+            # BEGIN or the commit itself failed: nothing in the batch was written
+            for _, future, *_ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            with self._lock:
+                self.failed += len(batch)
+            return
+
+        failed = 0
+        for (_, future, *_), (ok, value) in zip(batch, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+                failed += 1
+        with self._lock:
+            self.batches += 1
+            self.writes += len(batch)
+            self.failed += failed
+            self.largest_batch = max(self.largest_batch, len(batch))
@@ -1,7 +1,7 @@
 // ==================== CONFIG ====================
 const API_BASE = 'http://localhost:5000/api';
 let USE_BACKEND = false;
-let BACKEND_CHECKED = false;
+let BACKEND_CHECK = null;  // first connection attempt
 
 // ==================== STATE MANAGEMENT ====================
 const state = {
@@ -11,9 +11,12 @@ const state = {
     currentFilter: 'all',
     currentView: 'list-view',
     editingTaskId: null,
+    editingOccurrence: null,  // occurrence_date when one occurrence of a recurring task is edited
     editingProjectId: null,
     currentMonth: new Date(),
     currentWeek: getISOWeek(new Date()),
+    calendarTasks: [],
+    calendarRange: ['', ''],  // [start, end) of the calendar shown, 'YYYY-MM-DD'
 };
 
 // ==================== UTILITY FUNCTIONS ====================
@@ -78,34 +81,105 @@ function generateId() {
     return Date.now().toString(36) + Math.random().toString(36).substr(2);
 }
 
-// ==================== BACKEND CONNECTION CHECK ====================
+// ==================== BACKEND CONNECTION ====================
+
+// While the backend cannot be reached the app works on its offline copy and
+// retries in the background, waiting twice as long after every failed
+// attempt (with jitter, so clients do not all come back at once). Once the
+// backend answers, the changes made offline are replayed before requests go
+// to it again.
+const RECONNECT_MIN_DELAY = 1000; // ms
+const RECONNECT_MAX_DELAY = 60000; // ms
+
+const reconnect = {
+    attempts: 0,    // failed attempts since the backend was last reachable
+    timer: null,
+    running: null,
+};
+
+// Thrown when a request could not reach the backend (as opposed to being
+// rejected by it); writes are then kept in the outbox
+class OfflineError extends Error {}
 
 async function checkBackendConnection() {
-    if (BACKEND_CHECKED) return USE_BACKEND;
-    BACKEND_CHECKED = true;
+    if (!BACKEND_CHECK) {
+        BACKEND_CHECK = connectToBackend();
+    }
+    await BACKEND_CHECK;
+    return USE_BACKEND;
+}
 
-    try {
-        const response = await fetch(`${API_BASE}/health`, { 
-            method: 'GET',
-            mode: 'cors'
-        });
-        USE_BACKEND = response.ok;
-        updateConnectionStatus();
-    } catch (error) {
-        console.log('Backend not available, using localStorage');
+function connectToBackend() {
+    if (!reconnect.running) {
+        clearTimeout(reconnect.timer);
+        reconnect.timer = null;
+        reconnect.running = (async () => {
+            try {
+                const response = await fetch(`${API_BASE}/health`, { 
+                    method: 'GET',
+                    mode: 'cors'
+                });
+                if (!response.ok) {
+                    throw new Error(`Health check failed: ${response.status}`);
+                }
+                const reconnected = reconnect.attempts > 0;
+                let synced = { changes: 0, conflicts: 0, rejected: 0 };
+                do {
+                    synced = await outbox.replay(synced);
+                } while (outbox.entries.length > 0);
+                USE_BACKEND = true;
+                reconnect.attempts = 0;
+                updateConnectionStatus(synced);
+                if (reconnected || synced.changes > 0) {
+                    requestReload('projects', 'tasks', 'calendar');
+                }
+            } catch (error) {
+                if (reconnect.attempts === 0) {
+                    console.log('Backend not available, using offline storage');
+                }
+                goOffline();
+            }
+        })().finally(() => { reconnect.running = null; });
+    }
+    return reconnect.running;
+}
+
+function goOffline() {
+    if (USE_BACKEND || reconnect.attempts === 0) {
         USE_BACKEND = false;
         updateConnectionStatus();
     }
-    return USE_BACKEND;
+    if (!reconnect.timer) {
+        const delay = Math.min(RECONNECT_MIN_DELAY * 2 ** reconnect.attempts, RECONNECT_MAX_DELAY);
+        reconnect.attempts++;
+        reconnect.timer = setTimeout(connectToBackend, delay / 2 + Math.random() * delay / 2);
+    }
 }
 
-function updateConnectionStatus() {
+window.addEventListener('online', () => {
+    if (!USE_BACKEND) connectToBackend();
+});
+
+window.addEventListener('offline', () => {
+    if (USE_BACKEND) goOffline();
+});
+
+function updateConnectionStatus(synced = null) {
     const statusEl = document.getElementById('connectionStatus');
     const statusText = document.getElementById('statusText');
     if (statusEl && statusText) {
         if (USE_BACKEND) {
             statusEl.style.background = '#4caf50';
             statusText.textContent = '✓ Connected to backend';
+            if (synced && synced.changes > 0) {
+                statusText.textContent += `, ${synced.changes} offline changes synced`;
+                if (synced.conflicts > 0) {
+                    statusText.textContent += ` (${synced.conflicts} kept the server's newer version)`;
+                }
+            }
+            if (synced && synced.rejected > 0) {
+                statusText.textContent += `, ${synced.rejected} offline changes rejected by the server`;
+            }
             statusEl.style.display = 'block';
             setTimeout(() => { statusEl.style.display = 'none'; }, 3000);
         } else {
@@ -116,62 +190,407 @@ function updateConnectionStatus() {
     }
 }
 
-// ==================== LOCAL STORAGE FUNCTIONS ====================
+// ==================== OFFLINE STORE (IndexedDB) ====================
+
+// Offline copy of projects and tasks, one record per object, and the outbox
+// of changes not sent to the backend yet (see below). Writes are queued per
+// record (later writes to the same record replace earlier ones) and flushed
+// together in a single transaction, so a change costs the same whatever the
+// number of tasks.
+const OFFLINE_DB_NAME = 'taskhub';
+const OFFLINE_DB_VERSION = 2;
+const OFFLINE_FLUSH_DELAY = 50; // ms
+const LEGACY_KEYS = { projects: 'taskManager_projects', tasks: 'taskManager_tasks' };
+
+function requestToPromise(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
 
-function saveToLocalStorage() {
-    localStorage.setItem('taskManager_projects', JSON.stringify(state.projects));
-    localStorage.setItem('taskManager_tasks', JSON.stringify(state.tasks));
+function transactionDone(tx) {
+    return new Promise((resolve, reject) => {
+        tx.oncomplete = () => resolve();
+        tx.onerror = tx.onabort = () => reject(tx.error);
+    });
 }
 
-function loadFromLocalStorage() {
+const offlineStore = {
+    db: null,
+    pending: new Map(),   // "store:id" -> { store, id, record } (record null = delete)
+    flushTimer: null,
+
+    open() {
+        if (!this.db) {
+            this.db = new Promise((resolve, reject) => {
+                if (!window.indexedDB) {
+                    reject(new Error('IndexedDB not available'));
+                    return;
+                }
+                const request = indexedDB.open(OFFLINE_DB_NAME, OFFLINE_DB_VERSION);
+                request.onupgradeneeded = (event) => {
+                    const db = request.result;
+                    if (event.oldVersion < 1) {
+                        db.createObjectStore('projects', { keyPath: 'id' });
+                        const tasks = db.createObjectStore('tasks', { keyPath: 'id' });
+                        tasks.createIndex('project_id', 'project_id');
+                        tasks.createIndex('due_date', 'due_date');
+                        // One-time import of the old whole-state localStorage copy
+                        Object.entries(LEGACY_KEYS).forEach(([store, key]) => {
+                            try {
+                                const records = JSON.parse(localStorage.getItem(key) || '[]');
+                                records.forEach(record => request.transaction.objectStore(store).put(record));
+                                localStorage.removeItem(key);
+                            } catch (error) {
+                                console.error(`Error importing ${key}:`, error);
+                            }
+                        });
+                    }
+                    if (event.oldVersion < 2) {
+                        db.createObjectStore('outbox', { keyPath: 'id' });
+                    }
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => reject(request.error);
+            });
+        }
+        return this.db;
+    },
+
+    put(store, record) {
+        this.pending.set(`${store}:${record.id}`, { store, id: record.id, record: { ...record } });
+        this.scheduleFlush();
+    },
+
+    delete(store, id) {
+        this.pending.set(`${store}:${id}`, { store, id, record: null });
+        this.scheduleFlush();
+    },
+
+    scheduleFlush() {
+        if (!this.flushTimer) {
+            this.flushTimer = setTimeout(() => this.flush(), OFFLINE_FLUSH_DELAY);
+        }
+    },
+
+    async flush() {
+        clearTimeout(this.flushTimer);
+        this.flushTimer = null;
+        if (this.pending.size === 0) return;
+        const writes = [...this.pending.values()];
+        this.pending.clear();
+        try {
+            const db = await this.open();
+            const tx = db.transaction(['projects', 'tasks', 'outbox'], 'readwrite');
+            writes.forEach(({ store, id, record }) => {
+                if (record) {
+                    tx.objectStore(store).put(record);
+                } else {
+                    tx.objectStore(store).delete(id);
+                }
+            });
+            await transactionDone(tx);
+        } catch (error) {
+            console.error('Error saving offline data:', error);
+        }
+    },
+
+    // Replace the stored copy with records fetched from the server: the whole
+    // store, or only the tasks of one project
+    async mirror(store, records, projectId = null) {
+        try {
+            await this.flush();
+            const db = await this.open();
+            const tx = db.transaction(store, 'readwrite');
+            const objectStore = tx.objectStore(store);
+            if (projectId === null) {
+                objectStore.clear();
+            } else {
+                const keys = await requestToPromise(objectStore.index('project_id').getAllKeys(projectId));
+                keys.forEach(key => objectStore.delete(key));
+            }
+            records.forEach(record => objectStore.put(record));
+            await transactionDone(tx);
+        } catch (error) {
+            console.error('Error mirroring offline data:', error);
+        }
+    },
+
+    async getAll(store) {
+        await this.flush();
+        const db = await this.open();
+        return requestToPromise(db.transaction(store).objectStore(store).getAll());
+    },
+
+    async tasksByProject(projectId) {
+        await this.flush();
+        const db = await this.open();
+        return requestToPromise(db.transaction('tasks').objectStore('tasks').index('project_id').getAll(projectId));
+    },
+
+    // Tasks due in [start, end), both 'YYYY-MM-DD' strings
+    async tasksDueBetween(start, end) {
+        await this.flush();
+        const db = await this.open();
+        const range = IDBKeyRange.bound(start, end, false, true);
+        return requestToPromise(db.transaction('tasks').objectStore('tasks').index('due_date').getAll(range));
+    },
+};
+
+// Save queued offline writes before the page goes away
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') offlineStore.flush();
+});
+
+async function loadFromOfflineStore() {
     try {
-        const projects = localStorage.getItem('taskManager_projects');
-        const tasks = localStorage.getItem('taskManager_tasks');
-        
-        if (projects) state.projects = JSON.parse(projects);
-        if (tasks) state.tasks = JSON.parse(tasks);
+        state.projects = await offlineStore.getAll('projects');
+        state.tasks = await offlineStore.getAll('tasks');
     } catch (error) {
-        console.error('Error loading from localStorage:', error);
+        console.error('Error loading offline data:', error);
+    }
+}
+
+function dateKey(date) {
+    return toLocalISOString(date).substring(0, 10);
+}
+
+// ==================== OFFLINE CHANGES (outbox) ====================
+
+// Changes made while the backend is unreachable, oldest first. They are
+// kept in the 'outbox' store and sent to POST /api/sync in batches when the
+// backend is back, which applies each batch in one transaction. Edits to a
+// record whose change has not been sent yet are merged into that change, so
+// the outbox grows with the number of records changed, not of edits. Task
+// changes carry the updated_at of the server copy they were made on (base):
+// if the task has changed on the server since, the server's version wins.
+const SYNC_BATCH_SIZE = 500;
+
+const outbox = {
+    entries: [],  // { id, seq, entity, op, key, data, base, sent }
+    loaded: null,
+
+    load() {
+        if (!this.loaded) {
+            this.loaded = offlineStore.getAll('outbox')
+                .then(entries => {
+                    this.entries = entries.concat(this.entries).sort((a, b) => a.seq - b.seq);
+                })
+                .catch(error => console.error('Error loading offline changes:', error));
+        }
+        return this.loaded;
+    },
+
+    latest(entity, key) {
+        for (let i = this.entries.length - 1; i >= 0; i--) {
+            const entry = this.entries[i];
+            if (entry.entity === entity && entry.key === key) return entry;
+        }
+        return null;
+    },
+
+    save(entry) {
+        offlineStore.put('outbox', entry);
+    },
+
+    remove(entry) {
+        const index = this.entries.indexOf(entry);
+        if (index >= 0) this.entries.splice(index, 1);
+        offlineStore.delete('outbox', entry.id);
+    },
+
+    async add(entity, op, key, data = null, base = null) {
+        await this.load();
+        const last = this.latest(entity, key);
+        if (last && !last.sent && last.op !== 'delete') {
+            if (op === 'update') {
+                last.data = { ...last.data, ...data };
+                this.save(last);
+            } else if (last.op === 'create') {
+                this.remove(last);  // deleted before the server ever saw it
+            } else {
+                Object.assign(last, { op, data: null });
+                this.save(last);
+            }
+        } else {
+            const seq = this.entries.length ? this.entries[this.entries.length - 1].seq + 1 : 1;
+            const entry = { id: generateId(), seq, entity, op, key, data, base, sent: false };
+            this.entries.push(entry);
+            this.save(entry);
+        }
+        if (USE_BACKEND) {
+            // The change missed a reconnect that was just completing: send it now
+            USE_BACKEND = false;
+            connectToBackend();
+        }
+    },
+
+    // Send all changes, in batches; throws when the backend cannot take them.
+    // Adds the changes sent, the conflicts and the changes the server refused
+    // to `synced` and returns it.
+    async replay(synced) {
+        await this.load();
+        while (this.entries.length > 0) {
+            const batch = this.entries.slice(0, SYNC_BATCH_SIZE);
+            // Sent changes are never merged into: the server may have applied
+            // them already even if its answer gets lost
+            batch.filter(entry => !entry.sent).forEach(entry => {
+                entry.sent = true;
+                this.save(entry);
+            });
+            await offlineStore.flush();
+            
+            const response = await fetch(`${API_BASE}/sync`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    mutations: batch.map(({ id, entity, op, key, data, base }) => ({ id, entity, op, key, data, base }))
+                }),
+                mode: 'cors'
+            });
+            if (response.status >= 400 && response.status < 500) {
+                // Refused for good (malformed or too large): resending the batch
+                // would keep this client offline forever, so it is dropped
+                const answer = await response.json().catch(() => ({}));
+                console.error('Offline changes rejected:', response.status, answer.error || '');
+                batch.forEach(entry => this.remove(entry));
+                synced.rejected += batch.length;
+                continue;
+            }
+            if (!response.ok) {
+                throw new Error(`Sync Error: ${response.status}`);
+            }
+            lastWritten = response.headers.get('X-TaskHub-Written') || lastWritten;
+            const { results, ids } = await response.json();
+            
+            Object.entries(ids).forEach(([clientId, serverId]) => adoptServerId(clientId, serverId));
+            const answers = new Map(results.map(result => [result.id, result]));
+            batch.forEach(entry => {
+                const answer = answers.get(entry.id);
+                this.remove(entry);
+                if (answer?.status === 'conflict') synced.conflicts++;
+                if (answer?.status === 'applied' && entry.entity === 'task' && answer.record) {
+                    // Later changes to the task build on the version just written
+                    this.entries.forEach(other => {
+                        if (other.entity === 'task' && other.key === answer.record.id) {
+                            other.base = answer.record.updated_at;
+                            this.save(other);
+                        }
+                    });
+                }
+            });
+            synced.changes += batch.length;
+        }
+        await offlineStore.flush();
+        return synced;
+    },
+};
+
+// A record created offline got its id from the server: use it everywhere
+function adoptServerId(clientId, serverId) {
+    outbox.entries.forEach(entry => {
+        if (entry.key === clientId) {
+            entry.key = serverId;
+            outbox.save(entry);
+        }
+        if (entry.entity === 'task' && entry.data?.project_id === clientId) {
+            entry.data = { ...entry.data, project_id: serverId };
+            outbox.save(entry);
+        }
+    });
+    ['projects', 'tasks'].forEach(store => {
+        offlineStore.delete(store, clientId);
+        const record = state[store].find(r => r.id === clientId);
+        if (record) {
+            record.id = serverId;
+            offlineStore.put(store, record);
+        }
+    });
+    state.tasks.forEach(task => {
+        if (task.project_id === clientId) {
+            task.project_id = serverId;
+            offlineStore.put('tasks', task);
+        }
+    });
+    if (state.currentProjectId === clientId) {
+        state.currentProjectId = serverId;
     }
 }
 
+// Version of the server copy a local task is based on (base of its changes)
+function serverVersion(task) {
+    return task && typeof task.id === 'number' ? task.updated_at : null;
+}
+
 // ==================== ENHANCED API CALLS ====================
 
 // ==================== ENHANCED API CALLS ====================
 
-async function apiCall(endpoint, options = {}) {
+// Commit time of this client's latest write, sent back so that reads served
+// by a backend read replica include it (read-your-writes). It goes in the
+// query string: a custom header would make every cross-origin GET preflighted
+let lastWritten = null;
+
+// Times a request shed by the backend's admission control (503 with
+// Retry-After, sent before the request ran) is retried
+const BUSY_RETRIES = 2;
+
+async function apiCall(endpoint, options = {}, attempt = 0) {
     const useBackend = await checkBackendConnection();
-    const url = `${API_BASE}${endpoint}`;
-    const defaultHeaders = { 'Content-Type': 'application/json' };
+    const reading = !options.method || options.method === 'GET';
+    let url = `${API_BASE}${endpoint}`;
+    if (reading && lastWritten) {
+        url += `${endpoint.includes('?') ? '&' : '?'}_written=${lastWritten}`;
+    }
+    // Only requests with a body declare it: JSON content type forces a preflight too
+    const defaultHeaders = options.body ? { 'Content-Type': 'application/json' } : {};
     
     if (!useBackend) {
-        throw new Error('Backend not available - using localStorage');
+        throw new OfflineError('Backend not available - using offline storage');
     }
 
+    let response;
     try {
-        const response = await fetch(url, {
+        response = await fetch(url, {
             ...options,
             headers: { ...defaultHeaders, ...options.headers },
             mode: 'cors'
         });
-        
-        if (!response.ok) {
-            throw new Error(`API Error: ${response.status}`);
-        }
-        
-        return response.status === 204 ? null : await response.json();
     } catch (error) {
         console.error('API Call Error:', error);
-        USE_BACKEND = false;
-        updateConnectionStatus();
-        throw error;
+        goOffline();
+        throw new OfflineError(error.message);
+    }
+    
+    const retryAfter = response.headers.get('Retry-After');
+    if (response.status === 503 && retryAfter !== null && attempt < BUSY_RETRIES) {
+        // Shed, not run: wait as asked and try again. Other 503s (a write
+        // that timed out in the backend) are not resent from here
+        const seconds = Number(retryAfter) || 1;
+        await new Promise(resolve => setTimeout(resolve, seconds * 1000));
+        return apiCall(endpoint, options, attempt + 1);
+    }
+    if (response.status >= 500) {
+        // Cannot take requests now: continue offline and replay later
+        console.error('API Call Error:', response.status);
+        goOffline();
+        throw new OfflineError(`API Error: ${response.status}`);
     }
+    if (!response.ok) {
+        throw new Error(`API Error: ${response.status}`);
+    }
+    lastWritten = response.headers.get('X-TaskHub-Written') || lastWritten;
+    
+    return response.status === 204 ? null : await response.json();
 }
 
-// Projects API - with localStorage fallback
+// Projects API - with offline store fallback
 async function getProjects() {
     try {
-        return await apiCall('/projects');
+        const projects = await apiCall('/projects');
+        offlineStore.mirror('projects', projects);
+        return projects;
     } catch {
         return state.projects;
     }
@@ -183,7 +602,8 @@ async function createProject(projectData) {
             method: 'POST',
             body: JSON.stringify(projectData)
         });
-    } catch {
+    } catch (error) {
+        if (!(error instanceof OfflineError)) throw error;
         const newProject = {
             id: generateId(),
             name: projectData.name,
@@ -191,8 +611,8 @@ async function createProject(projectData) {
             color: projectData.color || '#667eea',
             created_at: new Date().toISOString()
         };
-        state.projects.push(newProject);
-        saveToLocalStorage();
+        offlineStore.put('projects', newProject);
+        await outbox.add('project', 'create', newProject.id, projectData);
         return newProject;
     }
 }
@@ -203,12 +623,14 @@ async function updateProject(projectId, projectData) {
             method: 'PUT',
             body: JSON.stringify(projectData)
         });
-    } catch {
+    } catch (error) {
+        if (!(error instanceof OfflineError)) throw error;
         const project = state.projects.find(p => p.id === projectId);
         if (project) {
             Object.assign(project, projectData);
-            saveToLocalStorage();
+            offlineStore.put('projects', project);
         }
+        await outbox.add('project', 'update', projectId, projectData);
         return project;
     }
 }
@@ -218,23 +640,32 @@ async function deleteProject(projectId) {
         return await apiCall(`/projects/${projectId}`, {
             method: 'DELETE'
         });
-    } catch {
+    } catch (error) {
+        if (!(error instanceof OfflineError)) throw error;
         state.projects = state.projects.filter(p => p.id !== projectId);
+        offlineStore.delete('projects', projectId);
+        await outbox.add('project', 'delete', projectId);
+        const projectTasks = await offlineStore.tasksByProject(projectId).catch(() => []);
+        projectTasks.forEach(t => offlineStore.delete('tasks', t.id));
         state.tasks = state.tasks.filter(t => t.project_id !== projectId);
-        saveToLocalStorage();
     }
 }
 
-// Tasks API - with localStorage fallback
+// Tasks API - with offline store fallback
 async function getTasks(filters = {}) {
     try {
         const params = new URLSearchParams();
         Object.entries(filters).forEach(([key, value]) => {
             if (value) params.append(key, value);
         });
-        return await apiCall(`/tasks?${params}`);
+        const tasks = await apiCall(`/tasks?${params}`);
+        offlineStore.mirror('tasks', tasks, filters.project_id || null);
+        return tasks;
     } catch {
-        return state.tasks;
+        if (filters.project_id) {
+            return offlineStore.tasksByProject(filters.project_id).catch(() => state.tasks);
+        }
+        return offlineStore.getAll('tasks').catch(() => state.tasks);
     }
 }
 
@@ -244,7 +675,8 @@ async function createTask(taskData) {
             method: 'POST',
             body: JSON.stringify(taskData)
         });
-    } catch {
+    } catch (error) {
+        if (!(error instanceof OfflineError)) throw error;
         const newTask = {
             id: generateId(),
             project_id: taskData.project_id,
@@ -254,12 +686,13 @@ async function createTask(taskData) {
             priority: taskData.priority || 'medium',
             due_date: taskData.due_date || null,
             reminder_date: taskData.reminder_date || null,
+            recurrence_rule: taskData.recurrence_rule || null,
             order: 0,
             created_at: new Date().toISOString(),
             updated_at: new Date().toISOString()
         };
-        state.tasks.push(newTask);
-        saveToLocalStorage();
+        offlineStore.put('tasks', newTask);
+        await outbox.add('task', 'create', newTask.id, taskData);
         return newTask;
     }
 }
@@ -270,24 +703,38 @@ async function updateTask(taskId, taskData) {
             method: 'PUT',
             body: JSON.stringify(taskData)
         });
-    } catch {
+    } catch (error) {
+        if (!(error instanceof OfflineError)) throw error;
+        // updated_at is left alone: it names the server version being edited
         const task = state.tasks.find(t => t.id === taskId);
         if (task) {
-            Object.assign(task, taskData, { updated_at: new Date().toISOString() });
-            saveToLocalStorage();
+            Object.assign(task, taskData);
+            offlineStore.put('tasks', task);
         }
+        await outbox.add('task', 'update', taskId, taskData, serverVersion(task));
         return task;
     }
 }
 
+async function updateOccurrence(taskId, occurrenceDate, changes) {
+    // Occurrence overrides are not queued offline: the outbox only replays tasks and projects
+    return apiCall(`/tasks/${taskId}/occurrences/${encodeURIComponent(occurrenceDate)}`, {
+        method: 'PUT',
+        body: JSON.stringify(changes)
+    });
+}
+
 async function deleteTask(taskId) {
     try {
         return await apiCall(`/tasks/${taskId}`, {
             method: 'DELETE'
         });
-    } catch {
+    } catch (error) {
+        if (!(error instanceof OfflineError)) throw error;
+        const task = state.tasks.find(t => t.id === taskId);
         state.tasks = state.tasks.filter(t => t.id !== taskId);
-        saveToLocalStorage();
+        offlineStore.delete('tasks', taskId);
+        await outbox.add('task', 'delete', taskId, null, serverVersion(task));
     }
 }
 
@@ -296,12 +743,13 @@ async function toggleTaskStatus(taskId) {
         return await apiCall(`/tasks/toggle/${taskId}`, {
             method: 'PUT'
         });
-    } catch {
+    } catch (error) {
+        if (!(error instanceof OfflineError)) throw error;
+        // The local copy has already been flipped by toggleTask()
         const task = state.tasks.find(t => t.id === taskId);
         if (task) {
-            task.status = task.status === 'pending' ? 'completed' : 'pending';
-            task.updated_at = new Date().toISOString();
-            saveToLocalStorage();
+            offlineStore.put('tasks', task);
+            await outbox.add('task', 'update', taskId, { status: task.status }, serverVersion(task));
         }
         return task;
     }
@@ -313,12 +761,16 @@ async function reorderTasks(taskIds) {
             method: 'POST',
             body: JSON.stringify({ task_ids: taskIds })
         });
-    } catch {
-        taskIds.forEach((id, index) => {
+    } catch (error) {
+        if (!(error instanceof OfflineError)) throw error;
+        for (const [index, id] of taskIds.entries()) {
             const task = state.tasks.find(t => t.id === id);
-            if (task) task.order = index;
-        });
-        saveToLocalStorage();
+            if (task) {
+                task.order = index;
+                offlineStore.put('tasks', task);
+                await outbox.add('task', 'update', id, { order: index });
+            }
+        }
     }
 }
 
@@ -326,13 +778,15 @@ async function getMonthTasks(year, month) {
     try {
         return await apiCall(`/calendar/month/${year}/${month}`);
     } catch {
-        // Fallback: compute locally
-        const monthTasks = state.tasks.filter(task => {
+        // Fallback: read the month from the offline due date index
+        const start = dateKey(new Date(year, month - 1, 1));
+        const end = dateKey(new Date(year, month, 1));
+        const monthTasks = await offlineStore.tasksDueBetween(start, end).catch(() => state.tasks.filter(task => {
             if (!task.due_date) return false;
             const taskDate = new Date(task.due_date);
             return taskDate.getFullYear() === year && taskDate.getMonth() === month - 1;
-        });
-        return { year, month, tasks: monthTasks };
+        }));
+        return monthTasks;
     }
 }
 
@@ -341,12 +795,11 @@ async function getWeekTasks(year, week) {
         return await apiCall(`/calendar/week/${year}/${week}`);
     } catch {
         // Fallback: compute locally
-        const weekTasks = state.tasks.filter(task => {
+        return state.tasks.filter(task => {
             if (!task.due_date) return false;
             const taskDate = new Date(task.due_date);
             return isSameWeek(taskDate, week, year);
         });
-        return { year, week, tasks: weekTasks };
     }
 }
 
@@ -368,7 +821,7 @@ async function loadTasks() {
         if (state.currentProjectId) {
             filters.project_id = state.currentProjectId;
         }
-        state.tasks = await getTasks(filters);
+        state.tasks = unconfirmed.apply(await getTasks(filters));
         renderTasks();
     } catch (error) {
         console.error('Error loading tasks:', error);
@@ -379,8 +832,9 @@ async function loadCalendar() {
     try {
         const year = state.currentMonth.getFullYear();
         const month = state.currentMonth.getMonth() + 1;
-        const calendarTasks = await getMonthTasks(year, month);
-        renderMonthCalendar(calendarTasks);
+        state.calendarTasks = await getMonthTasks(year, month);
+        state.calendarRange = [dateKey(new Date(year, month - 1, 1)), dateKey(new Date(year, month, 1))];
+        renderMonthCalendar(state.calendarTasks);
     } catch (error) {
         console.error('Error loading calendar:', error);
     }
@@ -390,13 +844,272 @@ async function loadWeekCalendar() {
     try {
         const year = state.currentMonth.getFullYear();
         const week = getISOWeek(state.currentMonth);
-        const weekTasks = await getWeekTasks(year, week);
-        renderWeekCalendar(weekTasks);
+        state.calendarTasks = await getWeekTasks(year, week);
+        const monday = new Date(state.currentMonth);
+        monday.setDate(monday.getDate() - (monday.getDay() + 6) % 7);
+        const nextMonday = new Date(monday);
+        nextMonday.setDate(nextMonday.getDate() + 7);
+        state.calendarRange = [dateKey(monday), dateKey(nextMonday)];
+        renderWeekCalendar(state.calendarTasks);
     } catch (error) {
         console.error('Error loading week calendar:', error);
     }
 }
 
+// ==================== CLIENT DATA LAYER ====================
+
+// Edits are applied to the local state and rendered at once, then sent to
+// the backend in a single request; its answer replaces the local copy.
+// Reloads asked for while one is pending or running are merged into one
+// follow-up fetch.
+const RELOAD_DELAY = 50; // ms
+
+const reloads = {
+    parts: new Set(),  // 'projects', 'tasks', 'calendar'
+    running: null,
+};
+
+const RELOADERS = {
+    projects: () => loadProjects(),
+    tasks: () => loadTasks(),
+    calendar: () => loadCurrentCalendar(),
+};
+
+function requestReload(...parts) {
+    parts.forEach(part => reloads.parts.add(part));
+    if (!reloads.running) {
+        reloads.running = (async () => {
+            await new Promise(resolve => setTimeout(resolve, RELOAD_DELAY));
+            while (reloads.parts.size) {
+                const batch = [...reloads.parts];
+                reloads.parts.clear();
+                await Promise.all(batch.map(part => RELOADERS[part]()));
+            }
+        })().finally(() => { reloads.running = null; });
+    }
+    return reloads.running;
+}
+
+function loadCurrentCalendar() {
+    if (state.currentView === 'calendar-month') return loadCalendar();
+    if (state.currentView === 'calendar-week') return loadWeekCalendar();
+}
+
+function renderCurrentCalendar() {
+    if (state.currentView === 'calendar-month') renderMonthCalendar(state.calendarTasks);
+    if (state.currentView === 'calendar-week') renderWeekCalendar(state.calendarTasks);
+}
+
+// Local changes the backend has not confirmed yet, re-applied on top of
+// reloaded lists so a reload cannot undo them
+const unconfirmed = {
+    edits: new Map(),    // task id -> { patch, count }; patch null = deleted
+    created: new Map(),  // temporary id -> task
+
+    begin(id, patch) {
+        const entry = this.edits.get(id) || { patch: {}, count: 0 };
+        entry.patch = patch === null || entry.patch === null ? null : { ...entry.patch, ...patch };
+        entry.count++;
+        this.edits.set(id, entry);
+    },
+
+    end(id) {
+        const entry = this.edits.get(id);
+        if (entry && --entry.count === 0) this.edits.delete(id);
+    },
+
+    apply(tasks) {
+        if (this.edits.size === 0 && this.created.size === 0) return tasks;
+        const result = [];
+        tasks.forEach(task => {
+            const entry = this.edits.get(task.id);
+            if (!entry) {
+                result.push(task);
+            } else if (entry.patch !== null) {
+                result.push({ ...task, ...entry.patch });
+            }
+        });
+        this.created.forEach(task => {
+            if (!state.currentProjectId || task.project_id === state.currentProjectId) result.push(task);
+        });
+        return result;
+    },
+};
+
+function upsertTask(task, replacedId = task.id) {
+    if (replacedId !== task.id) {
+        // A reload that landed after the server saved it may list it already
+        state.tasks = state.tasks.filter(t => t.id !== task.id);
+    }
+    const index = state.tasks.findIndex(t => t.id === replacedId);
+    if (index >= 0) {
+        state.tasks[index] = task;
+    } else {
+        state.tasks.push(task);
+    }
+}
+
+// Update the calendar shown for a task that changed (null when deleted).
+// Recurring tasks are expanded by the backend, so those reload it.
+function patchCalendar(replacedId, task) {
+    if (state.currentView === 'list-view') return;
+    const recurring = state.calendarTasks.some(t => t.id === replacedId && t.recurrence_rule);
+    if (recurring || task?.recurrence_rule) {
+        requestReload('calendar');
+        return;
+    }
+    state.calendarTasks = state.calendarTasks.filter(t => t.id !== replacedId && t.id !== task?.id);
+    const [start, end] = state.calendarRange;
+    if (task && task.due_date && task.due_date >= start && task.due_date < end) {
+        state.calendarTasks.push(task);
+    }
+    renderCurrentCalendar();
+}
+
+async function saveTask(taskId, taskData) {
+    if (taskId) {
+        const task = state.tasks.find(t => t.id === taskId);
+        unconfirmed.begin(taskId, taskData);
+        if (task) {
+            Object.assign(task, taskData);
+            renderTasks();
+            patchCalendar(taskId, task);
+        }
+        try {
+            const saved = await updateTask(taskId, taskData);
+            unconfirmed.end(taskId);
+            if (saved && !unconfirmed.edits.has(taskId)) {  // a later edit's answer is newer
+                upsertTask(saved);
+                patchCalendar(taskId, saved);
+            }
+        } catch (error) {
+            unconfirmed.end(taskId);
+            console.error('Error saving task:', error);
+            requestReload('tasks', 'calendar');
+        }
+    } else {
+        const draft = {
+            ...taskData,
+            id: `tmp-${generateId()}`,
+            order: 0,
+            created_at: new Date().toISOString(),
+            updated_at: new Date().toISOString()
+        };
+        unconfirmed.created.set(draft.id, draft);
+        state.tasks.push(draft);
+        renderTasks();
+        patchCalendar(draft.id, draft);
+        try {
+            const saved = await createTask(taskData);
+            upsertTask(saved, draft.id);
+            patchCalendar(draft.id, saved);
+        } catch (error) {
+            state.tasks = state.tasks.filter(t => t.id !== draft.id);
+            console.error('Error creating task:', error);
+        } finally {
+            unconfirmed.created.delete(draft.id);
+        }
+    }
+    renderTasks();
+}
+
+async function saveOccurrence(taskId, occurrenceDate, changes) {
+    try {
+        await updateOccurrence(taskId, occurrenceDate, changes);
+    } catch (error) {
+        console.error('Error saving occurrence:', error);
+    }
+    requestReload('calendar');
+}
+
+async function toggleTask(taskId) {
+    const task = state.tasks.find(t => t.id === taskId);
+    if (!task) return;
+    const status = task.status === 'pending' ? 'completed' : 'pending';
+    unconfirmed.begin(taskId, { status });
+    task.status = status;
+    renderTasks();
+    patchCalendar(taskId, task);
+    try {
+        const saved = await toggleTaskStatus(taskId);
+        unconfirmed.end(taskId);
+        if (saved && !unconfirmed.edits.has(taskId)) {  // a later toggle's answer is newer
+            upsertTask(saved);
+            patchCalendar(taskId, saved);
+        }
+    } catch (error) {
+        unconfirmed.end(taskId);
+        console.error('Error toggling task:', error);
+        requestReload('tasks', 'calendar');
+    }
+    renderTasks();
+}
+
+async function removeTask(taskId) {
+    unconfirmed.begin(taskId, null);
+    state.tasks = state.tasks.filter(t => t.id !== taskId);
+    renderTasks();
+    patchCalendar(taskId, null);
+    try {
+        await deleteTask(taskId);
+    } catch (error) {
+        console.error('Error deleting task:', error);
+        requestReload('tasks', 'calendar');
+    } finally {
+        unconfirmed.end(taskId);
+    }
+}
+
+async function saveProject(projectId, projectData) {
+    if (projectId) {
+        const project = state.projects.find(p => p.id === projectId);
+        if (project) Object.assign(project, projectData);
+    }
+    renderProjects();
+    updateProjectSelect();
+    updateViewTitle();
+    renderTasks();
+    try {
+        const saved = projectId
+            ? await updateProject(projectId, projectData)
+            : await createProject(projectData);
+        if (saved) {
+            const index = state.projects.findIndex(p => p.id === saved.id);
+            if (index >= 0) {
+                state.projects[index] = saved;
+            } else {
+                state.projects.push(saved);
+            }
+        }
+    } catch (error) {
+        console.error('Error saving project:', error);
+        requestReload('projects');
+    }
+    renderProjects();
+    updateProjectSelect();
+    updateViewTitle();
+    renderTasks();
+}
+
+async function removeProject(projectId) {
+    state.projects = state.projects.filter(p => p.id !== projectId);
+    state.tasks = state.tasks.filter(t => t.project_id !== projectId);
+    if (state.currentProjectId === projectId) {
+        state.currentProjectId = null;
+        updateViewTitle();
+    }
+    renderProjects();
+    updateProjectSelect();
+    renderTasks();
+    try {
+        await deleteProject(projectId);
+    } catch (error) {
+        console.error('Error deleting project:', error);
+        requestReload('projects', 'tasks');
+    }
+    requestReload('calendar');
+}
+
 // ==================== RENDERING ====================
 
 function renderProjects() {
@@ -432,18 +1145,50 @@ function selectProject(projectId) {
     state.currentProjectId = projectId;
     state.currentFilter = 'all';
     renderProjects();
-    loadTasks();
+    requestReload('tasks');
     document.querySelectorAll('.filter-btn').forEach(btn => {
         btn.classList.toggle('active', btn.dataset.filter === 'all');
     });
     updateViewTitle();
 }
 
-function renderTasks() {
-    const tasksList = document.getElementById('tasksList');
-    tasksList.innerHTML = '';
-    
-    // Apply filters
+// Make `parent`'s children the nodes for `items`, in order. Nodes are kept
+// in `cache` by `keyOf(item)` (the item id by default) and reused; `update`
+// only runs for items whose signature changed, and nodes of items no longer
+// listed are removed.
+function reconcileChildren(parent, items, cache, create, update, signatureOf, keyOf = item => item.id) {
+    const seen = new Set();
+    let cursor = parent.firstChild;
+    items.forEach(item => {
+        const key = keyOf(item);
+        let entry = cache.get(key);
+        if (!entry) {
+            entry = { node: create(item), signature: null };
+            cache.set(key, entry);
+        }
+        const signature = signatureOf(item);
+        if (entry.signature !== signature) {
+            update(entry.node, item);
+            entry.signature = signature;
+        }
+        seen.add(key);
+        if (entry.node === cursor) {
+            cursor = cursor.nextSibling;
+        } else {
+            parent.insertBefore(entry.node, cursor);
+        }
+    });
+    while (cursor) {
+        const next = cursor.nextSibling;
+        parent.removeChild(cursor);
+        cursor = next;
+    }
+    cache.forEach((entry, id) => {
+        if (!seen.has(id)) cache.delete(id);
+    });
+}
+
+function filterTasks() {
     let filteredTasks = state.tasks;
     
     if (state.currentFilter !== 'all') {
@@ -476,7 +1221,32 @@ function renderTasks() {
         filteredTasks = filteredTasks.filter(task => task.status === statusFilter);
     }
     
-    if (filteredTasks.length === 0) {
+    return filteredTasks;
+}
+
+// Only the rows in and around the visible part of the list view are in the
+// DOM; padding on the list stands in for the others. Rows are one line high
+// (titles are cut off, not wrapped), so a row's position is its index times
+// the row height, measured from the rendered rows.
+const TASK_ROW_HEIGHT = 86; // px, row plus gap, until measured
+const TASK_ROW_OVERSCAN = 10; // rows rendered above and below the viewport
+
+const taskWindow = {
+    tasks: [],          // filtered tasks, in display order
+    rows: new Map(),    // task id -> { node, signature }
+    rowHeight: TASK_ROW_HEIGHT,
+    measured: false,
+    frame: null,
+};
+
+function renderTasks() {
+    const tasksList = document.getElementById('tasksList');
+    taskWindow.tasks = filterTasks();
+    
+    if (taskWindow.tasks.length === 0) {
+        taskWindow.rows.clear();
+        tasksList.style.paddingTop = '';
+        tasksList.style.paddingBottom = '';
         tasksList.innerHTML = `
             <div class="empty-state">
                 <div class="empty-state-icon">📭</div>
@@ -486,53 +1256,132 @@ function renderTasks() {
         return;
     }
     
-    filteredTasks.forEach(task => {
-        const li = document.createElement('li');
-        const dueDate = task.due_date ? new Date(task.due_date) : null;
-        const project = state.projects.find(p => p.id === task.project_id);
-        
-        li.className = `task-item ${task.status} ${task.priority}`;
-        li.innerHTML = `
-            <input type="checkbox" class="task-checkbox" ${task.status === 'completed' ? 'checked' : ''}>
-            <div class="task-content">
-                <div class="task-title">${task.title}</div>
-                <div class="task-meta">
-                    <span class="task-meta-item">📁 ${project?.name || 'Unknown'}</span>
-                    ${dueDate ? `<span class="task-meta-item">📅 ${formatDate(task.due_date)}</span>` : ''}
-                    <span class="task-priority ${task.priority}">${task.priority}</span>
-                </div>
-            </div>
-            <div class="task-actions">
-                <button class="task-edit-btn" title="Edit">✎</button>
-                <button class="task-delete-btn" title="Delete">✕</button>
-            </div>
-        `;
-        
-        li.querySelector('.task-checkbox').addEventListener('change', () => {
-            toggleTaskStatus(task.id).then(() => {
-                loadTasks();
-                if (state.currentView !== 'list-view') {
-                    loadCalendar();
-                }
-            });
-        });
-        
-        li.querySelector('.task-content').addEventListener('click', () => {
-            editTask(task.id);
-        });
-        
-        li.querySelector('.task-edit-btn').addEventListener('click', (e) => {
-            e.stopPropagation();
-            editTask(task.id);
+    renderTaskWindow();
+}
+
+function renderTaskWindow() {
+    const tasks = taskWindow.tasks;
+    if (tasks.length === 0) return;
+    
+    const tasksList = document.getElementById('tasksList');
+    const scroller = document.getElementById('list-view');
+    const rowHeight = taskWindow.rowHeight;
+    // Offset of the list's top from the top of the visible area
+    const top = tasksList.getBoundingClientRect().top - scroller.getBoundingClientRect().top;
+    const first = Math.min(Math.max(Math.floor(-top / rowHeight) - TASK_ROW_OVERSCAN, 0), tasks.length);
+    const last = Math.min(Math.ceil((scroller.clientHeight - top) / rowHeight) + TASK_ROW_OVERSCAN, tasks.length);
+    
+    tasksList.style.paddingTop = `${first * rowHeight}px`;
+    tasksList.style.paddingBottom = `${Math.max(tasks.length - Math.max(last, first), 0) * rowHeight}px`;
+    reconcileChildren(tasksList, tasks.slice(first, Math.max(last, first)), taskWindow.rows,
+        createTaskRow, updateTaskRow, taskRowSignature);
+    
+    if (!taskWindow.measured && tasksList.children.length > 1) {
+        const measured = tasksList.children[1].offsetTop - tasksList.children[0].offsetTop;
+        taskWindow.measured = true;
+        if (measured > 0 && measured !== rowHeight) {
+            taskWindow.rowHeight = measured;
+            renderTaskWindow();
+        }
+    }
+}
+
+function scheduleTaskWindow() {
+    if (taskWindow.frame === null) {
+        taskWindow.frame = requestAnimationFrame(() => {
+            taskWindow.frame = null;
+            renderTaskWindow();
         });
-        
-        li.querySelector('.task-delete-btn').addEventListener('click', (e) => {
-            e.stopPropagation();
+    }
+}
+
+function createTaskRow(task) {
+    const li = document.createElement('li');
+    li.addEventListener('change', (e) => {
+        if (e.target.closest('.task-checkbox')) toggleTask(task.id);
+    });
+    li.addEventListener('click', (e) => {
+        if (e.target.closest('.task-delete-btn')) {
             deleteTaskConfirm(task.id);
-        });
-        
-        tasksList.appendChild(li);
+        } else if (e.target.closest('.task-edit-btn') || e.target.closest('.task-content')) {
+            editTask(task.id);
+        }
+    });
+    return li;
+}
+
+function updateTaskRow(li, task) {
+    const dueDate = task.due_date ? new Date(task.due_date) : null;
+    const project = state.projects.find(p => p.id === task.project_id);
+    
+    li.className = `task-item ${task.status} ${task.priority}`;
+    li.innerHTML = `
+        <input type="checkbox" class="task-checkbox" ${task.status === 'completed' ? 'checked' : ''}>
+        <div class="task-content">
+            <div class="task-title">${task.title}</div>
+            <div class="task-meta">
+                <span class="task-meta-item">📁 ${project?.name || 'Unknown'}</span>
+                ${dueDate ? `<span class="task-meta-item">📅 ${formatDate(task.due_date)}</span>` : ''}
+                <span class="task-priority ${task.priority}">${task.priority}</span>
+            </div>
+        </div>
+        <div class="task-actions">
+            <button class="task-edit-btn" title="Edit">✎</button>
+            <button class="task-delete-btn" title="Delete">✕</button>
+        </div>
+    `;
+}
+
+function taskRowSignature(task) {
+    const project = state.projects.find(p => p.id === task.project_id);
+    return [task.title, task.status, task.priority, task.due_date, project?.name].join('\u0000');
+}
+
+document.getElementById('list-view').addEventListener('scroll', scheduleTaskWindow, { passive: true });
+
+window.addEventListener('resize', () => {
+    taskWindow.measured = false;
+    scheduleTaskWindow();
+});
+
+// The calendar grids are built once; later renders update the day cells in
+// place and reuse the nodes of tasks that are still on the same day.
+const calendarGrids = {
+    month: null,  // day cells, kept while attached to #calendarMonth
+    week: null,   // day cells, kept while attached to #calendarWeek
+};
+
+function calendarDayCells(view, container, createCell, count, createHeaders = () => []) {
+    const cells = calendarGrids[view];
+    if (cells && cells[0].node.parentNode === container) return cells;
+    
+    container.innerHTML = '';
+    createHeaders().forEach(header => container.appendChild(header));
+    calendarGrids[view] = Array.from({ length: count }, () => {
+        const cell = { ...createCell(), tasks: new Map(), key: null };
+        container.appendChild(cell.node);
+        return cell;
+    });
+    return calendarGrids[view];
+}
+
+function tasksByDay(tasks) {
+    const days = new Map();
+    tasks.forEach(task => {
+        const key = dateKey(new Date(task.due_date));
+        if (!days.has(key)) days.set(key, []);
+        days.get(key).push(task);
     });
+    return days;
+}
+
+// Occurrences of a recurring task share its id; several can fall on one day
+function calendarTaskKey(task) {
+    return task.occurrence_date ? `${task.id}@${task.occurrence_date}` : task.id;
+}
+
+function calendarTaskSignature(task) {
+    return [task.title, task.priority, task.status].join('\u0000');
 }
 
 function renderMonthCalendar(calendarTasks) {
@@ -543,60 +1392,54 @@ function renderMonthCalendar(calendarTasks) {
         `${getMonthName(month)} ${year}`;
     
     const firstDay = new Date(year, month, 1);
-    const lastDay = new Date(year, month + 1, 0);
     const startDate = new Date(firstDay);
     startDate.setDate(startDate.getDate() - firstDay.getDay());
     
-    const calendar = document.getElementById('calendarMonth');
-    calendar.innerHTML = '';
-    
-    // Day names
-    const dayNames = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'];
-    dayNames.forEach(day => {
+    const cells = calendarDayCells('month', document.getElementById('calendarMonth'), () => {
+        const node = document.createElement('div');
+        const number = document.createElement('div');
+        number.className = 'calendar-day-number';
+        const tasks = document.createElement('div');
+        tasks.className = 'calendar-day-tasks';
+        node.appendChild(number);
+        node.appendChild(tasks);
+        return { node, number, list: tasks };
+    }, 42, () => ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'].map(day => {
         const div = document.createElement('div');
         div.className = 'calendar-day-name';
         div.textContent = day;
-        calendar.appendChild(div);
-    });
+        return div;
+    }));
     
-    // Days
-    for (let i = 0; i < 42; i++) {
+    const days = tasksByDay(calendarTasks);
+    cells.forEach((cell, i) => {
         const currentDate = new Date(startDate);
         currentDate.setDate(currentDate.getDate() + i);
+        const key = dateKey(currentDate);
         
-        const dayDiv = document.createElement('div');
-        dayDiv.className = 'calendar-day';
-        
-        if (currentDate.getMonth() !== month) {
-            dayDiv.classList.add('other-month');
-        }
+        let className = 'calendar-day';
+        if (currentDate.getMonth() !== month) className += ' other-month';
+        if (isToday(currentDate)) className += ' today';
+        if (cell.node.className !== className) cell.node.className = className;
         
-        if (isToday(currentDate)) {
-            dayDiv.classList.add('today');
+        if (cell.key !== key) {
+            // Another day now: its tasks are other tasks
+            cell.number.textContent = currentDate.getDate();
+            cell.tasks.clear();
+            cell.key = key;
         }
         
-        dayDiv.innerHTML = `<div class="calendar-day-number">${currentDate.getDate()}</div>`;
-        
-        const dayTasks = calendarTasks.filter(task => {
-            const taskDate = new Date(task.due_date);
-            return taskDate.toDateString() === currentDate.toDateString();
-        });
-        
-        if (dayTasks.length > 0) {
-            const tasksDiv = document.createElement('div');
-            tasksDiv.className = 'calendar-day-tasks';
-            dayTasks.forEach(task => {
-                const taskSpan = document.createElement('span');
-                taskSpan.className = `calendar-task ${task.priority}`;
-                taskSpan.textContent = task.title.substring(0, 15);
-                taskSpan.addEventListener('click', () => editTask(task.id));
-                tasksDiv.appendChild(taskSpan);
-            });
-            dayDiv.appendChild(tasksDiv);
-        }
-        
-        calendar.appendChild(dayDiv);
-    }
+        const dayTasks = days.get(key) || [];
+        cell.list.style.display = dayTasks.length > 0 ? '' : 'none';
+        reconcileChildren(cell.list, dayTasks, cell.tasks, task => {
+            const taskSpan = document.createElement('span');
+            taskSpan.addEventListener('click', () => editTask(task.id, task.occurrence_date));
+            return taskSpan;
+        }, (taskSpan, task) => {
+            taskSpan.className = `calendar-task ${task.priority}`;
+            taskSpan.textContent = task.title.substring(0, 15);
+        }, calendarTaskSignature, calendarTaskKey);
+    });
 }
 
 function renderWeekCalendar(weekTasks) {
@@ -613,47 +1456,44 @@ function renderWeekCalendar(weekTasks) {
     document.getElementById('weekTitle').textContent = 
         `Week ${week} - ${formatDate(weekStart)} to ${formatDate(new Date(weekStart.getTime() + 6 * 24 * 60 * 60 * 1000))}`;
     
-    const weekGrid = document.getElementById('calendarWeek');
-    weekGrid.innerHTML = '';
+    const cells = calendarDayCells('week', document.getElementById('calendarWeek'), () => {
+        const node = document.createElement('div');
+        const header = document.createElement('div');
+        header.className = 'week-day-header';
+        const tasks = document.createElement('div');
+        tasks.className = 'week-day-tasks';
+        node.appendChild(header);
+        node.appendChild(tasks);
+        return { node, header, list: tasks };
+    }, 7);
     
-    for (let i = 0; i < 7; i++) {
+    const days = tasksByDay(weekTasks);
+    cells.forEach((cell, i) => {
         const currentDate = new Date(weekStart);
         currentDate.setDate(currentDate.getDate() + i);
+        const key = dateKey(currentDate);
         
-        const dayDiv = document.createElement('div');
-        dayDiv.className = 'week-day';
+        const className = isToday(currentDate) ? 'week-day today' : 'week-day';
+        if (cell.node.className !== className) cell.node.className = className;
         
-        if (isToday(currentDate)) {
-            dayDiv.classList.add('today');
+        if (cell.key !== key) {
+            cell.header.innerHTML = `
+                <div>${getDayName(i)}</div>
+                <div class="week-day-date">${currentDate.getDate()}</div>
+            `;
+            cell.tasks.clear();
+            cell.key = key;
         }
         
-        const headerDiv = document.createElement('div');
-        headerDiv.className = 'week-day-header';
-        headerDiv.innerHTML = `
-            <div>${getDayName(i)}</div>
-            <div class="week-day-date">${currentDate.getDate()}</div>
-        `;
-        dayDiv.appendChild(headerDiv);
-        
-        const tasksDiv = document.createElement('div');
-        tasksDiv.className = 'week-day-tasks';
-        
-        const dayTasks = weekTasks.filter(task => {
-            const taskDate = new Date(task.due_date);
-            return taskDate.toDateString() === currentDate.toDateString();
-        });
-        
-        dayTasks.forEach(task => {
+        reconcileChildren(cell.list, days.get(key) || [], cell.tasks, task => {
             const taskDiv = document.createElement('div');
+            taskDiv.addEventListener('click', () => editTask(task.id, task.occurrence_date));
+            return taskDiv;
+        }, (taskDiv, task) => {
             taskDiv.className = `week-task ${task.priority} ${task.status}`;
             taskDiv.textContent = task.title;
-            taskDiv.addEventListener('click', () => editTask(task.id));
-            tasksDiv.appendChild(taskDiv);
-        });
-        
-        dayDiv.appendChild(tasksDiv);
-        weekGrid.appendChild(dayDiv);
-    }
+        }, calendarTaskSignature, calendarTaskKey);
+    });
 }
 
 function updateViewTitle() {
@@ -725,18 +1565,8 @@ document.getElementById('projectForm').addEventListener('submit', async (e) => {
         color: document.getElementById('projectColor').value
     };
     
-    try {
-        if (state.editingProjectId) {
-            await updateProject(state.editingProjectId, projectData);
-        } else {
-            await createProject(projectData);
-        }
-        closeModal('projectModal');
-        loadProjects();
-        loadTasks();
-    } catch (error) {
-        console.error('Error saving project:', error);
-    }
+    closeModal('projectModal');
+    await saveProject(state.editingProjectId, projectData);
 });
 
 function editProject(projectId) {
@@ -753,16 +1583,7 @@ function editProject(projectId) {
 
 async function deleteProjectConfirm(projectId) {
     if (confirm('Are you sure you want to delete this project and all its tasks?')) {
-        try {
-            await deleteProject(projectId);
-            if (state.currentProjectId === projectId) {
-                state.currentProjectId = null;
-            }
-            loadProjects();
-            loadTasks();
-        } catch (error) {
-            console.error('Error deleting project:', error);
-        }
+        await removeProject(projectId);
     }
 }
 
@@ -773,6 +1594,7 @@ document.getElementById('btnAddTask').addEventListener('click', () => {
         return;
     }
     state.editingTaskId = null;
+    state.editingOccurrence = null;
     document.getElementById('taskForm').reset();
     document.getElementById('taskModalTitle').textContent = 'New Task';
     document.getElementById('deleteTaskBtn').style.display = 'none';
@@ -806,65 +1628,55 @@ document.getElementById('taskForm').addEventListener('submit', async (e) => {
         status: 'pending'
     };
     
-    try {
-        if (state.editingTaskId) {
-            await updateTask(state.editingTaskId, taskData);
-        } else {
-            await createTask(taskData);
-        }
-        closeModal('taskModal');
-        loadTasks();
-        if (state.currentView !== 'list-view') {
-            loadCalendar();
-        }
-    } catch (error) {
-        console.error('Error saving task:', error);
+    closeModal('taskModal');
+    if (state.editingOccurrence) {
+        const { title, description, priority, due_date } = taskData;
+        const changes = { title, description, priority };
+        if (due_date) changes.due_date = due_date;  // moves the occurrence
+        await saveOccurrence(state.editingTaskId, state.editingOccurrence, changes);
+        return;
     }
+    await saveTask(state.editingTaskId, taskData);
 });
 
-function editTask(taskId) {
-    const task = state.tasks.find(t => t.id === taskId);
+// With `occurrenceDate`, the form edits that one occurrence of a recurring task
+function editTask(taskId, occurrenceDate = null) {
+    const task = occurrenceDate
+        ? state.calendarTasks.find(t => t.id === taskId && t.occurrence_date === occurrenceDate)
+        : state.tasks.find(t => t.id === taskId);
     if (!task) return;
     
     state.editingTaskId = taskId;
+    state.editingOccurrence = occurrenceDate;
     document.getElementById('taskTitle').value = task.title;
     document.getElementById('taskDescription').value = task.description || '';
     document.getElementById('taskProject').value = task.project_id;
     document.getElementById('taskPriority').value = task.priority;
     document.getElementById('taskDueDate').value = task.due_date ? task.due_date.substring(0, 16) : '';
     document.getElementById('taskReminder').value = task.reminder_date ? task.reminder_date.substring(0, 16) : '';
-    document.getElementById('taskModalTitle').textContent = 'Edit Task';
+    document.getElementById('taskModalTitle').textContent = occurrenceDate ? 'Edit Occurrence' : 'Edit Task';
     document.getElementById('deleteTaskBtn').style.display = 'block';
     
     openModal('taskModal');
 }
 
 document.getElementById('deleteTaskBtn').addEventListener('click', async () => {
-    if (state.editingTaskId && confirm('Are you sure you want to delete this task?')) {
-        try {
-            await deleteTask(state.editingTaskId);
+    if (state.editingOccurrence) {
+        if (confirm('Skip this occurrence?')) {
             closeModal('taskModal');
-            loadTasks();
-            if (state.currentView !== 'list-view') {
-                loadCalendar();
-            }
-        } catch (error) {
-            console.error('Error deleting task:', error);
+            await saveOccurrence(state.editingTaskId, state.editingOccurrence, { cancelled: true });
         }
+        return;
+    }
+    if (state.editingTaskId && confirm('Are you sure you want to delete this task?')) {
+        closeModal('taskModal');
+        await removeTask(state.editingTaskId);
     }
 });
 
 async function deleteTaskConfirm(taskId) {
     if (confirm('Are you sure you want to delete this task?')) {
-        try {
-            await deleteTask(taskId);
-            loadTasks();
-            if (state.currentView !== 'list-view') {
-                loadCalendar();
-            }
-        } catch (error) {
-            console.error('Error deleting task:', error);
-        }
+        await removeTask(taskId);
     }
 }
 
@@ -887,10 +1699,10 @@ document.querySelectorAll('.tab-btn').forEach(btn => {
         state.currentView = tabName;
         
         // Load data for the view
-        if (tabName === 'calendar-month') {
-            loadCalendar();
-        } else if (tabName === 'calendar-week') {
-            loadWeekCalendar();
+        if (tabName !== 'list-view') {
+            requestReload('calendar');
+        } else {
+            renderTaskWindow();  // the window was sized while hidden
         }
     });
 });
@@ -899,22 +1711,22 @@ document.querySelectorAll('.tab-btn').forEach(btn => {
 
 document.getElementById('prevMonth').addEventListener('click', () => {
     state.currentMonth.setMonth(state.currentMonth.getMonth() - 1);
-    loadCalendar();
+    requestReload('calendar');
 });
 
 document.getElementById('nextMonth').addEventListener('click', () => {
     state.currentMonth.setMonth(state.currentMonth.getMonth() + 1);
-    loadCalendar();
+    requestReload('calendar');
 });
 
 document.getElementById('prevWeek').addEventListener('click', () => {
     state.currentMonth.setDate(state.currentMonth.getDate() - 7);
-    loadWeekCalendar();
+    requestReload('calendar');
 });
 
 document.getElementById('nextWeek').addEventListener('click', () => {
     state.currentMonth.setDate(state.currentMonth.getDate() + 7);
-    loadWeekCalendar();
+    requestReload('calendar');
 });
 
 // ==================== FILTERS ====================
@@ -932,7 +1744,7 @@ document.querySelectorAll('.filter-btn').forEach(btn => {
             item.classList.remove('active');
         });
         
-        loadTasks();
+        requestReload('tasks');
         updateViewTitle();
     });
 });
@@ -970,8 +1782,7 @@ async function initialize() {
             state.projects = await getProjects();
             state.tasks = await getTasks();
         } else {
-            // Load from localStorage
-            loadFromLocalStorage();
+            await loadFromOfflineStore();
         }
         
         renderProjects();
@@ -979,7 +1790,7 @@ async function initialize() {
         updateProjectSelect();
     } catch (error) {
         console.error('Initialization error:', error);
-        loadFromLocalStorage();
+        await loadFromOfflineStore();
         renderProjects();
         renderTasks();
         updateProjectSelect();
@@ -3,15 +3,71 @@
 TaskHub Installation & Features Verification Script
 
 This script checks that all files are in place and provides a verification checklist.
+With --perf it diagnoses the performance of a deployment instead: database
+settings, indexes used by the hot queries, table sizes, fragmentation and
+measured query and HTTP latencies. Only the standard library is needed.
 
 Usage:
     python verify_installation.py
+    python verify_installation.py --perf [--database backend/tasks.db] [--url http://localhost:5000]
 """
 
+import argparse
 import os
+import sqlite3
+import statistics
 import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from migrations import PENDING_QUEUE  # noqa: E402  (imports nothing outside the standard library)
+
+# Thresholds of the --perf checks
+MAX_FREELIST_RATIO = 0.2    # free pages / total pages before VACUUM is worth it
+MAX_WAL_MB = 64             # a WAL this large means checkpoints are starved
+MAX_QUERY_MS = 20           # median latency of a representative query
+MAX_HTTP_MS = 100           # median local round trip of an API request
+
+# Tables that grow with usage; a full scan of one of them is a missing index
+LARGE_TABLES = ("tasks", "task_occurrences")
+
+# Hot query shapes of the API, checked with EXPLAIN QUERY PLAN and timed.
+# Keep in sync with backend/app.py. Timestamp parameters are datetimes and
+# are bound in the storage mode of the database (see backend/timestamps.py).
+JAN_1, FEB_1, DEC_31 = datetime(2024, 1, 1), datetime(2024, 2, 1), datetime(2024, 12, 31)
+HOT_QUERIES = [
+    ("Calendar month window",
+     "SELECT * FROM tasks WHERE recurrence_rule IS NULL AND due_date >= ? AND due_date < ?",
+     (JAN_1, FEB_1)),
+    ("Tasks of a project in a date range",
+     "SELECT * FROM tasks WHERE project_id = ? AND due_date >= ? AND due_date <= ?",
+     (1, JAN_1, DEC_31)),
+    ("Recurring series in a window",
+     "SELECT * FROM tasks WHERE recurrence_rule IS NOT NULL AND due_date < ? "
+     "AND (recurrence_until IS NULL OR recurrence_until >= ?)",
+     (FEB_1, JAN_1)),
+    ("Next due queue",
+     f"SELECT * FROM tasks WHERE {PENDING_QUEUE} AND due_date >= ? ORDER BY due_date, id LIMIT 50",
+     (JAN_1,)),
+    ("Overdue queue of a project",
+     f"SELECT * FROM tasks WHERE {PENDING_QUEUE} AND project_id = ? AND due_date < ? "
+     "ORDER BY due_date, id LIMIT 50",
+     (1, JAN_1)),
+    ("Occurrence overrides of a series",
+     "SELECT * FROM task_occurrences WHERE task_id IN (?, ?, ?)",
+     (1, 2, 3)),
+    ("Project dashboard totals",
+     "SELECT p.id, s.pending, s.completed, "
+     "(SELECT SUM(d.pending) FROM project_due_stats d WHERE d.project_id = p.id AND d.due_day < ?) "
+     "FROM projects p LEFT JOIN project_stats s ON s.project_id = p.id",
+     ("2024-01-01",)),
+]
+
 
 def check_file(path, description=""):
     """Check if a file exists and print status"""
@@ -31,6 +87,159 @@ def check_dir(path, description=""):
     return exists
 
 
+def report(ok, message, warning=False):
+    """Print one --perf finding; returns False if it needs attention"""
+    status = "✅" if ok else ("⚠️ " if warning else "❌")
+    print(f"  {status} {message}")
+    return ok or warning
+
+
+def default_database(base_path):
+    """Database of the default app configuration (TASKHUB_DATABASE_URL or backend/tasks.db)"""
+    url = os.environ.get("TASKHUB_DATABASE_URL", "")
+    if url.startswith("sqlite:///"):
+        return Path(url[len("sqlite:///"):])
+    return base_path / "backend" / "tasks.db"
+
+
+def timestamp_storage(connection):
+    """Timestamp format recorded in schema_settings ('text' or 'epoch')"""
+    try:
+        row = connection.execute(
+            "SELECT value FROM schema_settings WHERE key = 'timestamp_storage'"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return "text"  # not initialized by a current backend yet
+    return row[0] if row and row[0] else "text"
+
+
+def bind_timestamp(value, storage):
+    """Datetime parameter in the form the database stores it (see backend/timestamps.py)"""
+    if not isinstance(value, datetime):
+        return value
+    if storage == "epoch":
+        return (value - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def median_ms(fn, runs=5):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def check_settings(connection, db_path):
+    print("\n🔍 Database Settings:")
+    ok = True
+    journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+    ok &= report(journal_mode == "wal",
+                 f"journal_mode = {journal_mode} (wal lets readers and backups run during writes)")
+    page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+    ok &= report(page_size >= 4096, f"page_size = {page_size} bytes", warning=True)
+    auto_vacuum = {0: "none", 1: "full", 2: "incremental"}[connection.execute("PRAGMA auto_vacuum").fetchone()[0]]
+    report(True, f"auto_vacuum = {auto_vacuum}")
+    report(True, f"schema version (user_version) = {connection.execute('PRAGMA user_version').fetchone()[0]}")
+    report(True, f"timestamp storage = {timestamp_storage(connection)}")
+    wal = Path(f"{db_path}-wal")
+    wal_mb = wal.stat().st_size / 1e6 if wal.exists() else 0
+    ok &= report(wal_mb <= MAX_WAL_MB, f"WAL file = {wal_mb:.1f} MB (limit {MAX_WAL_MB} MB)", warning=True)
+    return ok
+
+
+def check_sizes(connection):
+    print("\n🔍 Tables & Fragmentation:")
+    ok = True
+    try:
+        sizes = dict(connection.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+    except sqlite3.OperationalError:
+        sizes = {}  # SQLite built without the dbstat table
+    tables = [row[0] for row in connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+    for table in tables:
+        rows = connection.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        size = sizes.get(table)
+        detail = ""
+        if size is not None:
+            detail = f", {size / 1e6:.2f} MB" + (f", {size / rows:.0f} bytes/row" if rows else "")
+        report(True, f"{table}: {rows} rows{detail}")
+    page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+    freelist = connection.execute("PRAGMA freelist_count").fetchone()[0]
+    ratio = freelist / page_count if page_count else 0
+    ok &= report(
+        ratio <= MAX_FREELIST_RATIO,
+        f"free pages: {freelist} of {page_count} ({ratio:.0%}, limit {MAX_FREELIST_RATIO:.0%})"
+        + ("" if ratio <= MAX_FREELIST_RATIO else " - run VACUUM"),
+        warning=True
+    )
+    return ok
+
+
+def check_queries(connection):
+    print("\n🔍 Hot Queries (plan, median latency):")
+    ok = True
+    storage = timestamp_storage(connection)
+    for name, sql, params in HOT_QUERIES:
+        params = tuple(bind_timestamp(value, storage) for value in params)
+        try:
+            plan = [row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        except sqlite3.OperationalError as e:
+            ok &= report(False, f"{name}: {e} (run 'flask --app app init-db')")
+            continue
+        full_scans = [step for step in plan if step.startswith("SCAN") and "INDEX" not in step
+                      and step.split()[1] in LARGE_TABLES]
+        latency = median_ms(lambda: connection.execute(sql, params).fetchall())
+        fine = not full_scans and latency <= MAX_QUERY_MS
+        problem = f" - full scan: {'; '.join(full_scans)} (missing index?)" if full_scans else ""
+        ok &= report(fine, f"{name}: {latency:.2f} ms{problem}")
+    return ok
+
+
+def check_http(base_url):
+    print(f"\n🔍 HTTP Round Trip ({base_url}):")
+    ok = True
+    for path in ("/api/health", "/api/tasks/next?limit=20", "/api/projects/stats"):
+        def fetch():
+            with urllib.request.urlopen(base_url + path, timeout=5) as response:
+                response.read()
+        try:
+            fetch()  # warm up (first request also initializes the schema)
+        except (urllib.error.URLError, OSError) as e:
+            return report(False, f"{base_url} not reachable ({e}) - is the backend running?", warning=True)
+        latency = median_ms(fetch)
+        ok &= report(latency <= MAX_HTTP_MS, f"GET {path}: {latency:.1f} ms (limit {MAX_HTTP_MS} ms)")
+    return ok
+
+
+def perf_doctor(db_path, base_url):
+    print("\n" + "="*70)
+    print("    TaskHub - Performance Doctor")
+    print("="*70)
+    print(f"\n📋 Database: {db_path}")
+    if not Path(db_path).is_file():
+        print("  ❌ Database file not found (start the backend once or pass --database)")
+        return 1
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        all_good = check_settings(connection, db_path)
+        all_good &= check_sizes(connection)
+        all_good &= check_queries(connection)
+    finally:
+        connection.close()
+    all_good &= check_http(base_url.rstrip("/"))
+
+    print("\n" + "="*70)
+    if all_good:
+        print("✅ No performance problems found")
+    else:
+        print("❌ Some checks are outside the recommended thresholds. See above.")
+    print("="*70 + "\n")
+    return 0 if all_good else 1
+
+
 def main():
     print("\n" + "="*70)
     print("    TaskHub - Installation & Features Verification")
@@ -147,4 +356,11 @@ def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify a TaskHub installation")
+    parser.add_argument("--perf", action="store_true", help="diagnose database and API performance")
+    parser.add_argument("--database", type=Path, help="SQLite database to check (default: configured database)")
+    parser.add_argument("--url", default="http://localhost:5000", help="backend URL for the HTTP checks")
+    args = parser.parse_args()
+    if args.perf:
+        sys.exit(perf_doctor(args.database or default_database(Path(__file__).parent), args.url))
     sys.exit(main())